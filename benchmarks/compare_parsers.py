@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Compare speed, memory use and results of module parsers on a corpus
+
+Run from the repository root:
+python -m benchmarks.compare_parsers path/to/corpus --parsers ast regex
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from docstrings2html import PARSERS, read_lines
+
+
+def main():
+    """Benchmark entry point"""
+    arguments = _parse_arguments()
+    corpus, skipped = read_corpus(arguments.corpus)
+    size = sum(path.stat().st_size for path in corpus)
+    if not size:
+        # Speed per megabyte cannot be measured on empty files
+        sys.exit(f'No readable Python code in {arguments.corpus}')
+    megabytes = size / 2 ** 20
+    print(f'{len(corpus)} files, {megabytes:.2f} MB, {skipped} skipped as '
+          f'not UTF-8')
+    print(f'{"parser":<10}{"s/MB":>10}{"MB/s":>10}{"peak MB":>10}'
+          f'{"entities":>10}{"fallbacks":>10}')
+
+    results = {}
+    for name in arguments.parsers:
+        parser = _create_parser(name, arguments)
+        seconds, entities = measure_time(parser, corpus, arguments.repeat)
+        peak = measure_memory(_create_parser(name, arguments), corpus)
+        fallbacks = '-'
+        if hasattr(parser, 'fallback_count'):
+            fallbacks = parser.fallback_count // arguments.repeat
+        results[name] = entities
+        print(f'{name:<10}{seconds / megabytes:>10.3f}'
+              f'{megabytes / seconds:>10.2f}{peak / 2 ** 20:>10.2f}'
+              f'{len(entities):>10}{fallbacks:>10}')
+
+    reference = arguments.parsers[0]
+    for name in arguments.parsers[1:]:
+        print_differences(reference, results[reference], name, results[name],
+                          arguments.examples)
+
+
+def read_corpus(directory):
+    """Read all Python files in the directory, return their lines and the
+    number of files skipped because they are not UTF-8"""
+    corpus = {}
+    skipped = 0
+    for path in sorted(Path(directory).rglob('*.py')):
+        try:
+            corpus[path] = read_lines(path)
+        except UnicodeDecodeError:
+            skipped += 1
+    return corpus, skipped
+
+
+def measure_time(parser, corpus, repeat):
+    """Return the best time of parsing the corpus and extracted entities"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = _parse_corpus(parser, corpus)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, get_entities(results)
+
+
+def measure_memory(parser, corpus):
+    """Return the peak memory allocated while parsing the corpus"""
+    tracemalloc.start()
+    try:
+        _parse_corpus(parser, corpus)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def get_entities(results):
+    """Map (path, class, method) of every entity to its parameters and
+    docstring"""
+    entities = {}
+    for path, classes in results.items():
+        for class_ in classes:
+            entities[path, class_.name, ''] = (class_.parameters,
+                                               class_.docstring)
+            for method in class_.methods:
+                entities[path, class_.name, method.name] = (
+                    ', '.join(method.parameters), method.docstring)
+    return entities
+
+
+def print_differences(reference_name, reference, name, entities, examples):
+    """Print entities missing, extra or different compared to the
+    reference"""
+    missing = sorted(reference.keys() - entities.keys())
+    extra = sorted(entities.keys() - reference.keys())
+    changed = sorted(key for key in reference.keys() & entities.keys()
+                     if reference[key] != entities[key])
+    print(f'\n{name} compared to {reference_name}: {len(missing)} missing, '
+          f'{len(extra)} extra, {len(changed)} different')
+    for title, keys in (('missing', missing), ('extra', extra),
+                        ('different', changed)):
+        for path, class_name, method_name in keys[:examples]:
+            entity = '.'.join(filter(None, (class_name, method_name)))
+            print(f'  {title}: {path}: {entity or "<module>"}')
+
+
+def _create_parser(name, arguments):
+    """Create a parser by its command-line name"""
+    return PARSERS[name](arguments.nonpublic, arguments.empty)
+
+
+def _parse_corpus(parser, corpus):
+    """Extract classes from every file of the corpus"""
+    return {path: parser.get_classes(lines) for path, lines in corpus.items()}
+
+
+def _parse_arguments():
+    """Parse arguments"""
+    argparser = argparse.ArgumentParser(
+        description='Compare module parsers on a directory of Python files')
+    argparser.add_argument('corpus', help='Directory with Python files')
+    argparser.add_argument('--parsers', help='Parsers to compare, the first '
+                                             'one is the reference',
+                           nargs='+', choices=PARSERS,
+                           default=[name for name in ('ast', 'scanner',
+                                                      'regex')
+                                    if name in PARSERS])
+    argparser.add_argument('--repeat', help='Number of timed runs',
+                           type=int, default=3)
+    argparser.add_argument('--examples',
+                           help='Number of differences to print',
+                           type=int, default=5)
+    argparser.add_argument('--nonpublic', '-n',
+                           help='Include non-public methods and classes',
+                           action='store_true')
+    argparser.add_argument('--empty', '-e',
+                           help='Include methods with no docstring',
+                           action='store_true')
+    return argparser.parse_args()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Generate a synthetic package tree for benchmarks
+
+Run from the repository root:
+python -m benchmarks.corpus path/to/corpus --depth 3 --fan-out 4
+"""
+
+import argparse
+import random
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+WORDS = ('return', 'value', 'object', 'module', 'parse', 'create', 'list',
+         'string', 'page', 'package', 'method', 'class', 'file', 'path',
+         'index', 'name', 'result', 'default', 'given', 'check', 'read',
+         'write', 'template', 'docstring', 'entity', 'data', 'number')
+
+
+@dataclass
+class CorpusSettings:
+    """Shape of a generated package tree"""
+    depth: int = 2
+    fan_out: int = 3
+    modules: int = 5
+    classes: int = 3
+    methods: int = 5
+    functions: int = 3
+    docstring_words: int = 30
+    body_lines: int = 5
+    seed: int = 0
+
+    def to_dict(self):
+        """Return settings as a dictionary for benchmark results"""
+        return asdict(self)
+
+
+def generate_corpus(directory, settings):
+    """Write a package tree to the directory, return the number of modules
+    and their total size in bytes"""
+    generator = random.Random(settings.seed)
+    root = Path(directory, 'corpus')
+    return _generate_package(root, settings, settings.depth, generator)
+
+
+def _generate_package(directory, settings, depth, generator):
+    """Write a package with modules and nested packages"""
+    directory.mkdir(parents=True, exist_ok=True)
+    init = f'"""{_get_text(settings, generator)}"""\n'
+    directory.joinpath('__init__.py').write_text(init, encoding='utf-8')
+    count = 0
+    size = 0
+    for number in range(settings.modules):
+        text = generate_module(settings, generator)
+        directory.joinpath(f'module{number}.py').write_text(
+            text, encoding='utf-8')
+        count += 1
+        size += len(text.encode('utf-8'))
+    if depth > 0:
+        for number in range(settings.fan_out):
+            nested_count, nested_size = _generate_package(
+                directory.joinpath(f'package{number}'), settings, depth - 1,
+                generator)
+            count += nested_count
+            size += nested_size
+    return count, size
+
+
+def generate_module(settings, generator):
+    """Return the text of a module with classes, methods and functions"""
+    lines = [f'"""{_get_text(settings, generator)}"""', '', 'import os', '']
+    for number in range(settings.functions):
+        lines.extend(_get_function(f'function{number}', '', settings,
+                                   generator))
+    for number in range(settings.classes):
+        lines.extend([f'class Class{number}(object):',
+                      f'    """{_get_text(settings, generator)}"""', ''])
+        for method in range(settings.methods):
+            lines.extend(_get_function(f'method{method}', '    ', settings,
+                                       generator, 'self, '))
+    return '\n'.join(lines) + '\n'
+
+
+def _get_function(name, indent, settings, generator, first_parameter=''):
+    """Return lines of a function with a docstring and a body"""
+    lines = [f'{indent}def {name}({first_parameter}value, default=None):',
+             f'{indent}    """{_get_text(settings, generator)}"""']
+    for number in range(settings.body_lines):
+        lines.append(f'{indent}    result{number} = os.path.join('
+                     f'str(value), "{generator.choice(WORDS)}")')
+    lines.extend([f'{indent}    return default', ''])
+    return lines
+
+
+def _get_text(settings, generator):
+    """Return a docstring text wrapped to lines of ten words"""
+    words = [generator.choice(WORDS) for _ in range(settings.docstring_words)]
+    return '\n'.join(' '.join(words[start:start + 10])
+                     for start in range(0, len(words), 10))
+
+
+def add_corpus_arguments(argparser):
+    """Add options that set the shape of the corpus"""
+    defaults = CorpusSettings()
+    for name, help_text in (
+            ('depth', 'Levels of nested packages'),
+            ('fan-out', 'Nested packages in every package'),
+            ('modules', 'Modules in every package'),
+            ('classes', 'Classes in every module'),
+            ('methods', 'Methods in every class'),
+            ('functions', 'Module-level functions in every module'),
+            ('docstring-words', 'Words in every docstring'),
+            ('body-lines', 'Lines of code in every function body'),
+            ('seed', 'Random seed')):
+        argparser.add_argument(f'--{name}', help=help_text, type=int,
+                               default=getattr(defaults,
+                                               name.replace('-', '_')))
+
+
+def get_corpus_settings(arguments):
+    """Return corpus settings from parsed arguments"""
+    return CorpusSettings(**{name: getattr(arguments, name)
+                             for name in CorpusSettings().to_dict()})
+
+
+def main():
+    """Generator entry point"""
+    argparser = argparse.ArgumentParser(
+        description='Generate a synthetic package tree for benchmarks')
+    argparser.add_argument('directory', help='Directory for the corpus')
+    add_corpus_arguments(argparser)
+    arguments = argparser.parse_args()
+    count, size = generate_corpus(arguments.directory,
+                                  get_corpus_settings(arguments))
+    print(f'{count} modules, {size / 2 ** 20:.2f} MB')
+
+
+if __name__ == '__main__':
+    main()
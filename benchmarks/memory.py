@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Measure peak memory of parsing a large synthetic package tree
+
+Every source tree is measured in a separate process, so a checkout of an
+older revision can be compared with the current one.
+Run from the repository root:
+python -m benchmarks.memory --trees path/to/old/checkout .
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.corpus import (add_corpus_arguments, generate_corpus,
+                               get_corpus_settings)
+
+# Keeps the whole parsed model alive like a build with indexes does
+CHILD = '''
+import resource, sys, time
+sys.path.insert(0, sys.argv[1])
+import docstrings2html
+from modules.package_parser import PackageParser
+# Trees older than the --parser option only have ModuleParser
+parsers = getattr(docstrings2html, 'PARSERS',
+                  {'regex': docstrings2html.ModuleParser})
+if sys.argv[3] not in parsers:
+    sys.exit(f'The tree has no {sys.argv[3]} parser')
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+parser = PackageParser(docstrings2html.try_read,
+                       parsers[sys.argv[3]](False, False), [], False)
+packages = parser.get_packages(sys.argv[2])
+seconds = time.perf_counter() - start
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+modules = sum(len(package.modules) for package in packages)
+print(modules, before, after, seconds)
+'''
+
+
+def main():
+    """Benchmark entry point"""
+    arguments = _parse_arguments()
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = arguments.corpus
+        if corpus is None:
+            count, size = generate_corpus(directory,
+                                          get_corpus_settings(arguments))
+            print(f'Generated {count} modules, {size / 2 ** 20:.1f} MB')
+            corpus = Path(directory, 'corpus')
+        print(f'{"peak RSS":>10}{"model":>10}{"per module":>12}'
+              f'{"seconds":>9}  tree')
+        for tree in arguments.trees:
+            modules, before, after, seconds = measure(tree, corpus,
+                                                      arguments.parser)
+            print(f'{_to_mb(after):>7.1f} MB{_to_mb(after - before):>7.1f} MB'
+                  f'{(after - before) * 1024 / max(modules, 1):>8.0f} B'
+                  f'{seconds:>9.2f}  {tree}')
+
+
+def measure(tree, corpus, parser):
+    """Parse the corpus with the source tree in a new process, return the
+    number of modules, peak RSS in kilobytes before and after parsing and
+    the parsing time"""
+    child = subprocess.run(
+        [sys.executable, '-c', CHILD, str(Path(tree).resolve()),
+         str(corpus), parser],
+        capture_output=True, text=True)
+    if child.returncode != 0:
+        print(f'Error while parsing with the tree {tree}:\n{child.stderr}',
+              file=sys.stderr)
+        sys.exit(1)
+    modules, before, after, seconds = child.stdout.split()
+    return int(modules), int(before), int(after), float(seconds)
+
+
+def _to_mb(kilobytes):
+    """Convert kilobytes reported by getrusage to megabytes"""
+    return kilobytes / 1024
+
+
+def _parse_arguments():
+    """Parse arguments"""
+    argparser = argparse.ArgumentParser(
+        description='Measure peak memory of parsing a synthetic package tree')
+    add_corpus_arguments(argparser)
+    # About 100 000 small modules
+    argparser.set_defaults(depth=4, fan_out=10, modules=9, classes=2,
+                           methods=4, functions=2, docstring_words=10,
+                           body_lines=1)
+    argparser.add_argument('--corpus',
+                           help='Existing package tree to parse instead of '
+                                'generating one')
+    argparser.add_argument('--trees', help='Source trees to compare',
+                           nargs='+', default=['.'])
+    argparser.add_argument('--parser', help='Module parser to use',
+                           choices=['regex', 'scanner', 'ast'],
+                           default='regex')
+    return argparser.parse_args()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Measure latency and throughput of the documentation server with a cold
+and a warm page cache
+
+Run from the repository root:
+python -m benchmarks.serve_load --clients 8 --rounds 3
+python -m benchmarks.serve_load --directory path/to/package
+"""
+
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.corpus import (add_corpus_arguments, generate_corpus,
+                               get_corpus_settings)
+from docstrings2html import PARSERS, ROOT, read_lines
+from modules.doc_server import DocServer, PageCache, create_server
+from modules.package_parser import PackageParser
+from modules.template_formatter import TemplateFormatter
+
+IGNORE = ['*_test.py', 'test_*.py']
+
+
+def main():
+    """Benchmark entry point"""
+    arguments = _parse_arguments()
+    with tempfile.TemporaryDirectory() as directory:
+        root = arguments.directory
+        if root is None:
+            generate_corpus(directory, get_corpus_settings(arguments))
+            root = Path(directory, 'corpus')
+        docs = DocServer(root, PackageParser(
+            read_lines, PARSERS[arguments.parser](False, False), IGNORE,
+            False), TemplateFormatter(ROOT),
+            PageCache(int(arguments.cache_size * 2 ** 20)))
+        server = create_server(('127.0.0.1', 0), docs, True)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}'
+            pages = [url + path for path in get_page_paths(docs)]
+            results = {'cold cache': measure(pages, arguments.clients)}
+            results['warm cache'] = measure(pages * arguments.rounds,
+                                            arguments.clients)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+    print(f'{len(pages)} pages, {arguments.clients} clients, '
+          f'{docs.cache.hits} cache hits, {docs.cache.misses} misses, '
+          f'{docs.cache.evictions} evictions')
+    print(f'{"run":<12}{"requests":>10}{"req/s":>10}{"p50 ms":>10}'
+          f'{"p95 ms":>10}{"p99 ms":>10}{"max ms":>10}')
+    for name, (times, seconds) in results.items():
+        print(f'{name:<12}{len(times):>10}{len(times) / seconds:>10.0f}'
+              f'{_get_percentile(times, 50):>10.2f}'
+              f'{_get_percentile(times, 95):>10.2f}'
+              f'{_get_percentile(times, 99):>10.2f}'
+              f'{max(times) * 1000:>10.2f}')
+
+
+def get_page_paths(docs):
+    """Return paths of the index pages and docpages of the served
+    directory, found by a walk that parses nothing"""
+    walker = docs.package_parser.walker
+    walker.start(docs.root)
+    paths = []
+    stack = [docs.root]
+    while stack:
+        directory = stack.pop()
+        relative = directory.relative_to(docs.root.parent).as_posix()
+        paths.append(f'/{relative}/index.html')
+        for path, is_directory in walker.scan(directory):
+            if is_directory:
+                stack.append(path)
+            else:
+                paths.append(f'/{relative}/{path.name}.html')
+    return paths
+
+
+def measure(urls, clients):
+    """Request every URL with a number of concurrent clients, return the
+    latency of every request and the total time"""
+
+    def request(url):
+        start = time.perf_counter()
+        with urllib.request.urlopen(url) as response:
+            response.read()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        times = list(executor.map(request, urls))
+    return times, time.perf_counter() - start
+
+
+def _get_percentile(times, percentile):
+    """Return a percentile of request times in milliseconds"""
+    if len(times) < 2:
+        return times[0] * 1000
+    quantiles = statistics.quantiles(times, n=100, method='inclusive')
+    return quantiles[percentile - 1] * 1000
+
+
+def _parse_arguments():
+    """Parse arguments"""
+    argparser = argparse.ArgumentParser(
+        description='Measure latency and throughput of the documentation '
+                    'server')
+    argparser.add_argument('--directory',
+                           help='Package directory to serve instead of a '
+                                'generated corpus')
+    add_corpus_arguments(argparser)
+    argparser.add_argument('--parser', help='Module parser',
+                           choices=PARSERS, default='regex')
+    argparser.add_argument('--clients', help='Number of concurrent clients',
+                           type=int, default=8)
+    argparser.add_argument('--rounds',
+                           help='Number of requests of every page with a '
+                                'warm cache',
+                           type=int, default=3)
+    argparser.add_argument('--cache-size',
+                           help='Page cache size in megabytes',
+                           type=float, default=64)
+    return argparser.parse_args()
+
+
+if __name__ == '__main__':
+    main()
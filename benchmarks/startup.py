@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Measure the start-up time of the command line tool on a tiny project
+
+Run from the repository root:
+python -m benchmarks.startup --runs 10 --budget 300
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent.joinpath('docstrings2html.py')
+MODULE = 'def function():\n    """Docstring"""\n'
+
+
+def main():
+    """Benchmark entry point"""
+    arguments = _parse_arguments()
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        source = directory.joinpath('project')
+        source.mkdir()
+        source.joinpath('module.py').write_text(MODULE, encoding='utf-8')
+        output = directory.joinpath('output')
+        cache = directory.joinpath('cache')
+        command = [sys.executable, str(SCRIPT), str(source), '--index',
+                   '--output', str(output)]
+
+        results = {
+            'cold cache': measure(
+                command + ['--template-cache'], arguments.runs,
+                lambda run: [str(directory.joinpath(f'cold{run}'))]),
+            'no cache': measure(command + ['--no-template-cache'],
+                                arguments.runs),
+        }
+        _run([sys.executable, str(SCRIPT), 'precompile',
+              '--template-cache', str(cache)])
+        results['warm cache'] = measure(
+            command + ['--template-cache', str(cache)], arguments.runs)
+        incremental = command + ['--template-cache', str(cache),
+                                 '--incremental']
+        _run(incremental)
+        results['no changes'] = measure(incremental, arguments.runs)
+
+    print(f'{"run":<12}{"median ms":>10}{"min ms":>10}')
+    for name, times in results.items():
+        print(f'{name:<12}{statistics.median(times) * 1000:>10.1f}'
+              f'{min(times) * 1000:>10.1f}')
+    if arguments.budget is not None:
+        warm = statistics.median(results['warm cache']) * 1000
+        if warm > arguments.budget:
+            print(f'Warm start takes {warm:.1f} ms, over the budget of '
+                  f'{arguments.budget} ms', file=sys.stderr)
+            sys.exit(1)
+
+
+def measure(command, runs, get_extra_arguments=None):
+    """Return wall times of running the command several times"""
+    times = []
+    for run in range(runs):
+        extra = get_extra_arguments(run) if get_extra_arguments else []
+        start = time.perf_counter()
+        _run(command + extra)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _run(command):
+    """Run a command and fail if it fails"""
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+
+
+def _parse_arguments():
+    """Parse arguments"""
+    argparser = argparse.ArgumentParser(
+        description='Measure start-up time of docstrings2html')
+    argparser.add_argument('--runs', help='Number of runs of every kind',
+                           type=int, default=10)
+    argparser.add_argument('--budget',
+                           help='Fail if the median warm start in '
+                                'milliseconds is over this value',
+                           type=float)
+    return argparser.parse_args()
+
+
+if __name__ == '__main__':
+    main()
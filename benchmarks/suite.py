@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Time every stage of a documentation build on a synthetic corpus and
+compare the results with a baseline
+
+Run from the repository root:
+python -m benchmarks.suite --results results.json
+python -m benchmarks.suite --baseline results.json --threshold 0.2
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.corpus import (add_corpus_arguments, generate_corpus,
+                               get_corpus_settings)
+from docstrings2html import PARSERS, ROOT, try_read, try_write
+from modules.package_parser import PackageParser
+from modules.template_formatter import TemplateFormatter, get_base_path
+
+STAGES = ['walk', 'parse', 'render', 'write']
+IGNORE = ['*_test.py', 'test_*.py']
+
+
+class _SkippingParser:
+    """Module parser that does no parsing, for timing the walk alone"""
+
+    def get_classes(self, lines):
+        return []
+
+    def get_docstring(self, entity_lines):
+        return ''
+
+
+def main():
+    """Benchmark entry point"""
+    arguments = _parse_arguments()
+    settings = get_corpus_settings(arguments)
+    with tempfile.TemporaryDirectory() as directory:
+        count, size = generate_corpus(directory, settings)
+        results = run_suite(Path(directory), arguments.parser,
+                            arguments.repeat)
+    results.update({
+        'corpus': settings.to_dict(),
+        'modules': count,
+        'bytes': size,
+        'python': platform.python_version()
+    })
+    print_results(results)
+    if arguments.results is not None:
+        Path(arguments.results).write_text(json.dumps(results, indent=2),
+                                           encoding='utf-8')
+    if arguments.baseline is not None:
+        baseline = json.loads(Path(arguments.baseline)
+                              .read_text(encoding='utf-8'))
+        thresholds = get_thresholds(arguments.threshold,
+                                    arguments.stage_threshold)
+        regressions = compare_results(baseline, results, thresholds)
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+def run_suite(directory, parser_name, repeat):
+    """Return the best time of every stage over several runs"""
+    root = directory.joinpath('corpus')
+    module_parser = PARSERS[parser_name](False, False)
+    formatter = TemplateFormatter(ROOT)
+    times = {stage: [] for stage in STAGES}
+    for run in range(repeat):
+        start = time.perf_counter()
+        PackageParser(try_read, _SkippingParser(), IGNORE,
+                      False).get_packages(root)
+        times['walk'].append(time.perf_counter() - start)
+
+        packages = PackageParser(try_read, module_parser, IGNORE,
+                                 False).get_packages(root)
+        modules = [module for package in packages
+                   for module in package.modules]
+        contents = [try_read(root.parent.joinpath(module.path))
+                    for module in modules]
+        start = time.perf_counter()
+        for lines in contents:
+            module_parser.get_classes(lines)
+        times['parse'].append(time.perf_counter() - start)
+
+        output = directory.joinpath(f'output{run}')
+        formatter.create_docpage(get_base_path(modules[0].path), modules[0])
+        start = time.perf_counter()
+        pages = [(output.joinpath(module.path).with_suffix('.py.html'),
+                  formatter.create_docpage(get_base_path(module.path),
+                                           module))
+                 for module in modules]
+        pages.extend((output.joinpath(package.path, 'index.html'),
+                      formatter.create_index(get_base_path(
+                          package.path.joinpath('index.html')), package))
+                     for package in packages)
+        times['render'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for path, page in pages:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            try_write(path, page)
+        times['write'].append(time.perf_counter() - start)
+    return {
+        'parser': parser_name,
+        'pages': len(pages),
+        'page_bytes': sum(len(page.encode('utf-8')) for _, page in pages),
+        'stages': {stage: min(values) for stage, values in times.items()}
+    }
+
+
+def print_results(results):
+    """Print stage times in total and per module"""
+    print(f'{results["modules"]} modules, '
+          f'{results["bytes"] / 2 ** 20:.2f} MB of source, '
+          f'{results["pages"]} pages, '
+          f'{results["page_bytes"] / 2 ** 20:.2f} MB of HTML')
+    print(f'{"stage":<10}{"seconds":>10}{"ms/module":>12}')
+    for stage, seconds in results['stages'].items():
+        print(f'{stage:<10}{seconds:>10.3f}'
+              f'{seconds * 1000 / results["modules"]:>12.3f}')
+
+
+def get_thresholds(default, overrides):
+    """Return the allowed slowdown of every stage as a fraction"""
+    thresholds = dict.fromkeys(STAGES, default)
+    for override in overrides:
+        stage, _, value = override.partition('=')
+        if stage not in thresholds:
+            raise ValueError(f'Unknown stage "{stage}", should be one of '
+                             f'{", ".join(STAGES)}')
+        thresholds[stage] = float(value)
+    return thresholds
+
+
+def compare_results(baseline, results, thresholds):
+    """Return messages about stages that are slower than in the baseline by
+    more than their thresholds"""
+    if (baseline.get('corpus') != results['corpus']
+            or baseline.get('parser') != results['parser']):
+        return ['Baseline was measured on a different corpus or parser']
+    regressions = []
+    for stage, threshold in thresholds.items():
+        old = baseline['stages'].get(stage)
+        new = results['stages'][stage]
+        if old and new > old * (1 + threshold):
+            regressions.append(f'{stage} regressed: {old:.3f} s -> '
+                               f'{new:.3f} s ({new / old - 1:+.0%}, allowed '
+                               f'{threshold:+.0%})')
+    return regressions
+
+
+def _parse_arguments():
+    """Parse arguments"""
+    argparser = argparse.ArgumentParser(
+        description='Time documentation build stages on a synthetic corpus')
+    add_corpus_arguments(argparser)
+    argparser.add_argument('--parser', help='Module parser to time',
+                           choices=PARSERS, default='regex')
+    argparser.add_argument('--repeat', help='Number of timed runs',
+                           type=int, default=3)
+    argparser.add_argument('--results', help='Save results to a JSON file')
+    argparser.add_argument('--baseline',
+                           help='JSON results of an earlier run to compare '
+                                'with')
+    argparser.add_argument('--threshold',
+                           help='Allowed slowdown of every stage compared to '
+                                'the baseline, as a fraction',
+                           type=float, default=0.25)
+    argparser.add_argument('--stage-threshold',
+                           help='Allowed slowdown of one stage, for example '
+                                'parse=0.1',
+                           nargs='*', default=[])
+    return argparser.parse_args()
+
+
+if __name__ == '__main__':
+    main()
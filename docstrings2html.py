@@ -2,8 +2,13 @@
 """Docstring to HTML converter"""
 
 import argparse
+import contextlib
+import importlib.util
+import json
+import os
 import sys
-from pathlib import Path
+import time
+from pathlib import Path, PurePosixPath
 
 
 def _exit(message, error_code):
@@ -15,70 +20,704 @@ if sys.version_info < (3, 7):
     _exit('Use python >= 3.7', 1)
 
 try:
+    from modules.batch_projects import ProjectSummary, read_projects
+    from modules.build_manifest import BuildManifest, get_digest
+    from modules.build_stats import BuildStats
+    from modules.file_watcher import FileWatcher
+    from modules.large_file_parser import LargeFileParser
     from modules.module_parser import ModuleParser, Class
-    from modules.template_formatter import TemplateFormatter
+    from modules.module_scanner import ModuleScanner
+    from modules.output_backend import (COMPRESSED_SUFFIXES, MemoryOutput,
+                                        create_output, get_archive_suffix)
+    from modules.ast_parser import AstParser
+    from modules.render_cache import RenderCache
+    from modules.template_formatter import (TemplateFormatter,
+                                            BUNDLE_BASE_PATH, get_base_path)
     from modules.package_parser import PackageParser, Package
+    from modules.page_bundle import PageBundle
+    from modules.prefetch_reader import PrefetchReader
+    from modules.search_index import SearchIndex
+    from modules.symbol_index import SymbolIndex
 except Exception as e:
     _exit(f'Program modules not found: "{e}"', 1)
 
-TEMPLATES = ['./templates/base.html',
-             './templates/index.html',
-             './templates/docpage.html',
-             './templates/module_index.html',
-             './templates/navbar.html']
+ROOT = Path(__file__).resolve().parent
+
+TEMPLATES = ['templates/base.html',
+             'templates/index.html',
+             'templates/docpage.html',
+             'templates/module_index.html',
+             'templates/navbar.html',
+             'templates/shallow_index.html',
+             'templates/bundle.html',
+             'templates/batch_index.html']
+
+PARSERS = {'regex': ModuleParser,
+           'scanner': ModuleScanner}
+if sys.version_info >= (3, 8):
+    # AstParser needs end positions of nodes and positional-only arguments
+    PARSERS['ast'] = AstParser
 
 
 def main():
     """Application entry point"""
+    if sys.argv[1:2] == ['precompile']:
+        precompile()
+        return
+    if sys.argv[1:2] == ['serve']:
+        arguments = _parse_serve_arguments(sys.argv[2:])
+        _run(arguments.profile, serve, arguments)
+        return
+    if sys.argv[1:2] == ['batch']:
+        arguments = _parse_batch_arguments(sys.argv[2:])
+        stats = BuildStats() if arguments.stats_json is not None else None
+        _run(arguments.profile, build_batch, arguments, stats)
+        return
     arguments = _parse_arguments()
-    output = Path(arguments.output)
-    parser = ModuleParser(arguments.nonpublic, arguments.empty)
-    template_formatter = try_get_template_formatter()
-    package_parser = PackageParser(try_read, parser, arguments.ignore,
-                                   arguments.nonpublic)
-
-    if (len(arguments.input_files) == 1
-            and Path(arguments.input_files[0]).is_dir()):
-        packages = package_parser.get_packages(arguments.input_files[0])
+    stats = BuildStats() if arguments.stats_json is not None else None
+    if _is_bundle(arguments.output):
+        _run(arguments.profile, build_bundle, arguments, stats)
+        return
+    try:
+        output = create_output(arguments.output, arguments.write_threads,
+                               arguments.minify, arguments.precompress)
+    except Exception as e:
+        _exit(f'Error while accessing output {arguments.output}:\n{e}', 1)
+    with output:
+        _run(arguments.profile, build, arguments, output, stats)
+
+
+def _run(profile_path, function, *args):
+    """Call the function, under cProfile if a profile path is given"""
+    if profile_path is None:
+        function(*args)
+        return
+    # Imported here to keep the start of ordinary runs fast
+    import cProfile
+    profile = cProfile.Profile()
+    try:
+        profile.runcall(function, *args)
+    finally:
+        profile.dump_stats(profile_path)
+
+
+def render_pages(argv):
+    """Build documentation for command line arguments without touching the
+    disk, return a dictionary of page paths relative to the output directory
+    and their contents"""
+    arguments = _parse_arguments(argv)
+    arguments.incremental = arguments.watch = False
+    arguments.minify = arguments.precompress = False
+    with MemoryOutput(arguments.output) as output:
+        build(arguments, output)
+    return output.pages
+
+
+def build(arguments, output, stats=None):
+    """Build documentation pages into the output backend, then watch for
+    changes if asked to"""
+    template_cache = _get_template_cache(arguments)
+    template_formatter = _get_template_formatter(arguments, template_cache)
+    with _create_worker_pool(arguments.jobs, template_cache,
+                             arguments.inline_assets, arguments.search,
+                             arguments.markup,
+                             template_formatter.render_cache) as pool:
+        package_parser, packages, manifest, search_index, symbols = \
+            build_project(arguments, output, template_formatter, pool, stats)
+    if stats is not None:
+        _add_cache_stats(stats, template_formatter)
+        stats.save(arguments.stats_json)
+        print(stats.get_report(arguments.stats_top))
+    if arguments.watch:
+        package_parser.pool = package_parser.reader = None
+        watch(arguments, output, package_parser, packages,
+              template_formatter, manifest, search_index, symbols)
+
+
+def build_project(arguments, output, template_formatter, pool=None,
+                  stats=None):
+    """Parse input files of one project and write its pages with the given
+    template formatter and worker pool
+
+    Returns the package parser, the parsed packages, the manifest, the
+    search index and the symbol index for updating pages later"""
+    parser = PARSERS[arguments.parser](arguments.nonpublic, arguments.empty)
+    search_index = SearchIndex() if arguments.search else None
+    symbols = None
+    manifest = None
+    if arguments.incremental:
+        manifest = BuildManifest(output.directory, _get_build_settings(
+            arguments, template_formatter))
+
+    with _create_reader(arguments.prefetch) as reader:
+        package_parser = PackageParser(try_read, parser, arguments.ignore,
+                                       arguments.nonpublic, manifest, pool,
+                                       stats, arguments.gitignore,
+                                       _get_large_file_parser(arguments),
+                                       reader)
+        if not arguments.inline_assets:
+            write_assets(output, template_formatter.assets, manifest, stats)
+        if arguments.stream:
+            stream = _stream_packages(package_parser, arguments.input_files)
+            packages = write_stream(output, stream, template_formatter,
+                                    manifest, search_index, stats)
+        else:
+            packages = _get_packages(package_parser, arguments.input_files)
+            modules = [module for package in packages
+                       for module in package.modules]
+            if arguments.cross_references:
+                symbols = SymbolIndex(packages)
+            write_docpages(output, modules, pool or template_formatter,
+                           manifest, stats, symbols)
+            if search_index is not None:
+                for module in modules:
+                    search_index.add_module(module)
+    _add_stalled_stats(stats, reader)
+    if search_index is not None:
+        write_search_index(output, search_index, manifest, stats)
+    if arguments.index or arguments.shallow_index:
+        for package in packages:
+            if not package.is_empty():
+                write_index(output, package, template_formatter, manifest,
+                            arguments.shallow_index, stats)
+    flush_output(output)
+    if (arguments.minify or arguments.precompress) and output.sizes['pages']:
+        print(_get_sizes_report(output.sizes))
+    if manifest is not None:
+        manifest.remove_stale_pages(COMPRESSED_SUFFIXES)
+        manifest.save()
+    return package_parser, packages, manifest, search_index, symbols
+
+
+def build_batch(arguments, stats=None):
+    """Build documentation of projects listed in a file in one process,
+    sharing templates, caches and the worker pool, then write an index of
+    all projects"""
+    try:
+        projects = read_projects(arguments.projects)
+    except Exception as e:
+        _exit(f'Error while reading projects from {arguments.projects}:\n{e}',
+              1)
+    root = Path(arguments.output)
+    template_cache = _get_template_cache(arguments)
+    template_formatter = _get_template_formatter(arguments, template_cache)
+    summaries = []
+    failed = []
+    with _create_worker_pool(arguments.jobs, template_cache,
+                             arguments.inline_assets, arguments.search,
+                             arguments.markup,
+                             template_formatter.render_cache) as pool:
+        for project in projects:
+            start = time.perf_counter()
+            try:
+                summary = build_batch_project(arguments, project,
+                                              template_formatter, pool,
+                                              stats)
+            except SystemExit:
+                # The error is already printed, other projects are still
+                # built
+                failed.append(project.name)
+                continue
+            except Exception as e:
+                print(f'Error while building {project.name}:\n{e}',
+                      file=sys.stderr)
+                failed.append(project.name)
+                continue
+            summaries.append(summary)
+            milliseconds = (time.perf_counter() - start) * 1000
+            print(f'{project.name}: {summary.modules} modules in '
+                  f'{milliseconds:.0f} ms')
+    if stats is not None:
+        stats.prefix = None
+    try:
+        output = create_output(root, arguments.write_threads,
+                               arguments.minify, arguments.precompress)
+    except Exception as e:
+        _exit(f'Error while accessing output {root}:\n{e}', 1)
+    with output:
+        if not arguments.inline_assets:
+            write_assets(output, template_formatter.assets, None, stats)
+        page = template_formatter.create_batch_index(
+            get_base_path('index.html'), arguments.title, summaries)
+        write_page(output, root.joinpath('index.html'), page, stats)
+        flush_output(output)
+    if stats is not None:
+        _add_cache_stats(stats, template_formatter)
+        stats.save(arguments.stats_json)
+        print(stats.get_report(arguments.stats_top))
+    if failed:
+        _exit(f'Failed to build {len(failed)} of {len(projects)} projects: '
+              f'{", ".join(failed)}', 1)
+
+
+def build_batch_project(batch_arguments, project, template_formatter,
+                        pool=None, stats=None):
+    """Build one project of a batch with its own options, return its
+    summary for the index of projects"""
+    arguments = argparse.Namespace(**vars(batch_arguments))
+    arguments.input_files = project.input_files
+    arguments.output = str(Path(batch_arguments.output, project.output))
+    for key, value in project.options.items():
+        setattr(arguments, key, value)
+    try:
+        output = create_output(arguments.output, arguments.write_threads,
+                               arguments.minify, arguments.precompress)
+    except Exception as e:
+        _exit(f'Error while accessing output {arguments.output}:\n{e}', 1)
+    if stats is not None:
+        stats.prefix = project.output
+    with output:
+        packages = build_project(arguments, output, template_formatter, pool,
+                                 stats)[1]
+    directory = PurePosixPath(Path(project.output).as_posix())
+    summary = ProjectSummary(project.name, sum(len(package.modules)
+                                               for package in packages))
+    if (arguments.index or arguments.shallow_index) \
+            and not packages.is_empty():
+        summary.index = directory.joinpath(packages.path.as_posix(),
+                                           'index.html')
     else:
-        packages = Package(Path('./'), '', '', [], [])
-        package_parser.get_loose_files(arguments.input_files, packages)
+        summary.pages = [(module.path.as_posix(), directory.joinpath(
+            f'{module.path.as_posix()}.html'))
+            for package in packages for module in package.modules]
+    return summary
 
-    output.mkdir(parents=True, exist_ok=True)
+
+def build_bundle(arguments, stats=None):
+    """Build documentation pages into one self-contained HTML file"""
+    output_path = Path(arguments.output)
+    parser = PARSERS[arguments.parser](arguments.nonpublic, arguments.empty)
+    template_cache = _get_template_cache(arguments)
+    template_formatter = try_get_template_formatter(template_cache, True,
+                                                    markup=arguments.markup)
+    bundle = PageBundle()
+    with _create_worker_pool(arguments.jobs, template_cache, True) as pool, \
+            _create_reader(arguments.prefetch) as reader:
+        package_parser = PackageParser(try_read, parser, arguments.ignore,
+                                       arguments.nonpublic, None, pool, stats,
+                                       arguments.gitignore,
+                                       _get_large_file_parser(arguments),
+                                       reader)
+        if arguments.stream:
+            stream = _stream_packages(package_parser, arguments.input_files)
+            for module in stream:
+                add_bundle_docpage(bundle, module, template_formatter, stats)
+            packages = stream.package
+        else:
+            packages = _get_packages(package_parser, arguments.input_files)
+            symbols = (SymbolIndex(packages) if arguments.cross_references
+                       else None)
+            for package in packages:
+                for module in package.modules:
+                    add_bundle_docpage(bundle, module, template_formatter,
+                                       stats, symbols)
+    _add_stalled_stats(stats, reader)
+    start_page = None
     for package in packages:
-        for module in package.modules:
-            write_docpage(output, module, template_formatter)
-        if arguments.index and not package.is_empty():
-            write_index(output, package, template_formatter)
-
-
-def write_index(base_output_dir, package, formatter):
-    """Create index.html and write it to disk"""
-    base_path = base_output_dir.resolve()
-    page = formatter.create_index(base_path, package)
-    filename = 'index.html'
-    output_dir = base_output_dir.joinpath(package.path)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir.joinpath(filename)
+        if not package.is_empty():
+            path = package.path.joinpath('index.html').as_posix()
+            start_page = start_page or path
+            bundle.add_page(path, template_formatter.create_index(
+                BUNDLE_BASE_PATH, package, True))
+    if start_page is None:
+        start_page = next(iter(bundle.pages), '')
+    page = template_formatter.create_bundle(packages.path.name or 'Index',
+                                            bundle, start_page)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
     try_write(output_path, page)
+    size = len(page.encode('utf-8'))
+    assets_size = sum(len(template_formatter.assets.texts[name]
+                          .encode('utf-8'))
+                      for name in ('style.css', 'script.js'))
+    if stats is not None:
+        stats.add_page(output_path, size)
+        _add_cache_stats(stats, template_formatter)
+        stats.save(arguments.stats_json)
+        print(stats.get_report(arguments.stats_top))
+    print(f'{output_path}: {len(bundle.pages)} pages, {size / 1024:.0f} KB, '
+          f'{(bundle.size + assets_size) / 1024:.0f} KB as separate files')
+
+
+def add_bundle_docpage(bundle, module, formatter, stats=None, symbols=None):
+    """Create the docpage of a module and add it to the bundle"""
+    start = time.perf_counter()
+    links = symbols.resolve(module) if symbols is not None else None
+    page = formatter.create_docpage(BUNDLE_BASE_PATH, module, True, links)
+    if stats is not None:
+        stats.add(module.path, 'render', time.perf_counter() - start)
+    bundle.add_page(f'{module.path.as_posix()}.html', page)
+
+
+def serve(arguments):
+    """Serve documentation of a directory over HTTP, parsing modules and
+    rendering pages when they are requested"""
+    # Imported here, http.server takes a noticeable part of the start of
+    # builds
+    from modules.doc_server import DocServer, PageCache, create_server
+    template_cache = _get_template_cache(arguments)
+    template_formatter = try_get_template_formatter(
+        template_cache, arguments.inline_assets, markup=arguments.markup)
+    parser = PARSERS[arguments.parser](arguments.nonpublic, arguments.empty)
+    package_parser = PackageParser(read_lines, parser, arguments.ignore,
+                                   arguments.nonpublic,
+                                   gitignore=arguments.gitignore,
+                                   large_files=_get_large_file_parser(
+                                       arguments))
+    cache = PageCache(int(arguments.cache_size * 2 ** 20))
+    docs = DocServer(arguments.directory, package_parser, template_formatter,
+                     cache)
+    try:
+        server = create_server((arguments.host, arguments.port), docs,
+                               arguments.quiet)
+    except OSError as e:
+        _exit(f'Error while starting the server:\n{e}', 1)
+    host, port = server.server_address[:2]
+    print(f'Serving {docs.root} at http://{host}:{port}'
+          f'{docs.get_start_page()}, press Ctrl+C to stop')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    print(f'Page cache: {cache.hits} hits, {cache.misses} misses, '
+          f'{cache.evictions} evictions, {len(cache)} pages in '
+          f'{cache.size / 2 ** 20:.1f} MB')
+
 
+def _add_stalled_stats(stats, reader):
+    """Record time the build waited for files of the prefetch reader"""
+    if stats is not None and reader is not None:
+        stats.add_stalled(reader.stalled)
 
-def write_docpage(base_output_dir, module, formatter):
+
+def _add_cache_stats(stats, template_formatter):
+    """Record hits and misses of the docstring markup cache"""
+    # Pages rendered by worker processes use their own caches
+    if template_formatter.markup is not None:
+        stats.add_cache('docstrings',
+                        *template_formatter.markup.get_cache_info())
+
+
+def watch(arguments, output, package_parser, packages, formatter,
+          manifest=None, search_index=None, symbols=None):
+    """Keep parsed packages in memory and update pages of changed files
+    until interrupted"""
+    watcher = FileWatcher(arguments.input_files, arguments.poll_interval)
+    print('Watching for changes, press Ctrl+C to stop')
+    try:
+        while True:
+            changes = watcher.wait()
+            start = time.perf_counter()
+            update_pages(arguments, output, changes, package_parser,
+                         packages, formatter, manifest, search_index,
+                         symbols)
+            milliseconds = (time.perf_counter() - start) * 1000
+            print(f'Updated {len(changes)} file(s) in {milliseconds:.0f} ms')
+    except KeyboardInterrupt:
+        pass
+
+
+def update_pages(arguments, output, changes, package_parser, packages,
+                 formatter, manifest=None, search_index=None, symbols=None):
+    """Parse changed files again, update their docpages, indexes of the
+    packages containing them, the search index and docpages whose links to
+    classes changed"""
+    if symbols is not None:
+        previous_links = {module.path: symbols.resolve(module)
+                          for package in packages
+                          for module in package.modules}
+    changed_modules = []
+    changed_packages = {}
+    for file in sorted(changes):
+        root = _get_root(file, arguments.input_files)
+        if root is None:
+            continue
+        module, parents = package_parser.update_module(
+            file, root, packages, arguments.stream)
+        changed_packages.update((id(package), package)
+                                for package in parents)
+        module_path = file.relative_to(root.parent)
+        if module is None:
+            remove_page(output, _get_docpage_path(output.directory,
+                                                  module_path), manifest)
+            if manifest is not None:
+                manifest.remove_module(module_path)
+            if search_index is not None:
+                search_index.remove_module(module_path)
+            continue
+        changed_modules.append(module)
+        if search_index is not None:
+            search_index.add_module(module)
+    if symbols is not None:
+        symbols.build(packages)
+        changed_paths = {module.path for module in changed_modules}
+        changed_modules.extend(
+            module for package in packages for module in package.modules
+            if module.path not in changed_paths
+            and symbols.resolve(module) != previous_links.get(module.path))
+    write_docpages(output, changed_modules, formatter, manifest,
+                   symbols=symbols)
+    if arguments.index or arguments.shallow_index:
+        for package in changed_packages.values():
+            if not package.is_empty():
+                write_index(output, package, formatter, manifest,
+                            arguments.shallow_index)
+                continue
+            output_dir = output.directory.joinpath(package.path)
+            for filename in ('index.html', formatter.INDEX_DATA):
+                remove_page(output, output_dir.joinpath(filename), manifest)
+    if search_index is not None:
+        write_search_index(output, search_index, manifest)
+    flush_output(output)
+    if manifest is not None:
+        manifest.save()
+
+
+def _is_bundle(output):
+    """Check if the output is a single HTML file"""
+    return str(output).lower().endswith('.html')
+
+
+def _get_root(file, input_files):
+    """Return the directory the path of a changed file is relative to, or
+    None if the file is not part of the input"""
+    for input_file in map(Path, input_files):
+        if file == input_file:
+            return Path()
+        if input_file in file.parents:
+            return input_file
+    return None
+
+
+def precompile():
+    """Compile templates into the cache used by later runs"""
+    arguments = _parse_precompile_arguments()
+    template_cache = _get_template_cache(arguments)
+    if template_cache is None:
+        _exit('Template cache is not available', 1)
+    template_formatter = try_get_template_formatter(template_cache)
+    try:
+        template_formatter.precompile(TEMPLATES)
+    except Exception as e:
+        _exit(f'Error while compiling templates:\n{e}', 1)
+    print(template_cache)
+
+
+def _get_packages(package_parser, input_files):
+    """Parse input files and directories into a package"""
+    if len(input_files) == 1 and Path(input_files[0]).is_dir():
+        return package_parser.get_packages(input_files[0])
+    packages = Package(Path('./'), '', '', [], [])
+    return package_parser.get_loose_files(input_files, packages)
+
+
+def _stream_packages(package_parser, input_files):
+    """Return a stream of modules parsed from input files and directories"""
+    if len(input_files) == 1 and Path(input_files[0]).is_dir():
+        return package_parser.stream_packages(input_files[0])
+    packages = Package(Path('./'), '', '', [], [])
+    return package_parser.stream_loose_files(input_files, packages)
+
+
+def write_stream(output, stream, formatter, manifest=None,
+                 search_index=None, stats=None):
+    """Write docpages of streamed modules one at a time, return the package
+    of their summaries"""
+    for module in stream:
+        write_docpage(output, module, formatter, manifest, stats)
+        if search_index is not None:
+            search_index.add_module(module)
+    return stream.package
+
+
+def write_index(output, package, formatter, manifest=None,
+                shallow=False, stats=None):
+    """Create index.html and write it to disk
+
+    A shallow index only links to direct children of the package and comes
+    with a data file for expanding them"""
+    output_dir = output.directory.joinpath(package.path)
+    base_path = get_base_path(package.path.joinpath('index.html'))
+    if shallow:
+        digest = package.get_shallow_digest()
+        pages = {'index.html': formatter.create_shallow_index,
+                 formatter.INDEX_DATA: formatter.create_index_data}
+    else:
+        digest = package.get_digest()
+        pages = {'index.html': formatter.create_index}
+    for filename, create_page in pages.items():
+        output_path = output_dir.joinpath(filename)
+        if manifest is not None and not manifest.add_page(output_path,
+                                                          digest):
+            continue
+        start = time.perf_counter()
+        page = create_page(base_path, package)
+        if stats is not None:
+            stats.add_total('render', time.perf_counter() - start)
+        write_page(output, output_path, page, stats)
+
+
+def write_docpage(output, module, formatter, manifest=None, stats=None):
     """Create docpage and write it to disk"""
-    base_path = base_output_dir.resolve()
-    page = formatter.create_docpage(base_path, module)
-    output_dir = base_output_dir.joinpath(module.path.parent)
-    output_path = base_output_dir.joinpath(module.path) \
-        .with_suffix(module.path.suffix + '.html')
-    output_dir.mkdir(parents=True, exist_ok=True)
-    try_write(output_path, page)
+    write_docpages(output, [module], formatter, manifest, stats)
+
+
+def write_docpages(output, modules, formatter, manifest=None,
+                   stats=None, symbols=None):
+    """Create docpages for several modules and write them to disk
+
+    The formatter can also be a worker pool rendering pages in parallel.
+    Links of class names are resolved here, so that worker processes do not
+    need the symbol index"""
+    outdated = []
+    for module in modules:
+        output_path = _get_docpage_path(output.directory, module.path)
+        links = symbols.resolve(module) if symbols is not None else None
+        digest = module.digest
+        if links:
+            # A page also changes when a class it links to moves
+            digest = get_digest([digest, json.dumps(links, sort_keys=True)])
+        if manifest is None or manifest.add_page(output_path, digest):
+            outdated.append((module, output_path, links))
+    pages = iter(formatter.create_docpages(
+        [module for module, _, _ in outdated],
+        [links for _, _, links in outdated]))
+    for module, output_path, _ in outdated:
+        # Pages are rendered lazily, so waiting for one measures its render
+        start = time.perf_counter()
+        page = next(pages)
+        if stats is not None:
+            stats.add(module.path, 'render', time.perf_counter() - start)
+        write_page(output, output_path, page, stats, module.path)
+
+
+def write_page(output, output_path, page, stats=None, module_path=None):
+    """Write a page to the output backend"""
+    start = time.perf_counter()
+    try_write(output_path, page, output=output)
+    if stats is None:
+        return
+    seconds = time.perf_counter() - start
+    size = len(page.encode('utf-8'))
+    if module_path is None:
+        stats.add_total('write', seconds)
+    else:
+        stats.add(module_path, 'write', seconds, size)
+    stats.add_page(output_path, size)
 
 
-def try_get_template_formatter():
+def _get_sizes_report(sizes):
+    """Return a line with the size of written pages and the bytes saved by
+    minifying and compressing them"""
+    pages = sizes['pages']
+    parts = [f'Pages: {pages / 2 ** 20:.2f} MB']
+    for name, size in sizes.items():
+        if name != 'pages':
+            saved = 1 - size / pages if pages else 0
+            parts.append(f'{name}: {size / 2 ** 20:.2f} MB '
+                         f'({(pages - size) / 2 ** 20:.2f} MB or '
+                         f'{saved:.0%} saved)')
+    return ', '.join(parts)
+
+
+def flush_output(output):
+    """Wait for pages written in the background and exit with message on
+    failure"""
     try:
-        template_formatter = TemplateFormatter('./')
-        if not all(Path(template).is_file() for template in TEMPLATES):
-            raise FileNotFoundError('Template files not found in /templates, '
+        output.flush()
+    except Exception as e:
+        _exit(f'Error while accessing output file {e}', 1)
+
+
+def write_assets(output, assets, manifest=None, stats=None):
+    """Write shared CSS and JavaScript files to disk"""
+    for name, text in assets.texts.items():
+        output_path = assets.get_path(output.directory, name)
+        if (manifest is not None
+                and not manifest.add_page(output_path, assets.digests[name])):
+            continue
+        write_page(output, output_path, text, stats)
+
+
+def remove_page(output, output_path, manifest=None):
+    """Delete a page that is no longer part of the output"""
+    output.remove(output_path)
+    if manifest is not None:
+        manifest.remove_page(output_path)
+
+
+def _get_docpage_path(base_output_dir, module_path):
+    """Return the path of the docpage for a module"""
+    return base_output_dir.joinpath(module_path) \
+        .with_suffix(module_path.suffix + '.html')
+
+
+def write_search_index(output, search_index, manifest=None,
+                       stats=None):
+    """Write the search index and its shards to disk"""
+    output_dir = output.directory.joinpath(search_index.DIRECTORY)
+    start = time.perf_counter()
+    files = search_index.get_files()
+    if stats is not None:
+        stats.add_total('render', time.perf_counter() - start)
+    for filename, text in files.items():
+        output_path = output_dir.joinpath(filename)
+        if (manifest is not None
+                and not manifest.add_page(output_path, get_digest([text]))):
+            continue
+        write_page(output, output_path, text, stats)
+
+
+def _get_large_file_parser(arguments):
+    """Return the parser for files above the large file size"""
+    return LargeFileParser(arguments.nonpublic, arguments.empty,
+                           arguments.large_file_size, arguments.summary_size)
+
+
+def _create_worker_pool(jobs, template_cache=None, inline_assets=False,
+                        search=False, markup=False, render_cache=None):
+    """Return a worker pool for the given number of jobs, or an empty
+    context if the work should be done in this process"""
+    if jobs == 1:
+        return contextlib.nullcontext()
+    if jobs < 1:
+        jobs = os.cpu_count() or 1
+    # Imported here to keep the start of single-process runs fast
+    from modules.worker_pool import WorkerPool
+    return WorkerPool(jobs, ROOT, template_cache, inline_assets, search,
+                      markup, render_cache)
+
+
+def _create_reader(depth):
+    """Return a reader prefetching files to the given depth, or an empty
+    context if files should be read when they are parsed"""
+    if depth < 1:
+        return contextlib.nullcontext()
+    return PrefetchReader(depth)
+
+
+def _get_template_formatter(arguments, template_cache):
+    """Return the template formatter for build arguments"""
+    template_formatter = try_get_template_formatter(
+        template_cache, arguments.inline_assets, arguments.search,
+        arguments.markup)
+    if arguments.render_cache is not None:
+        template_formatter.render_cache = RenderCache(
+            arguments.render_cache, _get_render_settings(template_formatter))
+    return template_formatter
+
+
+def try_get_template_formatter(template_cache=None, inline_assets=False,
+                               search=False, markup=False):
+    try:
+        if importlib.util.find_spec('mako') is None:
+            raise ModuleNotFoundError("No module named 'mako'")
+        template_formatter = TemplateFormatter(ROOT, template_cache,
+                                               inline_assets, search, markup)
+        if not all(ROOT.joinpath(template).is_file()
+                   for template in TEMPLATES):
+            raise FileNotFoundError(f'Template files not found in {ROOT}, '
                                     f'should have {", ".join(TEMPLATES)}')
     except Exception as e:
         _exit(f'Error while accessing templates:\n{e}',
@@ -86,6 +725,61 @@ def try_get_template_formatter():
     return template_formatter
 
 
+def _get_template_cache(arguments):
+    """Return the directory for templates compiled from the current template
+    files, or None if the cache is disabled or cannot be created"""
+    if arguments.no_template_cache:
+        return None
+    if arguments.template_cache is not None:
+        cache = Path(arguments.template_cache)
+    else:
+        cache_home = os.environ.get('XDG_CACHE_HOME')
+        cache = (Path(cache_home) if cache_home
+                 else Path.home().joinpath('.cache'))
+        cache = cache.joinpath('docstrings2html')
+    try:
+        cache = cache.joinpath(_get_templates_digest())
+        cache.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    return cache
+
+
+def _get_templates_digest():
+    """Return the hash of the contents of all templates"""
+    return get_digest([ROOT.joinpath(template).read_text(encoding='utf-8')
+                       for template in TEMPLATES])
+
+
+def _get_build_settings(arguments, template_formatter):
+    """Return the options that affect every page of the output"""
+    return {
+        'parser': arguments.parser,
+        'nonpublic': arguments.nonpublic,
+        'empty': arguments.empty,
+        'shallow_index': arguments.shallow_index,
+        'large_file_size': arguments.large_file_size,
+        'summary_size': arguments.summary_size,
+        'search': arguments.search,
+        'markup': arguments.markup,
+        'cross_references': arguments.cross_references,
+        'minify': arguments.minify,
+        'precompress': arguments.precompress,
+        'templates': _get_templates_digest(),
+        'assets': template_formatter.assets.get_digest()
+    }
+
+
+def _get_render_settings(template_formatter):
+    """Return everything besides the module model that affects a docpage"""
+    return {
+        'templates': _get_templates_digest(),
+        'assets': template_formatter.assets.get_digest(),
+        'search': template_formatter.search,
+        'markup': template_formatter.markup is not None
+    }
+
+
 def try_read(filename, error_code=1):
     """Try to read file and exit with message on failure"""
     try:
@@ -97,9 +791,21 @@ def try_read(filename, error_code=1):
     return result
 
 
-def try_write(filename, data, error_code=1):
-    """Try to write file and exit with message on failure"""
+def read_lines(filename):
+    """Read lines of a file, raising an error instead of exiting on
+    failure, for a process that keeps running"""
+    with open(filename, 'r', encoding='utf-8') as file:
+        return file.readlines()
+
+
+def try_write(filename, data, error_code=1, output=None):
+    """Try to write file and exit with message on failure
+
+    The file is written to the output backend if one is given"""
     try:
+        if output is not None:
+            output.write(filename, data)
+            return
         with open(filename, 'w', encoding='utf-8') as file:
             file.write(data)
     except Exception as e:
@@ -107,27 +813,243 @@ def try_write(filename, data, error_code=1):
         _exit(message + str(e), error_code)
 
 
-def _parse_arguments():
+def _parse_arguments(args=None):
     """Parse arguments"""
     argparser = argparse.ArgumentParser(
         description='Create HTML documentation pages from Python module files')
     argparser.add_argument('input_files', help='Path to input files or '
                                                'directories', nargs='+')
-    argparser.add_argument('--output', help='Path to output directory',
+    argparser.add_argument('--output',
+                           help='Path to output directory, to a .zip, '
+                                '.tar, .tar.gz, .tar.bz2 or .tar.xz archive '
+                                'to write all pages into, or to an .html '
+                                'file to bundle all pages into',
                            nargs='?', default='documentation')
-    argparser.add_argument('--ignore', help='Files to ignore, can use masks',
-                           nargs='*', default=['*_test.py', 'test_*.py'])
+    _add_build_arguments(argparser)
+    arguments = argparser.parse_args(args)
+    if arguments.stream and arguments.jobs != 1:
+        argparser.error('--stream cannot be combined with --jobs')
+    if arguments.stream and arguments.cross_references:
+        argparser.error('--stream cannot be combined with --cross-references')
+    single_file = (get_archive_suffix(arguments.output) is not None
+                   or _is_bundle(arguments.output))
+    if single_file and (arguments.incremental or arguments.watch):
+        argparser.error('--incremental and --watch need an output directory')
+    if single_file and (arguments.minify or arguments.precompress):
+        argparser.error('--minify and --precompress need an output '
+                        'directory')
+    if _is_bundle(arguments.output) and (arguments.search
+                                         or arguments.shallow_index):
+        argparser.error('--search and --shallow-index are not available in '
+                        'a single HTML file')
+    return arguments
+
+
+def _parse_batch_arguments(args):
+    """Parse arguments of the batch command"""
+    argparser = argparse.ArgumentParser(
+        prog=f'{Path(sys.argv[0]).name} batch',
+        description='Create documentation of several projects in one '
+                    'process with an index of all projects')
+    argparser.add_argument('projects',
+                           help='JSON file with a list of projects: objects '
+                                'with a "name", "input" paths relative to '
+                                'the file, an optional "output" directory '
+                                'and options "ignore", "nonpublic", "empty", '
+                                '"index", "shallow_index" and "gitignore" '
+                                'that override the command line')
+    argparser.add_argument('--output',
+                           help='Path to output directory for the projects '
+                                'and their index',
+                           default='documentation')
+    argparser.add_argument('--title', help='Title of the index of projects',
+                           default='Projects')
+    _add_build_arguments(argparser)
+    arguments = argparser.parse_args(args)
+    if arguments.stream and arguments.jobs != 1:
+        argparser.error('--stream cannot be combined with --jobs')
+    if arguments.stream and arguments.cross_references:
+        argparser.error('--stream cannot be combined with --cross-references')
+    if arguments.watch:
+        argparser.error('--watch is not available for several projects')
+    if (get_archive_suffix(arguments.output) is not None
+            or _is_bundle(arguments.output)):
+        argparser.error('--output should be a directory')
+    return arguments
+
+
+def _parse_serve_arguments(args):
+    """Parse arguments of the serve command"""
+    argparser = argparse.ArgumentParser(
+        prog=f'{Path(sys.argv[0]).name} serve',
+        description='Serve documentation of a directory over HTTP, '
+                    'rendering pages when they are requested')
+    argparser.add_argument('directory', help='Path to the input directory')
+    argparser.add_argument('--host', help='Address to listen on',
+                           default='127.0.0.1')
+    argparser.add_argument('--port', '-p',
+                           help='Port to listen on, 0 to pick a free one',
+                           type=int, default=8000)
+    argparser.add_argument('--cache-size',
+                           help='Size limit of rendered pages kept in memory '
+                                'in megabytes',
+                           type=float, default=64)
+    argparser.add_argument('--quiet', '-q', help='Do not log requests',
+                           action='store_true')
+    _add_page_arguments(argparser)
+    _add_template_cache_arguments(argparser)
+    argparser.add_argument('--profile',
+                           help='Run under cProfile and save the profile to '
+                                'a .pstats file')
+    arguments = argparser.parse_args(args)
+    if not Path(arguments.directory).is_dir():
+        argparser.error(f'{arguments.directory} is not a directory')
+    return arguments
+
+
+def _add_build_arguments(argparser):
+    """Add options shared by single builds and batch builds"""
+    _add_page_arguments(argparser)
     argparser.add_argument('--index', '-i',
                            help='Create an index.html file with links to all '
                                 'output files',
                            action='store_true')
+    argparser.add_argument('--shallow-index',
+                           help='Create index pages that only contain direct '
+                                'children of every package and load deeper '
+                                'levels on demand, implies --index',
+                           action='store_true')
+    argparser.add_argument('--search', '-s',
+                           help='Add a search box over all modules, classes, '
+                                'methods and docstrings to every page',
+                           action='store_true')
+    argparser.add_argument('--cross-references', '-x',
+                           help='Link class names in base classes and '
+                                'parameter annotations to the pages '
+                                'defining the classes',
+                           action='store_true')
+    argparser.add_argument('--prefetch',
+                           help='Number of files read in background threads '
+                                'ahead of parsing, 0 to read every file when '
+                                'it is parsed',
+                           type=int, default=8)
+    argparser.add_argument('--incremental',
+                           help='Only rebuild pages whose sources changed '
+                                'since the previous run into the same '
+                                'output directory',
+                           action='store_true')
+    argparser.add_argument('--jobs', '-j',
+                           help='Number of processes used to parse modules '
+                                'and render pages, 0 to use all CPUs',
+                           type=int, default=1)
+    argparser.add_argument('--write-threads',
+                           help='Number of threads writing pages to the '
+                                'output directory in the background, 0 to '
+                                'write them while rendering',
+                           type=int, default=4)
+    argparser.add_argument('--minify',
+                           help='Remove indentation and repeated whitespace '
+                                'from HTML pages outside of <pre> elements',
+                           action='store_true')
+    argparser.add_argument('--precompress',
+                           help='Write gzip and, if the brotli package is '
+                                'installed, brotli copies next to every file '
+                                'for servers that send them as they are',
+                           action='store_true')
+    argparser.add_argument('--stream',
+                           help='Write every page as soon as its module is '
+                                'parsed instead of keeping all modules in '
+                                'memory',
+                           action='store_true')
+    _add_template_cache_arguments(argparser)
+    argparser.add_argument('--render-cache',
+                           help='Directory for rendered docpages keyed by '
+                                'their contents, can be shared between '
+                                'checkouts')
+    argparser.add_argument('--watch', '-w',
+                           help='After building, keep watching input files '
+                                'and update pages of changed ones',
+                           action='store_true')
+    argparser.add_argument('--poll-interval',
+                           help='Seconds between checks for changed files '
+                                'in watch mode',
+                           type=float, default=0.25)
+    argparser.add_argument('--stats-json',
+                           help='Save time and size of reading, parsing, '
+                                'rendering and writing every module to a '
+                                'JSON file and print the slowest modules')
+    argparser.add_argument('--stats-top',
+                           help='Number of modules and pages in the printed '
+                                'statistics',
+                           type=int, default=10)
+    argparser.add_argument('--profile',
+                           help='Run under cProfile and save the profile to '
+                                'a .pstats file')
+
+
+def _add_page_arguments(argparser):
+    """Add options that select modules and affect pages, shared by builds
+    and the documentation server"""
+    argparser.add_argument('--ignore',
+                           help='Files and directories to ignore, can use '
+                                'masks',
+                           nargs='*', default=['*_test.py', 'test_*.py'])
+    argparser.add_argument('--gitignore',
+                           help='Skip files and directories ignored by '
+                                '.gitignore files in input directories',
+                           action='store_true')
     argparser.add_argument('--nonpublic', '-n',
                            help='Include non-public methods and classes',
                            action='store_true')
     argparser.add_argument('--empty', '-e',
                            help='Include methods with no docstring',
                            action='store_true')
-    return argparser.parse_args()
+    argparser.add_argument('--markup', '-m',
+                           help='Convert docstrings written with '
+                                'reStructuredText, Markdown, Google or NumPy '
+                                'style sections to HTML instead of showing '
+                                'them as plain text',
+                           action='store_true')
+    argparser.add_argument('--parser',
+                           help='Module parser: line-based regular '
+                                'expressions, a single-pass scanner that '
+                                'follows indentation or the ast module with '
+                                'regex fallback for invalid files',
+                           choices=PARSERS, default='regex')
+    argparser.add_argument('--large-file-size',
+                           help='Files of this size in bytes and larger are '
+                                'mapped into memory and parsed without '
+                                'copying their lines',
+                           type=int, default=2 ** 20)
+    argparser.add_argument('--summary-size',
+                           help='Only show names of classes and methods for '
+                                'files of this size in bytes and larger',
+                           type=int)
+    argparser.add_argument('--inline-assets',
+                           help='Inline CSS and JavaScript into every page '
+                                'instead of linking shared files, so that '
+                                'pages can be used on their own',
+                           action='store_true')
+
+
+def _parse_precompile_arguments():
+    """Parse arguments of the precompile command"""
+    argparser = argparse.ArgumentParser(
+        prog=f'{Path(sys.argv[0]).name} precompile',
+        description='Compile templates ahead of time so that later runs '
+                    'start faster')
+    _add_template_cache_arguments(argparser)
+    return argparser.parse_args(sys.argv[2:])
+
+
+def _add_template_cache_arguments(argparser):
+    """Add options that control the compiled template cache"""
+    argparser.add_argument('--template-cache',
+                           help='Directory for compiled templates, '
+                                '$XDG_CACHE_HOME/docstrings2html by default')
+    argparser.add_argument('--no-template-cache',
+                           help='Compile templates on every run',
+                           action='store_true')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,157 @@
+import ast
+import re
+
+from modules.module_parser import ModuleParser, Class, Method, join_lines
+
+_FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef)
+_LINE_BREAK = re.compile(r'\s*\n\s*')
+
+
+class AstParser(ModuleParser):
+    """Parser for classes, methods and their docstrings based on the ast
+    module
+
+    Falls back to the regular expressions of ModuleParser for modules that
+    cannot be compiled"""
+
+    def __init__(self, show_nonpublic, show_empty):
+        super().__init__(show_nonpublic, show_empty)
+        self.fallback = ModuleParser(show_nonpublic, show_empty)
+        self.fallback_count = 0
+
+    def get_methods(self, lines):
+        """Extract module-level function objects from lines"""
+        source = join_lines(lines)
+        tree = self._parse(source)
+        if tree is None:
+            return self.fallback.get_methods(lines)
+        source = _Source(source)
+        module = Class('', '', '', [])
+        self._visit(source, tree.body, module, '', [])
+        return module.methods
+
+    def get_classes(self, lines):
+        """Extract class objects from lines"""
+        source = join_lines(lines)
+        tree = self._parse(source)
+        if tree is None:
+            return self.fallback.get_classes(lines)
+        source = _Source(source)
+        module = Class('', '', self._get_docstring(tree), [])
+        classes = []
+        self._visit(source, tree.body, module, '', classes)
+        if module.docstring or module.methods:
+            classes.insert(0, module)
+        return classes
+
+    def get_docstring(self, entity_lines):
+        """Get module docstring from lines containing its text"""
+        tree = self._parse(join_lines(entity_lines))
+        if tree is None:
+            return self.fallback.get_docstring(entity_lines)
+        return self._get_docstring(tree)
+
+    def _parse(self, source):
+        """Return the syntax tree of the source or None if it is invalid"""
+        try:
+            return ast.parse(source)
+        except (SyntaxError, ValueError):
+            self.fallback_count += 1
+            return None
+
+    def _visit(self, source, statements, owner, prefix, classes):
+        """Add functions in the statements to the owner class and classes to
+        the list, looking into nested blocks but not into functions"""
+        for node in statements:
+            if isinstance(node, _FUNCTIONS):
+                method = Method(node.name,
+                                _get_parameters(source, node.args),
+                                self._get_docstring(node))
+                if ((method.is_public() or self.show_nonpublic)
+                        and (method.docstring or self.show_empty)):
+                    owner.methods.append(method)
+            elif isinstance(node, ast.ClassDef):
+                bases = [source.get_segment(base) for base in node.bases]
+                bases.extend(_format_keyword(source, keyword)
+                             for keyword in node.keywords)
+                class_ = Class(prefix + node.name, ', '.join(bases),
+                               self._get_docstring(node), [])
+                if self.show_nonpublic or not any(
+                        part.startswith('_')
+                        for part in class_.name.split('.')):
+                    classes.append(class_)
+                self._visit(source, node.body, class_, class_.name + '.',
+                            classes)
+            else:
+                for field in ('body', 'orelse', 'finalbody'):
+                    self._visit(source, getattr(node, field, []), owner,
+                                prefix, classes)
+                for handler in getattr(node, 'handlers', []):
+                    self._visit(source, handler.body, owner, prefix, classes)
+
+    def _get_docstring(self, node):
+        """Return the trimmed docstring of a node"""
+        return self._trim(ast.get_docstring(node, clean=False) or '')
+
+
+def _get_parameters(source, arguments):
+    """Return parameters of a function as written in the source"""
+    positional = arguments.posonlyargs + arguments.args
+    defaults = [None] * (len(positional) - len(arguments.defaults))
+    defaults += arguments.defaults
+    result = [_format_argument(source, argument, default)
+              for argument, default in zip(positional, defaults)]
+    if arguments.posonlyargs:
+        result.insert(len(arguments.posonlyargs), '/')
+    if arguments.vararg is not None:
+        result.append('*' + _format_argument(source, arguments.vararg))
+    elif arguments.kwonlyargs:
+        result.append('*')
+    result.extend(_format_argument(source, argument, default)
+                  for argument, default in zip(arguments.kwonlyargs,
+                                               arguments.kw_defaults))
+    if arguments.kwarg is not None:
+        result.append('**' + _format_argument(source, arguments.kwarg))
+    return result
+
+
+def _format_argument(source, argument, default=None):
+    """Return an argument with its annotation and default value"""
+    result = source.get_segment(argument)
+    if default is not None:
+        separator = ' = ' if argument.annotation is not None else '='
+        result += separator + source.get_segment(default)
+    return result
+
+
+def _format_keyword(source, keyword):
+    """Return a keyword of a class definition, built from its value because
+    keyword nodes only have positions from Python 3.9"""
+    prefix = '**' if keyword.arg is None else f'{keyword.arg}='
+    return prefix + source.get_segment(keyword.value)
+
+
+class _Source:
+    """Source code split into lines for looking up node positions"""
+
+    def __init__(self, text):
+        self.lines = text.split('\n')
+
+    def get_segment(self, node):
+        """Return the source code of a node on a single line"""
+        first = node.lineno - 1
+        last = node.end_lineno - 1
+        if first == last:
+            return _slice(self.lines[first], node.col_offset,
+                          node.end_col_offset)
+        lines = ([_slice(self.lines[first], node.col_offset, None)]
+                 + self.lines[first + 1:last]
+                 + [_slice(self.lines[last], 0, node.end_col_offset)])
+        return _LINE_BREAK.sub(' ', '\n'.join(lines))
+
+
+def _slice(line, start, end):
+    """Slice a line by offsets in its UTF-8 encoding"""
+    if line.isascii():
+        return line[start:end]
+    return line.encode('utf-8')[start:end].decode('utf-8')
@@ -0,0 +1,80 @@
+import json
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import List, Optional, Tuple
+
+# Options a project can set for itself, the rest are shared by the batch
+PROJECT_OPTIONS = {'ignore': list, 'nonpublic': bool, 'empty': bool,
+                   'index': bool, 'shallow_index': bool, 'gitignore': bool}
+
+
+@dataclass
+class Project:
+    """A project of a batch build"""
+    name: str
+    input_files: List[str]
+    output: str
+    options: dict
+
+
+@dataclass
+class ProjectSummary:
+    """What the combined index shows about a built project"""
+    name: str
+    modules: int
+    index: Optional[PurePosixPath] = None
+    pages: List[Tuple[str, PurePosixPath]] = field(default_factory=list)
+
+
+def read_projects(path):
+    """Read the list of projects from a JSON file
+
+    Input paths are relative to the file, output paths are relative to the
+    batch output directory. Raises ValueError for an invalid list"""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    if not isinstance(data, list):
+        raise ValueError('The file should contain a list of projects')
+    projects = []
+    names = set()
+    for number, item in enumerate(data, 1):
+        projects.append(_get_project(item, number, path.parent))
+        if projects[-1].output in names:
+            raise ValueError(f'Project {number}: output '
+                             f'"{projects[-1].output}" is used twice')
+        names.add(projects[-1].output)
+    return projects
+
+
+def _get_project(item, number, directory):
+    """Return a project from its JSON object"""
+    if not isinstance(item, dict) or not isinstance(item.get('name'), str):
+        raise ValueError(f'Project {number}: should be an object with a '
+                         f'"name"')
+    input_files = item.get('input', [])
+    if isinstance(input_files, str):
+        input_files = [input_files]
+    if not input_files or not all(isinstance(file, str)
+                                  for file in input_files):
+        raise ValueError(f'Project {number}: "input" should be a path or a '
+                         f'list of paths')
+    output = item.get('output', item['name'])
+    if (not isinstance(output, str) or not output
+            or Path(output).is_absolute() or '..' in Path(output).parts):
+        raise ValueError(f'Project {number}: "output" should be a path '
+                         f'inside the batch output directory')
+    options = {}
+    for key, value in item.items():
+        if key in ('name', 'input', 'output'):
+            continue
+        option_type = PROJECT_OPTIONS.get(key)
+        if option_type is None:
+            raise ValueError(f'Project {number}: unknown option "{key}"')
+        if not isinstance(value, option_type):
+            raise ValueError(f'Project {number}: "{key}" should be '
+                             f'{option_type.__name__}')
+        options[key] = value
+    return Project(item['name'],
+                   [str(directory.joinpath(file)) for file in input_files],
+                   output, options)
@@ -0,0 +1,106 @@
+import hashlib
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+from modules.module_parser import Class, Method
+
+
+def get_digest(lines):
+    """Return a hash of the given lines of text"""
+    return hashlib.sha1(''.join(lines).encode('utf-8')).hexdigest()
+
+
+def get_buffer_digest(buffer):
+    """Return a hash of text in a buffer without copying it"""
+    return hashlib.sha1(buffer).hexdigest()
+
+
+class BuildManifest:
+    """Keeps track of the sources and pages produced by the previous run"""
+
+    FILENAME = '.docstrings2html.json'
+
+    def __init__(self, output_dir, settings):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / self.FILENAME
+        self.settings = settings
+        self.is_valid = False
+        self.old_modules = {}
+        self.old_pages = {}
+        self.modules = {}
+        self.pages = {}
+        self._load()
+
+    def _load(self):
+        """Read the manifest left by the previous run, if there is one"""
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        self.old_pages = data.get('pages', {})
+        if data.get('settings') == self.settings:
+            self.is_valid = True
+            self.old_modules = data.get('modules', {})
+
+    def get_classes(self, path, digest):
+        """Return classes parsed from the module at the given path by the
+        previous run, or None if the module has changed since"""
+        entry = self.old_modules.get(Path(path).as_posix())
+        if entry is None or entry['digest'] != digest:
+            return None
+        return [_class_from_dict(class_) for class_ in entry['classes']]
+
+    def add_module(self, path, digest, classes):
+        """Remember the classes parsed from the module at the given path"""
+        self.modules[Path(path).as_posix()] = {
+            'digest': digest,
+            'classes': [asdict(class_) for class_ in classes]
+        }
+
+    def add_page(self, page_path, digest):
+        """Record a page of the current run, return True if it has to be
+        written"""
+        key = self._get_page_key(page_path)
+        self.pages[key] = digest
+        return not (self.is_valid
+                    and self.old_pages.get(key) == digest
+                    and Path(page_path).is_file())
+
+    def remove_module(self, path):
+        """Forget the module at the given path"""
+        self.modules.pop(Path(path).as_posix(), None)
+
+    def remove_page(self, page_path):
+        """Forget a page of the current run that no longer exists"""
+        self.pages.pop(self._get_page_key(page_path), None)
+
+    def remove_stale_pages(self, suffixes=()):
+        """Delete pages written by the previous run that are not part of the
+        current one, with their copies with the given suffixes"""
+        for key in self.old_pages.keys() - self.pages.keys():
+            for suffix in ('', *suffixes):
+                try:
+                    (self.output_dir / (key + suffix)).unlink()
+                except FileNotFoundError:
+                    pass
+
+    def save(self):
+        """Write the manifest of the current run to the output directory"""
+        data = {
+            'settings': self.settings,
+            'modules': self.modules,
+            'pages': self.pages
+        }
+        self.path.write_text(json.dumps(data), encoding='utf-8')
+
+    def _get_page_key(self, page_path):
+        """Return the page path relative to the output directory"""
+        return Path(page_path).relative_to(self.output_dir).as_posix()
+
+
+def _class_from_dict(data):
+    """Restore a class object saved with asdict()"""
+    methods = [Method(**method) for method in data['methods']]
+    return Class(data['name'], data['parameters'], data['docstring'],
+                 methods)
@@ -0,0 +1,114 @@
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+
+STAGES = ['read', 'parse', 'render', 'write']
+
+
+class BuildStats:
+    """Collects time and size of every build stage for every module and the
+    size of every written page
+
+    Paths of modules are joined to the prefix, so that modules of projects
+    of a batch with the same layout are kept apart"""
+
+    def __init__(self):
+        self.modules = defaultdict(dict)
+        self.pages = {}
+        self.totals = defaultdict(float)
+        self.caches = {}
+        self.stalled = None
+        self.prefix = None
+        self.start = time.perf_counter()
+
+    def add(self, path, stage, seconds, size=None):
+        """Record a stage of a module, repeated stages are added up"""
+        stats = self.modules[self._get_key(path)]
+        stats[stage] = stats.get(stage, 0) + seconds
+        if size is not None:
+            stats[f'{stage}_bytes'] = stats.get(f'{stage}_bytes', 0) + size
+        self.totals[stage] += seconds
+
+    def add_total(self, stage, seconds):
+        """Record time of a stage that is not split between modules"""
+        self.totals[stage] += seconds
+
+    def add_entities(self, path, classes):
+        """Record the number of classes and methods found in a module"""
+        self.modules[self._get_key(path)]['entities'] = (
+            len(classes) + sum(len(class_.methods) for class_ in classes))
+
+    def add_cache(self, name, hits, misses):
+        """Record hits and misses of a cache"""
+        self.caches[name] = {'hits': hits, 'misses': misses}
+
+    def add_stalled(self, seconds):
+        """Record time the build waited for prefetched files, including
+        __init__.py files of packages"""
+        self.stalled = (self.stalled or 0) + seconds
+
+    def add_page(self, output_path, size):
+        """Record the size of a written page"""
+        self.pages[str(output_path)] = size
+
+    def _get_key(self, path):
+        """Return the key of a module path"""
+        if self.prefix is None:
+            return str(path)
+        return str(Path(self.prefix, path))
+
+    def to_dict(self):
+        """Return all collected data for saving as JSON"""
+        return {
+            'seconds': time.perf_counter() - self.start,
+            'stages': {stage: self.totals[stage] for stage in STAGES},
+            'caches': self.caches,
+            'stalled': self.stalled,
+            'modules': dict(self.modules),
+            'pages': self.pages
+        }
+
+    def save(self, path):
+        """Write collected data to a JSON file"""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=1)
+
+    def get_report(self, top=10):
+        """Return a text report with stage totals, the slowest modules and
+        the largest pages"""
+        lines = [f'Total {time.perf_counter() - self.start:.3f} s, '
+                 f'{len(self.modules)} modules, {len(self.pages)} pages, '
+                 f'{sum(self.pages.values()) / 2 ** 20:.2f} MB']
+        lines.extend(f'  {stage:<8}{self.totals[stage]:>9.3f} s'
+                     for stage in STAGES)
+        if self.stalled is not None:
+            lines.append(f'  stalled on prefetched reads '
+                         f'{self.stalled:.3f} s')
+        for name, cache in self.caches.items():
+            lookups = cache['hits'] + cache['misses']
+            lines.append(f'  {name} cache: {cache["hits"]} hits, '
+                         f'{cache["misses"]} misses, '
+                         f'{cache["hits"] / max(lookups, 1):.1%} hit rate')
+        slowest = sorted(self.modules.items(), key=_get_module_time,
+                         reverse=True)[:top]
+        if slowest:
+            lines.append(f'Slowest {len(slowest)} modules:')
+            lines.append('  ' + ''.join(f'{stage:>9}' for stage in STAGES)
+                         + f'{"entities":>9}  path')
+        for path, stats in slowest:
+            lines.append('  ' + ''.join(f'{stats.get(stage, 0) * 1000:>7.1f}ms'
+                                        for stage in STAGES)
+                         + f'{stats.get("entities", 0):>9}  {path}')
+        largest = sorted(self.pages.items(), key=lambda item: item[1],
+                         reverse=True)[:top]
+        if largest:
+            lines.append(f'Largest {len(largest)} pages:')
+        lines.extend(f'  {size / 1024:>9.1f} KB  {path}'
+                     for path, size in largest)
+        return '\n'.join(lines)
+
+
+def _get_module_time(item):
+    """Return the time spent on a module in all stages"""
+    return sum(item[1].get(stage, 0) for stage in STAGES)
@@ -0,0 +1,14 @@
+import gzip
+import io
+
+
+def compress_gzip(data, level=9):
+    """Return data compressed with gzip without a timestamp, so that the
+    same data always gives the same bytes
+
+    gzip.compress() only takes the timestamp from Python 3.8"""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=level,
+                       mtime=0) as file:
+        file.write(data)
+    return buffer.getvalue()
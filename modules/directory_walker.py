@@ -0,0 +1,243 @@
+import os
+import re
+from pathlib import Path
+
+# Directories that never contain documented modules
+PRUNED_DIRECTORIES = frozenset({'.git', '.hg', '.svn', '__pycache__',
+                                'node_modules', '.tox', '.nox', '.venv',
+                                '.mypy_cache', '.pytest_cache'})
+
+_FLAGS = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+
+
+class DirectoryWalker:
+    """Lists Python files and directories to descend into with os.scandir,
+    skipping ignored files, pruned directories, virtual environments and
+    symlink loops
+
+    Ignore patterns are matched like Path.match by a single compiled regular
+    expression. Rules of .gitignore files found in the walked directories
+    are applied when asked to"""
+
+    def __init__(self, ignore_list, show_nonpublic, gitignore=False):
+        self.matcher = compile_patterns(ignore_list)
+        self.show_nonpublic = show_nonpublic
+        self.gitignore = gitignore
+        self._visited = set()
+        self._chains = {}
+
+    def start(self, directory):
+        """Begin a new walk from the directory"""
+        self._visited = set()
+        self._visit(directory)
+
+    def scan(self, directory):
+        """Return (path, is_directory) pairs of Python files and
+        subdirectories in the order of the directory entries"""
+        directory = Path(directory)
+        try:
+            with os.scandir(directory) as iterator:
+                entries = list(iterator)
+        except OSError:
+            return []
+        if any(entry.name == 'pyvenv.cfg' for entry in entries):
+            return []
+        chain = self._chains.get(directory, [])
+        if self.gitignore and any(entry.name == '.gitignore'
+                                  for entry in entries):
+            rules = GitignoreRules.read(directory.joinpath('.gitignore'))
+            chain = [(_get_prefix(directory), rules)] + chain
+        self._chains[directory] = chain
+        result = []
+        for entry in entries:
+            try:
+                is_directory = entry.is_dir()
+            except OSError:
+                continue
+            if is_directory:
+                if (self._is_pruned(entry.name, entry.path, chain)
+                        or not self._visit(entry.path)):
+                    continue
+                path = directory.joinpath(entry.name)
+                self._chains[path] = chain
+                result.append((path, True))
+            elif (entry.name.endswith('.py')
+                  and not self._is_ignored(entry.name, entry.path, chain)):
+                result.append((directory.joinpath(entry.name), False))
+        return result
+
+    def is_ignored(self, file):
+        """Check if the file should be ignored by its name and path"""
+        file = Path(file)
+        return self._is_ignored(file.name, str(file), [])
+
+    def is_included(self, file, root):
+        """Check if a file found outside of a walk, such as a changed file
+        in watch mode, is part of the walk of the root directory"""
+        file = Path(file)
+        directory = Path(root)
+        path = str(directory)
+        for name in file.relative_to(directory).parts[:-1]:
+            chain = self._chains.get(directory, [])
+            directory = directory.joinpath(name)
+            path = os.path.join(path, name)
+            if (self._is_pruned(name, path, chain)
+                    or os.path.isfile(os.path.join(path, 'pyvenv.cfg'))):
+                return False
+        return not self._is_ignored(file.name, os.path.join(path, file.name),
+                                    self._chains.get(directory, []))
+
+    def _visit(self, path):
+        """Remember a directory, return False if it was already visited
+        through another path"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        key = (stat.st_dev, stat.st_ino)
+        if key in self._visited:
+            return False
+        self._visited.add(key)
+        return True
+
+    def _is_pruned(self, name, path, chain):
+        """Check if a directory should not be descended into"""
+        return (name in PRUNED_DIRECTORIES
+                or self.matcher.search(_to_posix(path)) is not None
+                or _is_gitignored(path, chain, True))
+
+    def _is_ignored(self, name, path, chain):
+        """Check if a Python file should not be documented"""
+        return ((name.startswith('_') and not self.show_nonpublic)
+                or self.matcher.search(_to_posix(path)) is not None
+                or _is_gitignored(path, chain, False))
+
+
+class GitignoreRules:
+    """Patterns of one .gitignore file compiled into a regular expression
+    for files and one for directories"""
+
+    def __init__(self, lines):
+        rules = [rule for rule in map(_translate_gitignore, lines)
+                 if rule is not None]
+        self.files = _compile_rules([rule for rule in rules
+                                     if not rule[2]])
+        self.directories = _compile_rules(rules)
+
+    @classmethod
+    def read(cls, path):
+        """Read rules from a file, an unreadable file has no rules"""
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                return cls(file.read().splitlines())
+        except (OSError, ValueError):
+            return cls([])
+
+    def match(self, relative_path, is_directory):
+        """Return True if the path is ignored, False if it is explicitly
+        included and None if no rule matches it"""
+        regex = self.directories if is_directory else self.files
+        if regex is None:
+            return None
+        match = regex.fullmatch(relative_path)
+        if match is None:
+            return None
+        return match.lastgroup[0] == 'i'
+
+
+def compile_patterns(patterns):
+    """Compile Path.match patterns into one regular expression searched in
+    paths with forward slashes"""
+    if not patterns:
+        return re.compile(r'(?!)')
+    regexes = []
+    for pattern in patterns:
+        pattern = pattern.replace('\\', '/') if os.sep == '\\' else pattern
+        anchor = '^' if pattern.startswith('/') else '(?:^|/)'
+        regexes.append(anchor + '/'.join(
+            _translate_component(part)
+            for part in pattern.strip('/').split('/')) + '$')
+    return re.compile('|'.join(regexes), _FLAGS)
+
+
+def _is_gitignored(path, chain, is_directory):
+    """Check a path against .gitignore rules from the deepest directory up"""
+    for prefix, rules in chain:
+        result = rules.match(_to_posix(path[len(prefix):]), is_directory)
+        if result is not None:
+            return result
+    return False
+
+
+def _compile_rules(rules):
+    """Combine rules so that the last matching one is found first"""
+    if not rules:
+        return None
+    return re.compile('|'.join(
+        f'(?P<{"n" if negate else "i"}{number}>{regex})'
+        for number, (regex, negate, _) in reversed(list(enumerate(rules)))))
+
+
+def _translate_gitignore(line):
+    """Return the regular expression of a .gitignore line, whether it
+    negates earlier rules and whether it only matches directories"""
+    line = line.rstrip()
+    if line.endswith('\\'):
+        line += ' '
+    if not line or line.startswith('#'):
+        return None
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    directory_only = line.endswith('/')
+    line = line.rstrip('/')
+    anchored = '/' in line
+    parts = line.lstrip('/').split('/')
+    regex = '' if anchored else '(?:.*/)?'
+    for number, part in enumerate(parts):
+        if part == '**':
+            regex += '.*' if number == len(parts) - 1 else '(?:[^/]*/)*'
+            continue
+        regex += _translate_component(part)
+        if number < len(parts) - 1:
+            regex += '/'
+    return regex, negate, directory_only
+
+
+def _translate_component(pattern):
+    """Translate a glob pattern for one path component"""
+    result = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        index += 1
+        if char == '*':
+            result.append('[^/]*')
+        elif char == '?':
+            result.append('[^/]')
+        elif char == '\\' and index < len(pattern):
+            result.append(re.escape(pattern[index]))
+            index += 1
+        elif char == '[':
+            end = pattern.find(']', index + 1)
+            if end == -1:
+                result.append(re.escape(char))
+                continue
+            characters = pattern[index:end]
+            if characters.startswith('!'):
+                characters = '^' + characters[1:]
+            result.append('[' + characters.replace('\\', '\\\\') + ']')
+            index = end + 1
+        else:
+            result.append(re.escape(char))
+    return ''.join(result)
+
+
+def _get_prefix(directory):
+    """Return the part of entry paths of the directory before their names"""
+    return os.path.join(str(directory), '')
+
+
+def _to_posix(path):
+    """Return the path with forward slashes"""
+    return path.replace(os.sep, '/') if os.sep != '/' else path
@@ -0,0 +1,298 @@
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path, PurePosixPath
+from urllib.parse import unquote, urlsplit
+
+from modules.package_parser import Module, Package
+from modules.template_formatter import get_base_path
+
+CONTENT_TYPES = {'.html': 'text/html; charset=utf-8',
+                 '.css': 'text/css; charset=utf-8',
+                 '.js': 'application/javascript; charset=utf-8'}
+
+
+class PageCache:
+    """Rendered pages in least recently used order, bounded by their total
+    size in bytes
+
+    Keys contain the hash of everything a page is made of, so a changed
+    source gets a new key and its old page is evicted in time"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pages)
+
+    def get(self, key):
+        """Return a cached page and mark it as recently used, or None"""
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._pages.move_to_end(key)
+            return page
+
+    def add(self, key, page):
+        """Store a page, evicting the least recently used ones to stay in
+        the size limit; a page larger than the limit is not stored"""
+        if len(page) > self.max_size:
+            return
+        with self._lock:
+            previous = self._pages.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._pages[key] = page
+            self.size += len(page)
+            while self.size > self.max_size:
+                _, evicted = self._pages.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+
+class DocServer:
+    """Renders docpages, shallow index pages and their data of a directory
+    when they are requested, at the same paths as in the output directory
+
+    Only the requested directory is listed and only modules shown on the
+    requested page are parsed. Summaries of parsed modules are kept with
+    the modification time and size of their files and parsed again only
+    when those change, and directory listings are kept with the
+    modification time of the directory. Pages are cached by the hashes of
+    their sources, so a file that is saved without changes keeps its
+    page"""
+
+    def __init__(self, directory, package_parser, formatter, cache):
+        self.root = Path(directory).resolve()
+        self.package_parser = package_parser
+        self.formatter = formatter
+        self.cache = cache
+        self._summaries = {}
+        self._listings = {}
+        # The directory walker and the parser keep state between calls
+        self._lock = threading.Lock()
+
+    def get_start_page(self):
+        """Return the path of the index of the root package"""
+        return f'/{self.root.name}/index.html'
+
+    def get_page(self, path):
+        """Return the contents of a page by its path relative to the root
+        of the output, or None if there is no such page"""
+        parts = PurePosixPath(path.lstrip('/')).parts
+        if not parts or '..' in parts:
+            return None
+        if parts[0] == self.formatter.assets.DIRECTORY and len(parts) == 2:
+            return self._get_asset(parts[1])
+        if parts[0] != self.root.name:
+            return None
+        page_path = PurePosixPath(*parts)
+        directory = self.root.parent.joinpath(*parts[:-1])
+        name = parts[-1]
+        if name == 'index.html':
+            return self._get_index(page_path, directory,
+                                   self.formatter.create_shallow_index)
+        if name == self.formatter.INDEX_DATA:
+            return self._get_index(page_path, directory,
+                                   self.formatter.create_index_data)
+        if name.endswith('.py.html'):
+            return self._get_docpage(page_path,
+                                     directory.joinpath(name[:-5]))
+        return None
+
+    def _get_asset(self, filename):
+        """Return a CSS or JavaScript file by its hashed name"""
+        assets = self.formatter.assets
+        for name, hashed_name in assets.filenames.items():
+            if hashed_name == filename and not assets.inline:
+                return assets.texts[name].encode('utf-8')
+        return None
+
+    def _get_docpage(self, page_path, file):
+        """Return the docpage of a module, rendering it if its source
+        changed"""
+        with self._lock:
+            entries = self._scan(file.parent)
+            if entries is None or (file, False) not in entries:
+                return None
+            signature = _get_signature(file)
+            digest = None
+            signature_and_summary = self._summaries.get(file)
+            if (signature_and_summary is not None
+                    and signature_and_summary[0] == signature):
+                digest = signature_and_summary[1].digest
+                page = self.cache.get((page_path, digest))
+                if page is not None:
+                    return page
+            module = self.package_parser.get_module(file, self.root)
+            self._summaries[file] = (signature, module.summarise())
+        if module.digest != digest:
+            # A file saved without changes keeps its page
+            page = self.cache.get((page_path, module.digest))
+            if page is not None:
+                return page
+        page = self.formatter.create_docpage(get_base_path(page_path),
+                                             module).encode('utf-8')
+        self.cache.add((page_path, module.digest), page)
+        return page
+
+    def _get_index(self, page_path, directory, create_page):
+        """Return the shallow index or index data of a package, rendering
+        it if a module of the package or the list of its nested packages
+        changed"""
+        with self._lock:
+            entries = self._scan(directory)
+            if entries is None:
+                return None
+            modules = []
+            packages = []
+            for path, is_directory in entries:
+                if not is_directory:
+                    modules.append(self._get_summary(path))
+                    continue
+                module_path = self._find_module(path)
+                if module_path is not None:
+                    # Only the name of a nested package and whether it is
+                    # empty matter on a shallow index
+                    packages.append(Package(
+                        self._get_relative_path(path), path.name, '', [
+                            Module(self._get_relative_path(module_path),
+                                   module_path.name, [])], []))
+            package = Package(self._get_relative_path(directory),
+                              directory.name,
+                              self.package_parser.get_package_docstring(
+                                  directory), modules, packages)
+        key = (page_path, package.get_shallow_digest())
+        page = self.cache.get(key)
+        if page is None:
+            page = create_page(get_base_path(page_path),
+                               package).encode('utf-8')
+            self.cache.add(key, page)
+        return page
+
+    def _scan(self, directory):
+        """Return entries of a directory of the walk from the root, or None
+        if the walk does not reach it
+
+        Directories on the way are scanned again, so that ignored and
+        pruned directories and .gitignore rules apply as in a build"""
+        if directory.parts[:len(self.root.parts)] != self.root.parts:
+            return None
+        self.package_parser.walker.start(self.root)
+        current = self.root
+        for name in directory.parts[len(self.root.parts):]:
+            if (current.joinpath(name), True) not in self._list(current):
+                return None
+            current = current.joinpath(name)
+        return self._list(current)
+
+    def _list(self, directory):
+        """Return entries of a directory, scanning it again only if files
+        were added, removed or renamed in it since the previous scan"""
+        try:
+            signature = os.stat(directory).st_mtime_ns
+        except OSError:
+            return []
+        signature_and_entries = self._listings.get(directory)
+        if (signature_and_entries is not None
+                and signature_and_entries[0] == signature):
+            return signature_and_entries[1]
+        entries = self.package_parser.walker.scan(directory)
+        self._listings[directory] = (signature, entries)
+        return entries
+
+    def _find_module(self, directory):
+        """Return the first module file in a directory or its nested
+        directories, or None"""
+        stack = [directory]
+        while stack:
+            entries = self._list(stack.pop())
+            for path, is_directory in entries:
+                if not is_directory:
+                    return path
+            stack.extend(path for path, _ in reversed(entries))
+        return None
+
+    def _get_summary(self, file):
+        """Return the summary of a module, parsing the file if it changed
+        since the previous call"""
+        signature = _get_signature(file)
+        signature_and_summary = self._summaries.get(file)
+        if (signature_and_summary is not None
+                and signature_and_summary[0] == signature):
+            return signature_and_summary[1]
+        summary = self.package_parser.get_module(file, self.root).summarise()
+        self._summaries[file] = (signature, summary)
+        return summary
+
+    def _get_relative_path(self, path):
+        """Return the path of a package or a module relative to the parent
+        of the root, as in parsed packages"""
+        return path.relative_to(self.root.parent)
+
+
+class DocRequestHandler(BaseHTTPRequestHandler):
+    """Answers GET requests with pages of the documentation server"""
+
+    def do_GET(self):
+        """Send a page, a redirect to the start page or an error"""
+        path = unquote(urlsplit(self.path).path)
+        if path == '/':
+            self.send_response(302)
+            self.send_header('Location', self.server.docs.get_start_page())
+            self.end_headers()
+            return
+        if path.endswith('/'):
+            path += 'index.html'
+        try:
+            page = self.server.docs.get_page(path)
+        except Exception as e:
+            self.send_error(500, explain=str(e))
+            return
+        if page is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES.get(
+            PurePosixPath(path).suffix, 'application/octet-stream'))
+        self.send_header('Content-Length', str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    def log_message(self, format, *args):
+        """Log requests unless the server is quiet"""
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    """HTTP server with a thread per request"""
+    daemon_threads = True
+    # The default backlog of 5 makes bursts of connections wait for a
+    # retransmission of the connection request
+    request_queue_size = 128
+
+
+def create_server(address, docs, quiet=False):
+    """Return an HTTP server of the documentation server on a host and
+    port, port 0 picks a free one"""
+    server = _HTTPServer(address, DocRequestHandler)
+    server.docs = docs
+    server.quiet = quiet
+    return server
+
+
+def _get_signature(file):
+    """Return the modification time and size of a file"""
+    stat = os.stat(file)
+    return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,351 @@
+import functools
+import html
+import re
+
+# Google style section headers followed by indented entries
+_FIELD_SECTIONS = {
+    'args': 'Parameters', 'arguments': 'Parameters',
+    'parameters': 'Parameters', 'params': 'Parameters',
+    'keyword args': 'Keyword parameters',
+    'keyword arguments': 'Keyword parameters',
+    'other parameters': 'Other parameters',
+    'attributes': 'Attributes', 'returns': 'Returns', 'return': 'Returns',
+    'yields': 'Yields', 'yield': 'Yields', 'raises': 'Raises',
+    'exceptions': 'Raises', 'warns': 'Warns'
+}
+# Section headers followed by indented free text
+_TEXT_SECTIONS = {'example', 'examples', 'note', 'notes', 'warning',
+                  'warnings', 'see also', 'todo', 'references'}
+# Sections without names in their entries
+_UNNAMED_SECTIONS = {'Returns', 'Yields'}
+# reST fields and the sections they belong to
+_FIELDS = {
+    'param': 'Parameters', 'parameter': 'Parameters', 'arg': 'Parameters',
+    'argument': 'Parameters', 'key': 'Keyword parameters',
+    'keyword': 'Keyword parameters', 'var': 'Attributes',
+    'ivar': 'Attributes', 'cvar': 'Attributes', 'returns': 'Returns',
+    'return': 'Returns', 'yields': 'Yields', 'yield': 'Yields',
+    'raises': 'Raises', 'raise': 'Raises', 'except': 'Raises',
+    'exception': 'Raises'
+}
+_TYPE_FIELDS = {'type': 'Parameters', 'vartype': 'Attributes',
+                'rtype': 'Returns', 'ytype': 'Yields'}
+
+_SECTION_HEADER = re.compile(r'([A-Za-z][A-Za-z ]*):$')
+_UNDERLINE = re.compile(r'([=\-~^"\'`#*+])\1{2,}$')
+_FENCE = re.compile(r'(```|~~~)')
+_LIST_ITEM = re.compile(r'([-*+]|\d+[.)])\s+(.*)')
+_FIELD = re.compile(r':(\w+)(?:\s+([^:]*?))?:(?:\s+(.*)|$)')
+_ENTRY = re.compile(r'(\*{0,2}[\w.]+)\s*(?:\(([^)]*)\))?\s*:(?:\s+(.*)|$)')
+_NUMPY_ENTRY = re.compile(r'(\*{0,2}[\w.]+)(?:\s*:\s*(.*))?$')
+_MARKDOWN_HEADING = re.compile(r'#{1,6}\s+(.*)')
+_INLINE = re.compile(r'``(.+?)``'
+                     r'|:[\w:.-]+:`([^`]+)`'
+                     r'|`([^`]+)`'
+                     r'|\*\*(\S(?:.*?\S)?)\*\*'
+                     r'|(?<![\w*])\*(\S(?:.*?\S)?)\*(?![\w*])')
+
+
+class DocstringRenderer:
+    """Converts docstrings written with a subset of reStructuredText and
+    Markdown, Google and NumPy style sections to HTML
+
+    Docstrings repeated across overrides and generated classes are
+    converted once, fragments are kept in an LRU cache of the given
+    size"""
+
+    def __init__(self, cache_size=4096):
+        self._convert = functools.lru_cache(cache_size)(convert)
+
+    def render(self, docstring):
+        """Return the HTML fragment of a docstring"""
+        return self._convert(docstring)
+
+    def get_cache_info(self):
+        """Return hits and misses of the fragment cache"""
+        info = self._convert.cache_info()
+        return info.hits, info.misses
+
+
+def convert(docstring):
+    """Convert a trimmed docstring to HTML"""
+    return '\n'.join(_convert_lines(docstring.expandtabs().splitlines()))
+
+
+def _convert_lines(lines):
+    """Return HTML blocks of docstring lines"""
+    blocks = []
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        stripped = line.strip()
+        next_line = lines[index + 1].strip() if index + 1 < len(lines) else ''
+        if not stripped:
+            index += 1
+        elif _FENCE.match(stripped):
+            index = _add_fenced_code(blocks, lines, index)
+        elif stripped.startswith('>>>'):
+            end = _find_blank(lines, index)
+            blocks.append(_code(lines[index:end]))
+            index = end
+        elif _indent(line) > 0:
+            end = _find_indented_end(lines, index, 0)
+            blocks.append(_code(lines[index:end]))
+            index = end
+        elif _UNDERLINE.match(next_line) and len(next_line) >= len(stripped):
+            index = _add_underlined_section(blocks, lines, index)
+        elif _SECTION_HEADER.match(stripped) and _is_section(stripped[:-1]):
+            index = _add_section(blocks, lines, index)
+        elif _FIELD.match(stripped):
+            index = _add_fields(blocks, lines, index)
+        elif _LIST_ITEM.match(stripped):
+            index = _add_list(blocks, lines, index)
+        elif _MARKDOWN_HEADING.match(stripped):
+            blocks.append(_heading(_MARKDOWN_HEADING.match(stripped)[1]))
+            index += 1
+        else:
+            index = _add_paragraph(blocks, lines, index)
+    return blocks
+
+
+def _add_fenced_code(blocks, lines, index):
+    """Add a Markdown code block, return the index after it"""
+    fence = _FENCE.match(lines[index].strip())[1]
+    end = next((number for number in range(index + 1, len(lines))
+                if lines[number].strip().startswith(fence)), len(lines))
+    blocks.append(_code(lines[index + 1:end]))
+    return end + 1
+
+
+def _add_underlined_section(blocks, lines, index):
+    """Add a reST or NumPy style section with an underlined title, return
+    the index after it"""
+    title = lines[index].strip()
+    start = index + 2
+    end = next((number for number in range(start, len(lines) - 1)
+                if lines[number].strip()
+                and _UNDERLINE.match(lines[number + 1].strip())
+                and _indent(lines[number]) == 0), len(lines))
+    name = _FIELD_SECTIONS.get(title.lower())
+    if name is None:
+        blocks.append(_heading(title))
+        blocks.extend(_convert_lines(lines[start:end]))
+        return end
+    entries = []
+    for line in lines[start:end]:
+        if not line.strip():
+            continue
+        if _indent(line) == 0:
+            entries.append([line.strip(), []])
+        elif entries:
+            entries[-1][1].append(line.strip())
+    fields = []
+    for header, description in entries:
+        match = _NUMPY_ENTRY.match(header)
+        if name in _UNNAMED_SECTIONS or match is None:
+            fields.append(('', header, description))
+        else:
+            fields.append((match[1], match[2] or '', description))
+    blocks.append(_fields(name, fields))
+    return end
+
+
+def _add_section(blocks, lines, index):
+    """Add a Google style section, return the index after it"""
+    title = lines[index].strip()[:-1]
+    end = _find_indented_end(lines, index + 1, _indent(lines[index]))
+    body = _dedent(lines[index + 1:end])
+    name = _FIELD_SECTIONS.get(title.lower())
+    if name is None:
+        blocks.append(_heading(title))
+        blocks.extend(_convert_lines(body))
+        return end
+    fields = []
+    for line in body:
+        if not line.strip():
+            continue
+        if _indent(line) > 0 and fields:
+            fields[-1][2].append(line.strip())
+            continue
+        match = _ENTRY.match(line)
+        if match is None or (name in _UNNAMED_SECTIONS
+                             and match[2] is None):
+            if name in _UNNAMED_SECTIONS and match is not None:
+                fields.append(('', match[1], [match[3] or '']))
+            else:
+                fields.append(('', '', [line.strip()]))
+        else:
+            fields.append((match[1], match[2] or '', [match[3] or '']))
+    blocks.append(_fields(name, fields))
+    return end
+
+
+def _add_fields(blocks, lines, index):
+    """Add consecutive reST fields grouped into sections, return the index
+    after them"""
+    sections = {}
+    types = {}
+    while index < len(lines):
+        match = _FIELD.match(lines[index].strip())
+        if match is None:
+            break
+        field, argument, text = match[1].lower(), match[2] or '', match[3]
+        end = _find_indented_end(lines, index + 1, 0)
+        description = [text or ''] + [line.strip()
+                                      for line in lines[index + 1:end]]
+        index = end
+        if field in _TYPE_FIELDS:
+            types[(_TYPE_FIELDS[field], argument)] = ' '.join(description)
+            continue
+        name = _FIELDS.get(field, field.capitalize())
+        sections.setdefault(name, []).append([argument, '', description])
+        while index < len(lines) and not lines[index].strip():
+            index += 1
+    for name, fields in sections.items():
+        for field in fields:
+            field[1] = field[1] or types.get((name, field[0]), '')
+        blocks.append(_fields(name, fields))
+    return index
+
+
+def _add_list(blocks, lines, index):
+    """Add a bulleted or numbered list, return the index after it"""
+    ordered = lines[index].strip()[0].isdigit()
+    items = []
+    while index < len(lines):
+        stripped = lines[index].strip()
+        match = _LIST_ITEM.match(stripped)
+        if (match is not None and _indent(lines[index]) == 0
+                and match[1][0].isdigit() == ordered):
+            items.append([match[2]])
+        elif stripped and _indent(lines[index]) > 0 and items:
+            items[-1].append(stripped)
+        elif stripped or not _continues_list(lines, index, ordered):
+            break
+        index += 1
+    tag = 'ol' if ordered else 'ul'
+    blocks.append(f'<{tag}>' + ''.join(f'<li>{_inline(" ".join(item))}</li>'
+                                       for item in items) + f'</{tag}>')
+    return index
+
+
+def _continues_list(lines, index, ordered):
+    """Check if a list goes on after a blank line"""
+    following = next((line for line in lines[index:] if line.strip()), '')
+    match = _LIST_ITEM.match(following.strip())
+    return (match is not None and _indent(following) == 0
+            and match[1][0].isdigit() == ordered)
+
+
+def _add_paragraph(blocks, lines, index):
+    """Add a paragraph and the literal block that follows a paragraph
+    ending with '::', return the index after them"""
+    paragraph = []
+    while index < len(lines):
+        stripped = lines[index].strip()
+        if (not stripped or _indent(lines[index]) > 0
+                or (paragraph and (_LIST_ITEM.match(stripped)
+                                   or _FIELD.match(stripped)
+                                   or _FENCE.match(stripped)))):
+            break
+        paragraph.append(stripped)
+        index += 1
+    text = ' '.join(paragraph)
+    literal = text.endswith('::')
+    if literal:
+        text = text[:-2].rstrip() if text.endswith(' ::') else text[:-1]
+    if text:
+        blocks.append(f'<p>{_inline(text)}</p>')
+    if literal:
+        start = index
+        while start < len(lines) and not lines[start].strip():
+            start += 1
+        if start < len(lines) and _indent(lines[start]) > 0:
+            index = _find_indented_end(lines, start, 0)
+            blocks.append(_code(_dedent(lines[start:index])))
+    return index
+
+
+def _find_blank(lines, index):
+    """Return the index of the first blank line from the index"""
+    return next((number for number in range(index, len(lines))
+                 if not lines[number].strip()), len(lines))
+
+
+def _find_indented_end(lines, index, indent):
+    """Return the index after lines indented deeper than the given indent,
+    blank lines between them included"""
+    end = index
+    for number in range(index, len(lines)):
+        if not lines[number].strip():
+            continue
+        if _indent(lines[number]) <= indent:
+            break
+        end = number + 1
+    return end
+
+
+def _is_section(title):
+    """Check if a line ending with a colon starts a Google style section"""
+    title = title.lower()
+    return title in _FIELD_SECTIONS or title in _TEXT_SECTIONS
+
+
+def _indent(line):
+    """Return the number of leading spaces"""
+    return len(line) - len(line.lstrip())
+
+
+def _dedent(lines):
+    """Remove common indentation of lines"""
+    indent = min((_indent(line) for line in lines if line.strip()),
+                 default=0)
+    return [line[indent:] for line in lines]
+
+
+def _code(lines):
+    """Return a code block"""
+    return ('<pre class="docstring-code">'
+            + _escape('\n'.join(_dedent(lines)).strip('\n')) + '</pre>')
+
+
+def _heading(title):
+    """Return a section title"""
+    return f'<p class="docstring-heading">{_inline(title)}</p>'
+
+
+def _fields(name, fields):
+    """Return a section of parameters, return values or exceptions"""
+    items = []
+    for argument, type_, description in fields:
+        term = f'<code>{_escape(argument)}</code>' if argument else ''
+        if type_:
+            type_ = f'<span class="docstring-type">{_inline(type_)}</span>'
+            term += f' ({type_})' if argument else type_
+        text = _inline(' '.join(line for line in description if line))
+        items.append((f'<dt>{term}</dt>' if term else '') + f'<dd>{text}</dd>')
+    return (_heading(name) + '<dl class="docstring-fields">' + ''.join(items)
+            + '</dl>')
+
+
+def _escape(text):
+    """Escape text outside of attributes"""
+    return html.escape(text, quote=False)
+
+
+def _inline(text):
+    """Escape text and convert inline code, strong and emphasized text"""
+    result = []
+    position = 0
+    for match in _INLINE.finditer(text):
+        result.append(_escape(text[position:match.start()]))
+        code = match[1] or match[2] or match[3]
+        if code is not None:
+            result.append(f'<code>{_escape(code)}</code>')
+        elif match[4] is not None:
+            result.append(f'<strong>{_escape(match[4])}</strong>')
+        else:
+            result.append(f'<em>{_escape(match[5])}</em>')
+        position = match.end()
+    result.append(_escape(text[position:]))
+    return ''.join(result)
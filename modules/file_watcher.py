@@ -0,0 +1,66 @@
+import os
+import time
+from pathlib import Path
+
+from modules.directory_walker import PRUNED_DIRECTORIES
+
+
+class FileWatcher:
+    """Polls Python files under the given paths for changes, skipping
+    directories that are never documented"""
+
+    def __init__(self, paths, interval=0.2, suffix='.py'):
+        self.paths = [str(path) for path in paths]
+        self.interval = interval
+        self.suffix = suffix
+        self.snapshot = self._scan()
+
+    def wait(self):
+        """Block until files change, return paths of changed, added and
+        removed files"""
+        while True:
+            time.sleep(self.interval)
+            changes = self.poll()
+            if changes:
+                return changes
+
+    def poll(self):
+        """Return paths of files changed, added or removed since the last
+        poll"""
+        snapshot = self._scan()
+        changes = {Path(path)
+                   for path in snapshot.keys() | self.snapshot.keys()
+                   if snapshot.get(path) != self.snapshot.get(path)}
+        self.snapshot = snapshot
+        return changes
+
+    def _scan(self):
+        """Return modification times and sizes of all watched files"""
+        snapshot = {}
+        for path in self.paths:
+            if os.path.isdir(path):
+                self._scan_directory(path, snapshot)
+            else:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _scan_directory(self, directory, snapshot):
+        """Add files in the directory and its subdirectories"""
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if entry.name not in PRUNED_DIRECTORIES:
+                        self._scan_directory(entry.path, snapshot)
+                elif entry.name.endswith(self.suffix):
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue
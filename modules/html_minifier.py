@@ -0,0 +1,29 @@
+import re
+
+# Elements whose contents are kept as they are
+_PRESERVED = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>',
+                        re.IGNORECASE | re.DOTALL)
+_LINE_BREAK = re.compile(r'[ \t\r\f\v]*\n\s*')
+_SPACES = re.compile(r'[ \t\r\f\v]{2,}')
+
+
+def minify_html(text):
+    """Return HTML with indentation and runs of whitespace collapsed to one
+    character, except inside pre, textarea, script and style elements
+
+    Browsers show any run of whitespace outside of these elements as one
+    space, so the page looks the same"""
+    result = []
+    position = 0
+    for match in _PRESERVED.finditer(text):
+        result.append(_collapse(text[position:match.start()]))
+        result.append(match.group())
+        position = match.end()
+    result.append(_collapse(text[position:]))
+    return ''.join(result)
+
+
+def _collapse(text):
+    """Replace whitespace with line breaks by one line break and other runs
+    of whitespace by one space"""
+    return _SPACES.sub(' ', _LINE_BREAK.sub('\n', text))
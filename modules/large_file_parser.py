@@ -0,0 +1,113 @@
+import mmap
+import re
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from modules.module_parser import ModuleParser, Class, Method
+
+_NAME = rb'(?:\w|[\x80-\xff])+'
+_CLASS_HEADER = re.compile(rb'(?m)^[^\S\n]*class ' + _NAME + rb'(?:\(.*\))?:')
+_METHOD_HEADER = re.compile(rb'(?m)^[^\S\n]*def ' + _NAME + rb'(?:\(.*\))?:')
+_DOCSTRING = re.compile(rb'(?s)"""(.*?)"""')
+
+
+class LargeFileParser(ModuleParser):
+    """Parser for huge generated modules with the rules of ModuleParser
+
+    The file is mapped into memory and classes, methods and docstrings are
+    found by offsets in the mapped buffer, so only names and docstrings are
+    copied out of it. Above the summary size docstrings are skipped and
+    only names are kept"""
+
+    def __init__(self, show_nonpublic, show_empty, size=2 ** 20,
+                 summary_size=None):
+        super().__init__(show_nonpublic, show_empty)
+        self.size = size
+        self.summary_size = summary_size
+
+    def is_large(self, size):
+        """Check if a file of the given size should be parsed by this
+        parser"""
+        return size >= self.size or self.is_summarised(size)
+
+    def is_summarised(self, size):
+        """Check if only names should be kept for a file of the given
+        size"""
+        return self.summary_size is not None and size >= self.summary_size
+
+    @contextmanager
+    def open(self, path):
+        """Map a file into memory for reading"""
+        with open(path, 'rb') as file:
+            if not file.seek(0, 2):
+                yield b''
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) \
+                    as buffer:
+                yield buffer
+
+    def get_classes(self, buffer, docstrings=True):
+        """Extract class objects from a buffer with the text of a module"""
+        methods = [match.start()
+                   for match in _METHOD_HEADER.finditer(buffer)]
+        result = []
+        for start, end in _split(buffer, [
+                match.start() for match in _CLASS_HEADER.finditer(buffer)]):
+            signature = self._get_title(buffer, start, Class.TITLE_MARKER)
+            name, parent = self._split_title(signature)
+            docstring = (self._get_docstring(buffer, start, end)
+                         if docstrings else '')
+            first = bisect_left(methods, start)
+            last = bisect_left(methods, end)
+            class_ = Class(name, parent, docstring,
+                           self._get_methods(buffer, start, end,
+                                             methods[first:last], docstrings))
+            if class_.is_public() or self.show_nonpublic:
+                result.append(class_)
+        return result
+
+    def _get_methods(self, buffer, start, end, headers, docstrings):
+        """Extract method objects from a part of the buffer"""
+        result = []
+        for method_start, method_end in _split(buffer, headers, start, end):
+            signature = self._get_title(buffer, method_start,
+                                        Method.TITLE_MARKER)
+            name, parameters = self._split_title(signature)
+            docstring = (self._get_docstring(buffer, method_start, method_end)
+                         if docstrings else '')
+            method = Method(name, self._split_parameters(parameters),
+                            docstring)
+            if (method.name
+                    and (method.is_public() or self.show_nonpublic)
+                    and (method.docstring or self.show_empty
+                         or not docstrings)):
+                result.append(method)
+        return result
+
+    def _get_title(self, buffer, start, title_marker):
+        """Return the title of a group starting at the offset"""
+        end = buffer.find(b'\n', start)
+        line = buffer[start:len(buffer) if end == -1 else end]
+        return self._get_group_title([_decode(line)], title_marker)
+
+    def _get_docstring(self, buffer, start, end):
+        """Return the first docstring between the offsets"""
+        match = _DOCSTRING.search(buffer, start, end)
+        if match is None:
+            return ''
+        return self._trim(_decode(match.group(1)))
+
+
+def _split(buffer, headers, start=0, end=None):
+    """Return (start, end) offsets of groups that begin at header offsets,
+    skipping an empty group before the first header"""
+    end = len(buffer) if end is None else end
+    starts = headers if headers and headers[0] == start else [start] + headers
+    if start == end:
+        return []
+    return list(zip(starts, starts[1:] + [end]))
+
+
+def _decode(data):
+    """Decode a part of the buffer"""
+    return data.decode('utf-8', errors='replace')
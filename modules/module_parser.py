@@ -1,7 +1,7 @@
 import re
 import sys
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, fields
+from typing import List, Sequence
 
 
 class ModuleParser:
@@ -118,24 +118,63 @@ class ModuleParser:
         return '\n'.join(trimmed)
 
 
+def join_lines(lines):
+    """Join lines into one string, adding line breaks if they have none"""
+    if lines and not lines[0].endswith('\n'):
+        return '\n'.join(lines)
+    return ''.join(lines)
+
+
+def slotted(cls):
+    """Recreate a dataclass with __slots__ for its own fields, like
+    dataclass(slots=True) does since Python 3.10"""
+    inherited = {name for base in cls.__mro__[1:]
+                 for name in getattr(base, '__slots__', ())}
+    namespace = dict(cls.__dict__)
+    slots = tuple(field.name for field in fields(cls)
+                  if field.name not in inherited)
+    namespace['__slots__'] = slots
+    for name in slots + ('__dict__', '__weakref__'):
+        namespace.pop(name, None)
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+def intern_parameters(parameters):
+    """Return parameters as a tuple of interned strings, or an interned
+    string if they are written as one"""
+    if isinstance(parameters, str):
+        return sys.intern(parameters)
+    return tuple(map(sys.intern, parameters))
+
+
+@slotted
 @dataclass
 class Entity:
-    """Base class for classes and methods"""
+    """Base class for classes and methods
+
+    Names and parameters repeat across modules, so they are interned and
+    parameters are kept in tuples"""
     name: str
-    parameters: list
+    parameters: Sequence[str]
     docstring: str
 
+    def __post_init__(self):
+        self.name = sys.intern(self.name)
+        self.parameters = intern_parameters(self.parameters)
+
     def is_public(self):
         """Check if entity is public"""
         return not self.name.startswith('_')
 
 
+@slotted
 @dataclass
 class Method(Entity):
     """Representation of a method"""
     TITLE_MARKER = 'def '
 
 
+@slotted
 @dataclass
 class Class(Entity):
     """Representation of a class"""
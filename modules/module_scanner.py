@@ -0,0 +1,232 @@
+import re
+from dataclasses import dataclass
+
+from modules.module_parser import (ModuleParser, Class, Entity, Method,
+                                   join_lines)
+
+_HEADER = re.compile(r'(?P<indent>[ \t]*)(?:(?P<class>class)'
+                     r'|(?:async[ \t]+)?def)[ \t]+(?P<name>\w+)')
+_SKIP = (r'(?:[^\'"#\n]+'
+         r'|"""[^"\\]*(?:(?:\\[\s\S]|"(?!""))[^"\\]*)*"""'
+         r"|'''[^'\\]*(?:(?:\\[\s\S]|'(?!''))[^'\\]*)*'''"
+         r'|"[^"\\\n]*(?:\\[\s\S][^"\\\n]*)*"'
+         r"|'[^'\\\n]*(?:\\[\s\S][^'\\\n]*)*'"
+         r'|#[^\n]*'
+         r'|\n(?![ \t]*(?:class|(?:async[ \t]+)?def)[ \t])'
+         r'(?=[ \t]{%d}|[ \t]*(?:#|\n|\Z)))*')
+_SKIPS = {}
+_TOKEN = re.compile(r'(?P<quote>\'\'\'|"""|\'|")|(?P<open>[(\[{])'
+                    r'|(?P<close>[)\]}])|(?P<comma>,)|(?P<colon>:)'
+                    r'|(?P<comment>#[^\n]*)|(?P<backslash>\\\n)'
+                    r'|(?P<newline>\n)')
+_STRING_ENDS = {
+    '"""': re.compile(r'[^"\\]*(?:(?:\\[\s\S]|"(?!""))[^"\\]*)*"""'),
+    "'''": re.compile(r"[^'\\]*(?:(?:\\[\s\S]|'(?!''))[^'\\]*)*'''"),
+    '"': re.compile(r'[^"\\\n]*(?:\\[\s\S][^"\\\n]*)*"'),
+    "'": re.compile(r"[^'\\\n]*(?:\\[\s\S][^'\\\n]*)*'")
+}
+_DOCSTRING = re.compile(
+    r'[rRuU]?(?:"""([^"\\]*(?:(?:\\[\s\S]|"(?!""))[^"\\]*)*)"""'
+    r"|'''([^'\\]*(?:(?:\\[\s\S]|'(?!''))[^'\\]*)*)'''"
+    r'|"([^"\\\n]*(?:\\[\s\S][^"\\\n]*)*)"'
+    r"|'([^'\\\n]*(?:\\[\s\S][^'\\\n]*)*)')")
+_BLOCK_START = re.compile(r'[ \t]*(?:#[^\n]*)?(?:\n|\Z)')
+_FIRST_STATEMENT = re.compile(r'(?:[ \t]*(?:#[^\n]*)?\n)*([ \t]*)')
+_SPACES = re.compile(r'[ \t]*')
+_LINE_BREAK = re.compile(r'\s*\n\s*')
+
+
+class ModuleScanner(ModuleParser):
+    """Single-pass parser for classes, methods and their docstrings
+
+    Skips everything but headers and dedented lines with precompiled
+    patterns and follows indentation, so it handles multi-line signatures,
+    decorators, nested classes and docstrings in any quotes"""
+
+    def get_methods(self, lines):
+        """Extract module-level function objects from lines"""
+        module, _ = self._scan(join_lines(lines))
+        return module.methods
+
+    def get_classes(self, lines):
+        """Extract class objects from lines"""
+        module, classes = self._scan(join_lines(lines))
+        if module.docstring or module.methods:
+            classes.insert(0, module)
+        return classes
+
+    def get_docstring(self, entity_lines):
+        """Get module docstring from lines containing its text"""
+        source = join_lines(entity_lines)
+        return self._trim(_get_string(source, _FIRST_STATEMENT.match(source)))
+
+    def _scan(self, source):
+        """Walk through the source once, return the class holding
+        module-level functions and the list of classes"""
+        first_statement = _FIRST_STATEMENT.match(source)
+        module = Class('', '', '', [])
+        module.docstring = self._trim(_get_string(source, first_statement))
+        classes = []
+        scopes = [_Scope('module', -1, module, '',
+                         len(first_statement.group(1)))]
+        position = 0
+        header = _HEADER.match(source)
+        while True:
+            if header is not None:
+                position = self._add_entity(source, header, scopes, classes)
+            skip = _get_skip(scopes[-1].body_indent)
+            position = skip.match(source, position).end()
+            if position >= len(source):
+                break
+            header = None
+            if source[position] == '\n':
+                header = _HEADER.match(source, position + 1)
+                if header is None:
+                    indent = len(_SPACES.match(source, position + 1).group())
+                    while (len(scopes) > 1
+                           and indent < scopes[-1].body_indent):
+                        scopes.pop()
+            position += 1
+        for class_ in [module] + classes:
+            class_.methods = [method for method in class_.methods
+                              if (method.is_public() or self.show_nonpublic)
+                              and (method.docstring or self.show_empty)]
+        return module, classes
+
+    def _add_entity(self, source, header, scopes, classes):
+        """Create a class or a method from its header, return the position
+        to continue from"""
+        signature = _read_signature(source, header.end())
+        if signature is None:
+            return header.end()
+        parameters, colon_end = signature
+        indent = len(header.group('indent'))
+        is_class = header.group('class') is not None
+        while len(scopes) > 1 and scopes[-1].is_closed_by(indent, is_class):
+            scopes.pop()
+        scope = scopes[-1]
+        name = header.group('name')
+        if is_class:
+            entity, qualified_name = self._create_class(scope, name,
+                                                        parameters, classes)
+            kind = 'class'
+        else:
+            entity = None
+            if scope.kind != 'def' and scope.entity is not None:
+                entity = Method(name, parameters, '')
+                scope.entity.methods.append(entity)
+            qualified_name = ''
+            kind = 'def'
+        block = _BLOCK_START.match(source, colon_end)
+        if block is None:
+            body = _SPACES.match(source, colon_end)
+        else:
+            body = _FIRST_STATEMENT.match(source, block.end())
+            scopes.append(_Scope(kind, indent, entity, qualified_name,
+                                 len(body.group(1))))
+        if entity is not None:
+            entity.docstring = self._trim(_get_string(source, body))
+        return colon_end
+
+    def _create_class(self, scope, name, parameters, classes):
+        """Create a class object, add it to the classes if it is visible"""
+        if scope.kind == 'def':
+            return None, ''
+        qualified_name = (f'{scope.qualified_name}.{name}'
+                          if scope.qualified_name else name)
+        class_ = Class(qualified_name, ', '.join(parameters), '', [])
+        if (self.show_nonpublic
+                or not any(part.startswith('_')
+                           for part in qualified_name.split('.'))):
+            classes.append(class_)
+        return class_, qualified_name
+
+
+@dataclass
+class _Scope:
+    """Module, class or function body the scanner is in"""
+    kind: str
+    indent: int
+    entity: Entity
+    qualified_name: str
+    body_indent: int
+
+    def is_closed_by(self, indent, is_class):
+        """Check if a header with the given indentation ends this scope"""
+        return (indent < self.body_indent
+                or (indent <= self.indent
+                    and (self.kind == 'def' or is_class)))
+
+
+def _get_skip(indent):
+    """Return the pattern skipping everything up to a header or a line
+    with less indentation"""
+    if indent not in _SKIPS:
+        _SKIPS[indent] = re.compile(_SKIP % indent)
+    return _SKIPS[indent]
+
+
+def _get_string(source, statement):
+    """Return the contents of a string literal at the end of the match"""
+    string = _DOCSTRING.match(source, statement.end())
+    if string is None:
+        return ''
+    return string.group(string.lastindex)
+
+
+def _read_signature(source, position):
+    """Return parameters in the first parentheses of a header and the
+    position after its colon, or None if the header has no colon"""
+    first_open = first_close = None
+    commas = []
+    comments = []
+    depth = 0
+    while True:
+        token = _TOKEN.search(source, position)
+        if token is None:
+            return None
+        kind = token.lastgroup
+        position = token.end()
+        if kind == 'quote':
+            end = _STRING_ENDS[token.group()].match(source, position)
+            if end is not None:
+                position = end.end()
+        elif kind == 'open':
+            depth += 1
+            if depth == 1 and first_open is None and token.group() == '(':
+                first_open = token.start()
+        elif kind == 'close':
+            depth = max(depth - 1, 0)
+            if depth == 0 and first_open is not None and first_close is None:
+                first_close = token.start()
+        elif kind == 'comma':
+            if depth == 1 and first_open is not None and first_close is None:
+                commas.append(token.start())
+        elif kind == 'colon':
+            if depth == 0:
+                break
+        elif kind == 'comment':
+            comments.append(token.span())
+        elif kind == 'newline' and depth == 0:
+            return None
+    if first_close is None:
+        return [], position
+    parameters = []
+    for start, end in zip([first_open] + commas, commas + [first_close]):
+        parameter = _strip_comments(source, start + 1, end, comments).strip()
+        if '\n' in parameter:
+            parameter = _LINE_BREAK.sub(' ', parameter)
+        if parameter:
+            parameters.append(parameter)
+    return parameters, position
+
+
+def _strip_comments(source, start, end, comments):
+    """Return the source between the positions without comments"""
+    parts = []
+    for comment_start, comment_end in comments:
+        if start <= comment_start < end:
+            parts.append(source[start:comment_start])
+            start = comment_end
+    parts.append(source[start:end])
+    return ''.join(parts)
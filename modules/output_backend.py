@@ -0,0 +1,309 @@
+import io
+import os
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from modules.compression import compress_gzip
+from modules.html_minifier import minify_html
+
+try:
+    import brotli
+except ImportError:
+    # Brotli copies are only written when the library is installed
+    brotli = None
+
+ARCHIVES = {'.zip': None,
+            '.tar': 'w',
+            '.tar.gz': 'w:gz',
+            '.tgz': 'w:gz',
+            '.tar.bz2': 'w:bz2',
+            '.tar.xz': 'w:xz'}
+
+
+def create_output(path, threads=0, minify=False, compress=False):
+    """Return an archive output for paths with an archive extension and a
+    directory output writing with the given number of threads, minifying
+    and compressing pages if asked to otherwise"""
+    if get_archive_suffix(path) is not None:
+        return ArchiveOutput(path)
+    return DirectoryOutput(path, threads, minify, compress)
+
+
+# Suffixes of compressed copies of pages written by any run
+COMPRESSED_SUFFIXES = ('.gz', '.br')
+
+
+def get_compressors():
+    """Return functions compressing data for precompressed copies of
+    pages by the suffixes of the copies"""
+    compressors = {'.gz': compress_gzip}
+    if brotli is not None:
+        compressors['.br'] = lambda data: brotli.compress(data, quality=11)
+    return compressors
+
+
+def get_archive_suffix(path):
+    """Return the archive extension of the path or None"""
+    name = Path(path).name.lower()
+    return next((suffix for suffix in ARCHIVES if name.endswith(suffix)),
+                None)
+
+
+class DirectoryOutput:
+    """Writes pages as files under the output directory
+
+    A page identical to the existing file is not written again, so its
+    modification time is kept. Files are replaced atomically through a
+    temporary file. With writer threads pages are written in the background
+    while the next ones are rendered, and so are minified and compressed.
+    Compressed copies are written next to the pages with .gz and .br
+    suffixes for servers that send them as they are"""
+
+    def __init__(self, directory, threads=0, minify=False, compress=False):
+        self.directory = Path(directory)
+        self.minify = minify
+        self.compressors = get_compressors() if compress else {}
+        self.sizes = dict.fromkeys(['pages', 'minified', *self.compressors],
+                                   0)
+        self._sizes_lock = threading.Lock()
+        self._created = set()
+        self._executor = None
+        self._slots = 0
+        self._free_slots = None
+        self._pending = set()
+        self._errors = []
+        if threads > 0:
+            self._executor = ThreadPoolExecutor(threads)
+            # Bounds the number of rendered pages waiting in memory
+            self._slots = threads * 4
+            self._free_slots = threading.Semaphore(self._slots)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.close()
+        except Exception:
+            # Do not hide the error that is already being raised
+            if exc_type is None:
+                raise
+
+    def write(self, path, text):
+        """Write a page, creating its directory on first use"""
+        self._raise_error()
+        directory = path.parent
+        if directory not in self._created:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._created.add(directory)
+        if self._executor is None:
+            self._write_page(path, text)
+            return
+        # Two writes of one page must not overtake each other
+        if path in self._pending:
+            self.flush()
+        self._pending.add(path)
+        self._free_slots.acquire()
+        self._executor.submit(self._write_in_background, path, text)
+
+    def remove(self, path):
+        """Delete a page and its compressed copies if they exist"""
+        self.flush()
+        for file in [path, *self._get_copies(path,
+                                             COMPRESSED_SUFFIXES).values()]:
+            try:
+                file.unlink()
+            except FileNotFoundError:
+                pass
+
+    def flush(self):
+        """Wait until pages written in the background are on disk, raise
+        the first error of writing them"""
+        if self._executor is not None:
+            for _ in range(self._slots):
+                self._free_slots.acquire()
+            for _ in range(self._slots):
+                self._free_slots.release()
+            self._pending.clear()
+        self._raise_error()
+
+    def close(self):
+        """Finish background writes"""
+        try:
+            self.flush()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+
+    def _write_page(self, path, text):
+        """Minify and write a page, then its compressed copies
+
+        Copies are written first, so a page that is already on disk has its
+        copies too, and they are only compressed again if it changed. Copies
+        of kinds that are not written any more are deleted, so that servers
+        do not send them instead of the page"""
+        size = len(text.encode('utf-8'))
+        if self.minify and path.suffix == '.html':
+            text = minify_html(text)
+        data = text.encode('utf-8')
+        sizes = {'pages': size, 'minified': len(data)}
+        for copy in self._get_copies(path, set(COMPRESSED_SUFFIXES)
+                                     - self.compressors.keys()).values():
+            try:
+                copy.unlink()
+            except FileNotFoundError:
+                pass
+        copies = self._get_copies(path, self.compressors)
+        if _has_content(path, data) and all(map(os.path.isfile,
+                                                copies.values())):
+            sizes.update((suffix, copy.stat().st_size)
+                         for suffix, copy in copies.items())
+        else:
+            for suffix, copy in copies.items():
+                compressed = self.compressors[suffix](data)
+                _write_file(copy, compressed)
+                sizes[suffix] = len(compressed)
+            _write_file(path, data)
+        with self._sizes_lock:
+            for name, value in sizes.items():
+                self.sizes[name] += value
+
+    def _get_copies(self, path, suffixes):
+        """Return paths of compressed copies of a page by their suffixes"""
+        return {suffix: path.with_name(path.name + suffix)
+                for suffix in suffixes}
+
+    def _write_in_background(self, path, text):
+        """Write a page in a writer thread, remembering errors"""
+        try:
+            self._write_page(path, text)
+        except Exception as e:
+            self._errors.append(OSError(f'{path}: {e}'))
+        finally:
+            self._free_slots.release()
+
+    def _raise_error(self):
+        """Raise the first error of background writes since the previous
+        call"""
+        if self._errors:
+            error = self._errors[0]
+            self._errors.clear()
+            raise error
+
+
+class ArchiveOutput:
+    """Streams pages into a zip or tar archive
+
+    Pages are stored under a directory named after the archive, so links
+    work after the archive is extracted next to itself"""
+
+    def __init__(self, archive):
+        self.archive = Path(archive)
+        suffix = get_archive_suffix(archive)
+        self.directory = self.archive.with_name(
+            self.archive.name[:-len(suffix)])
+        mode = ARCHIVES[suffix]
+        self.archive.parent.mkdir(parents=True, exist_ok=True)
+        if mode is None:
+            self._zip = zipfile.ZipFile(self.archive, 'w',
+                                        zipfile.ZIP_DEFLATED)
+            self._tar = None
+        else:
+            self._zip = None
+            self._tar = tarfile.open(self.archive, mode)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, path, text):
+        """Add a page to the archive"""
+        name = Path(path).relative_to(self.archive.parent).as_posix()
+        data = text.encode('utf-8')
+        if self._zip is not None:
+            self._zip.writestr(name, data)
+            return
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def flush(self):
+        """Pages are added to the archive right away"""
+
+    def remove(self, path):
+        """Pages cannot be removed from an archive being written, raises
+        ValueError"""
+        raise ValueError(f'Cannot remove {path} from archive {self.archive}, '
+                         f'pages are only removed from output directories')
+
+    def close(self):
+        """Finish writing the archive"""
+        if self._zip is not None:
+            self._zip.close()
+        else:
+            self._tar.close()
+
+
+class MemoryOutput:
+    """Keeps pages in a dictionary of paths relative to the output
+    directory, for using the converter as a library"""
+
+    def __init__(self, directory='documentation'):
+        self.directory = Path(directory)
+        self.pages = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, path, text):
+        """Store a page"""
+        self.pages[Path(path).relative_to(self.directory).as_posix()] = text
+
+    def remove(self, path):
+        """Forget a page"""
+        self.pages.pop(Path(path).relative_to(self.directory).as_posix(),
+                       None)
+
+    def flush(self):
+        """Pages are stored right away"""
+
+    def close(self):
+        """Nothing to finish for pages in memory"""
+
+
+def _has_content(path, data):
+    """Check if a file exists and contains exactly the data"""
+    try:
+        return path.stat().st_size == len(data) and path.read_bytes() == data
+    except OSError:
+        return False
+
+
+def _write_file(path, data):
+    """Replace a file with the data unless it already has exactly this
+    content"""
+    if _has_content(path, data):
+        return
+    temporary = path.with_name(
+        f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        with open(temporary, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
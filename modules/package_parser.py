@@ -1,78 +1,363 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List
 
-from modules.module_parser import Class
+from modules.build_manifest import get_buffer_digest, get_digest
+from modules.directory_walker import DirectoryWalker
+from modules.module_parser import Class, Method, slotted
+
+
+# Events of a directory walk
+_ENTER, _FILE, _LEAVE = range(3)
 
 
 class PackageParser:
-    """Parses directories into packages and modules"""
+    """Parses directories into packages and modules
+
+    With a prefetch reader, files found by the walk are read in the
+    background a number of walk steps ahead of parsing"""
 
     def __init__(self, file_reader, module_parser, ignore_list,
-                 show_nonpublic):
+                 show_nonpublic, manifest=None, pool=None, stats=None,
+                 gitignore=False, large_files=None, reader=None):
         self.read_file = file_reader
         self.module_parser = module_parser
         self.ignore_list = ignore_list
         self.show_nonpublic = show_nonpublic
+        self.walker = DirectoryWalker(ignore_list, show_nonpublic, gitignore)
+        self.manifest = manifest
+        self.pool = pool
+        self.stats = stats
+        self.large_files = large_files
+        self.reader = reader
+        self._pending = []
 
     def get_packages(self, directory):
         """Return a package containing all packages in the given directory"""
         root = Path(directory)
-        return self._get_package(root, root)
+        package = self._get_package(root, root)
+        self._parse_pending()
+        return package
 
     def get_loose_files(self, files, base_package):
         """Return packages and loose modules at given paths using the given
         package as the container"""
+        _exhaust(self._walk_loose_files(files, base_package, False))
+        self._parse_pending()
+        return base_package
+
+    def stream_packages(self, directory):
+        """Yield modules in the given directory one at a time as they are
+        parsed; the package of their summaries is available afterwards"""
+        root = Path(directory)
+        return PackageStream(self._walk_package(root, root, True))
+
+    def stream_loose_files(self, files, base_package):
+        """Yield modules at given paths one at a time as they are parsed,
+        adding their summaries to the given package"""
+        return PackageStream(self._walk_loose_files(files, base_package,
+                                                    True))
+
+    def get_module(self, file, root):
+        """Parse one module file outside of a walk"""
+        module = self._get_module(Path(file), Path(root))
+        self._parse_pending()
+        return module
+
+    def get_package_docstring(self, dir_):
+        """Return the docstring of __init__.py of a directory or an empty
+        string"""
+        init = self._read_init(Path(dir_))
+        return '' if init is None else self.module_parser.get_docstring(init)
+
+    def update_module(self, file, root, base_package, summarise=False):
+        """Parse a changed, added or removed file again and put the result
+        into the package tree
+
+        Returns the module or None if it is gone and the packages containing
+        it from the base package down, with their cached state reset"""
+        file = Path(file)
+        relative_path = file.relative_to(Path(root).parent)
+        packages = _find_packages(base_package, relative_path.parent)
+        package = packages[-1]
+        index = next((i for i, module in enumerate(package.modules)
+                      if module.path == relative_path), None)
+        module = None
+        if (file.is_file() and file.suffix == '.py'
+                and self.walker.is_included(file, root)):
+            module = self._get_module(file, root)
+            self._parse_pending()
+            summary = module.summarise() if summarise else module
+            if index is None:
+                package.modules.append(summary)
+            else:
+                package.modules[index] = summary
+        elif index is not None:
+            del package.modules[index]
+        if file.name == '__init__.py':
+            package.docstring = ''
+            if file.is_file():
+                init = self.read_file(file)
+                package.docstring = self.module_parser.get_docstring(init)
+        for package in packages:
+            package.reset()
+        return module, packages
+
+    def _get_package(self, dir_, root):
+        """Implementation of get_packages()"""
+        return _exhaust(self._walk_package(dir_, root, False))
+
+    def _walk_loose_files(self, files, base_package, summarise):
+        """Implementation of get_loose_files() and stream_loose_files()"""
         root = Path()
         for file in files:
             path = Path(file)
             if path.is_file():
-                base_package.modules.append(self._get_module(path, root))
+                module = self._get_module(path, root)
+                yield module
+                base_package.modules.append(
+                    module.summarise() if summarise else module)
             elif path.is_dir():
-                package = self._get_package(path, path)
+                package = yield from self._walk_package(path, path,
+                                                        summarise)
                 base_package.packages.append(package)
         return base_package
 
-    def _get_package(self, dir_, root):
-        """Implementation of get_packages()"""
-        modules = []
-        packages = []
-        for file in dir_.iterdir():
-            if file.is_dir():
-                package = self._get_package(file, root)
-                packages.append(package)
-            elif file.suffix == '.py' and not self._is_ignored(file):
-                modules.append(self._get_module(file, root))
+    def _walk_package(self, dir_, root, summarise):
+        """Yield modules in the directory as they are parsed and return the
+        package containing them or their summaries
+
+        Directories are walked with a stack of unfinished packages instead
+        of recursion, so deep trees do not hit the recursion limit"""
+        stack = []
+        for path, event in self._prefetch(self._scan_tree(dir_)):
+            if event == _ENTER:
+                stack.append((path, [], []))
+            elif event == _FILE:
+                module = self._get_module(path, root)
+                yield module
+                stack[-1][1].append(module.summarise() if summarise
+                                    else module)
+            else:
+                package = self._create_package(*stack.pop(), root)
+                if not stack:
+                    return package
+                stack[-1][2].append(package)
+
+    def _scan_tree(self, dir_):
+        """Yield (path, event) pairs of entering directories, finding
+        files and leaving directories in the order of the walk"""
+        self.walker.start(dir_)
+        yield dir_, _ENTER
+        stack = [(dir_, iter(self.walker.scan(dir_)))]
+        while stack:
+            directory, entries = stack[-1]
+            for path, is_directory in entries:
+                if is_directory:
+                    yield path, _ENTER
+                    stack.append((path, iter(self.walker.scan(path))))
+                    break
+                yield path, _FILE
+            else:
+                stack.pop()
+                yield directory, _LEAVE
+
+    def _prefetch(self, events):
+        """Start reading files and package docstrings of walk events that
+        are up to the prefetch depth ahead of the current one"""
+        if self.reader is None:
+            yield from events
+            return
+        window = deque()
+        for path, event in events:
+            if event == _ENTER:
+                self.reader.prefetch(self._read_init, path)
+            elif event == _FILE:
+                self.reader.prefetch(self._read_module, path)
+            window.append((path, event))
+            if len(window) > self.reader.depth:
+                yield window.popleft()
+        yield from window
+
+    def _create_package(self, dir_, modules, packages, root):
+        """Return the package of a walked directory with the docstring of
+        its __init__.py"""
         docstring = ''
-        if (dir_ / '__init__.py').is_file():
-            init = self.read_file(dir_ / '__init__''.py')
+        init = self._read(self._read_init, dir_)
+        if init is not None:
             docstring = self.module_parser.get_docstring(init)
-        package = Package(dir_.relative_to(root.parent), dir_.name, docstring,
-                          modules, packages)
-        return package
+        return Package(dir_.relative_to(root.parent), dir_.name, docstring,
+                       modules, packages)
+
+    def _read(self, function, path):
+        """Read a file with the function through the prefetch reader if
+        there is one"""
+        if self.reader is None:
+            return function(path)
+        return self.reader.read(function, path)
+
+    def _read_init(self, dir_):
+        """Return lines of __init__.py of a directory or None"""
+        init = dir_ / '__init__.py'
+        return self.read_file(init) if init.is_file() else None
+
+    def _read_module(self, path):
+        """Return the size of a module file and its lines, or None instead
+        of lines for a file left for the large file parser"""
+        size = path.stat().st_size
+        if self.large_files is not None and self.large_files.is_large(size):
+            return size, None
+        return size, self.read_file(path)
 
     def _get_module(self, path, root):
         """Return module object for the given path"""
-        contents = self.read_file(path)
-        return Module(path.relative_to(root.parent), path.name,
-                      self.module_parser.get_classes(contents))
+        start = time.perf_counter()
+        size, contents = self._read(self._read_module, path)
+        if contents is None:
+            return self._get_large_module(path, root, size)
+        relative_path = path.relative_to(root.parent)
+        if self.stats is not None:
+            # With a prefetch reader this is the time of waiting for the file
+            self.stats.add(relative_path, 'read',
+                           time.perf_counter() - start, size)
+        digest = get_digest(contents)
+        classes = None
+        if self.manifest is not None:
+            classes = self.manifest.get_classes(relative_path, digest)
+        module = Module(relative_path, path.name, classes, digest)
+        if classes is None and self.pool is not None:
+            self._pending.append((module, contents))
+            return module
+        if classes is None:
+            start = time.perf_counter()
+            module.classes = self.module_parser.get_classes(contents)
+            if self.stats is not None:
+                self.stats.add(relative_path, 'parse',
+                               time.perf_counter() - start)
+        if self.stats is not None:
+            self.stats.add_entities(relative_path, module.classes)
+        self._add_to_manifest(module)
+        return module
+
+    def _get_large_module(self, path, root, size):
+        """Return module object for a large file parsed from its contents
+        mapped into memory"""
+        relative_path = path.relative_to(root.parent)
+        summarised = self.large_files.is_summarised(size)
+        start = time.perf_counter()
+        with self.large_files.open(path) as buffer:
+            digest = get_buffer_digest(buffer)
+            if self.stats is not None:
+                self.stats.add(relative_path, 'read',
+                               time.perf_counter() - start, size)
+            classes = None
+            if self.manifest is not None:
+                classes = self.manifest.get_classes(relative_path, digest)
+            if classes is None:
+                start = time.perf_counter()
+                classes = self.large_files.get_classes(buffer,
+                                                       not summarised)
+                if self.stats is not None:
+                    self.stats.add(relative_path, 'parse',
+                                   time.perf_counter() - start)
+        module = Module(relative_path, path.name, classes, digest, summarised)
+        if self.stats is not None:
+            self.stats.add_entities(relative_path, classes)
+        self._add_to_manifest(module)
+        return module
+
+    def _parse_pending(self):
+        """Parse the modules left for the worker pool"""
+        if not self._pending:
+            return
+        modules, contents = zip(*self._pending)
+        self._pending = []
+        start = time.perf_counter()
+        results = self.pool.get_classes(self.module_parser, contents)
+        for module, classes in zip(modules, results):
+            module.classes = classes
+            if self.stats is not None:
+                self.stats.add_entities(module.path, classes)
+            self._add_to_manifest(module)
+        if self.stats is not None:
+            # Modules are parsed in worker processes, only the total is known
+            self.stats.add_total('parse', time.perf_counter() - start)
+
+    def _add_to_manifest(self, module):
+        """Remember the parsed module for the next incremental run"""
+        if self.manifest is not None:
+            self.manifest.add_module(module.path, module.digest,
+                                     module.classes)
 
     def _is_ignored(self, file):
         """Check if the file should be ignored"""
-        return (any(file.match(pattern) for pattern in self.ignore_list)
-                or (file.name.startswith('_') and not self.show_nonpublic))
+        return self.walker.is_ignored(file)
+
+
+def _find_packages(base_package, directory):
+    """Return packages from the base package down to the one at the given
+    path, creating missing ones"""
+    packages = [base_package]
+    for name in directory.parts[len(base_package.path.parts):]:
+        parent = packages[-1]
+        package = next((package for package in parent.packages
+                        if package.name == name), None)
+        if package is None:
+            package = Package(parent.path.joinpath(name), name, '', [], [])
+            parent.packages.append(package)
+        packages.append(package)
+    return packages
+
+
+def _exhaust(walk):
+    """Run a walk to the end and return its result"""
+    while True:
+        try:
+            next(walk)
+        except StopIteration as e:
+            return e.value
 
 
+class PackageStream:
+    """Iterates over modules of a walk, then holds the resulting package"""
+
+    def __init__(self, walk):
+        self.walk = walk
+        self.package = None
+
+    def __iter__(self):
+        self.package = yield from self.walk
+
+
+@slotted
 @dataclass
 class Module:
     """Representation of a Python module"""
     path: Path
     name: str
     classes: List[Class]
+    digest: str = ''
+    summarised: bool = False
+
+    def __post_init__(self):
+        self.name = sys.intern(self.name)
 
+    def summarise(self):
+        """Return a copy with only the names needed for index pages"""
+        classes = [Class(class_.name, class_.parameters, '',
+                         [Method(method.name, (), '')
+                          for method in class_.methods])
+                   for class_ in self.classes]
+        return Module(self.path, self.name, classes, self.digest,
+                      self.summarised)
 
+
+@slotted
 @dataclass
 class Package:
     """Representation of a Python package"""
@@ -82,7 +367,12 @@ class Package:
     modules: List[Module]
     packages: List[Package]
 
-    _empty = None
+    _empty: bool = field(init=False, repr=False, compare=False)
+    _digest: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.name = sys.intern(self.name)
+        self.reset()
 
     def __iter__(self):
         yield self
@@ -97,3 +387,29 @@ class Package:
                                    for package in self.packages):
                 self._empty = False
         return self._empty
+
+    def reset(self):
+        """Forget the cached state after the contents have changed"""
+        self._empty = None
+        self._digest = None
+
+    def get_digest(self):
+        """Return a hash of the package contents and all nested packages"""
+        if self._digest is None:
+            parts = [self.docstring]
+            parts.extend(f'\0{module.name}:{module.digest}'
+                         for module in self.modules)
+            parts.extend(f'\0{package.name}/{package.get_digest()}'
+                         for package in self.packages)
+            self._digest = get_digest(parts)
+        return self._digest
+
+    def get_shallow_digest(self):
+        """Return a hash of the package contents and names of its direct
+        nested packages"""
+        parts = [self.docstring]
+        parts.extend(f'\0{module.name}:{module.digest}'
+                     for module in self.modules)
+        parts.extend(f'\0{package.name}/{package.is_empty()}'
+                     for package in self.packages)
+        return get_digest(parts)
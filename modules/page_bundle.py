@@ -0,0 +1,27 @@
+import base64
+import json
+from pathlib import PurePosixPath
+
+from modules.compression import compress_gzip
+
+
+class PageBundle:
+    """Pages of a whole site kept as compressed sections of one HTML file,
+    decompressed by the browser only when a page is opened"""
+
+    def __init__(self):
+        self.pages = {}
+        self.size = 0
+
+    def add_page(self, path, page):
+        """Compress a page and add it under its path in the output"""
+        data = page.encode('utf-8')
+        self.size += len(data)
+        self.pages[PurePosixPath(path).as_posix()] = base64.b64encode(
+            compress_gzip(data)).decode('ascii')
+
+    def get_data(self):
+        """Return the pages as JSON that is safe to put into a script
+        element"""
+        return json.dumps(self.pages, separators=(',', ':')) \
+            .replace('<', '\\u003c')
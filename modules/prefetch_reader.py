@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PrefetchReader:
+    """Reads files on a thread pool ahead of the code that needs them
+
+    Reads are started by prefetch() and picked up by read(), which only
+    waits if the file is not read yet. The caller keeps the number of
+    prefetched files bounded by the depth"""
+
+    def __init__(self, depth):
+        self.depth = depth
+        self.stalled = 0.0
+        self._executor = ThreadPoolExecutor(depth)
+        self._futures = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def prefetch(self, function, path):
+        """Start reading a file with the function in the background"""
+        key = (function, path)
+        if key not in self._futures:
+            self._futures[key] = self._executor.submit(function, path)
+
+    def read(self, function, path):
+        """Return the result of reading a file with the function, waiting
+        for a prefetched read or reading it now"""
+        start = time.perf_counter()
+        future = self._futures.pop((function, path), None)
+        try:
+            if future is None:
+                return function(path)
+            return future.result()
+        finally:
+            self.stalled += time.perf_counter() - start
+
+    def close(self):
+        """Drop reads that were not needed and stop the threads"""
+        for future in self._futures.values():
+            future.cancel()
+        self._futures = {}
+        self._executor.shutdown()
@@ -0,0 +1,61 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+from modules.build_manifest import get_digest
+
+
+class RenderCache:
+    """Rendered docpages stored in files named by a hash of the module model,
+    the link base and everything else that affects a page
+
+    Pages have relative links, so the same module renders to the same page
+    in any checkout and one cache directory can be shared by several
+    checkouts and CI runners. Files are only added, never changed, so the
+    directory can be cleaned at any time"""
+
+    def __init__(self, directory, settings):
+        self.directory = Path(directory)
+        self.version = get_digest([json.dumps(settings, sort_keys=True)])
+
+    def get_key(self, base_path, module, fragment=False, links=None):
+        """Return the hash of the inputs of a docpage"""
+        # The source digest is left out: changes of function bodies or
+        # comments do not change the page
+        model = (module.path.as_posix(), module.name, module.classes,
+                 module.summarised)
+        return get_digest([self.version, str(base_path), str(fragment),
+                           repr(model), json.dumps(links, sort_keys=True)])
+
+    def get(self, key):
+        """Return a cached page or None"""
+        try:
+            with open(self._get_path(key), 'r', encoding='utf-8') as file:
+                return file.read()
+        except (OSError, ValueError):
+            return None
+
+    def add(self, key, page):
+        """Store a page, replacing the file atomically so that other
+        processes never read a part of it"""
+        path = self._get_path(key)
+        temporary = path.with_name(
+            f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temporary, 'w', encoding='utf-8') as file:
+                file.write(page)
+            os.replace(temporary, path)
+        except OSError:
+            # The cache only saves time, a page that cannot be stored is
+            # rendered again next time
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+
+    def _get_path(self, key):
+        """Return the file of a page, spread over subdirectories by the
+        first characters of the key"""
+        return self.directory.joinpath(key[:2], key + '.html')
@@ -0,0 +1,192 @@
+import functools
+import json
+import re
+from pathlib import Path
+
+_WORD = re.compile(r'[^\W_]+')
+_IDENTIFIER = re.compile(r'\w+')
+_SUBWORD = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+_DOCSTRING_WORD = re.compile(r'[^\W\d_]\w{2,}')
+_SHARD_NAME = re.compile(r'[^a-z0-9]')
+_IGNORED_TOKENS = {'self', 'cls', 'the', 'and', 'for', 'with', 'this',
+                   'that', 'from', 'are', 'not', 'none', 'return',
+                   'returns'}
+
+
+class SearchIndex:
+    """Index of modules, classes and methods for the search box of the
+    pages, split into files that are loaded on demand
+
+    Tokens are sharded by prefixes that grow until a shard is small enough,
+    entities are stored in chunks of a fixed size. Docstring tokens per
+    entity and entities per token are capped, so shard sizes stay bounded
+    on any number of entities"""
+
+    DIRECTORY = '_search'
+    INDEX = 'index.js'
+
+    def __init__(self, shard_size=10000, chunk_size=1000,
+                 max_docstring_tokens=32, max_postings=500,
+                 max_prefix_length=6):
+        self.shard_size = shard_size
+        self.chunk_size = chunk_size
+        self.max_docstring_tokens = max_docstring_tokens
+        self.max_postings = max_postings
+        self.max_prefix_length = max_prefix_length
+        self.modules = {}
+
+    def add_module(self, module):
+        """Add a module with its classes and methods, replacing the module
+        with the same path if it was added before"""
+        module_path = Path(module.path).as_posix()
+        module_tokens = _get_name_tokens(Path(module.path).stem)
+        entities = [self._create_entity('module', module.name, '',
+                                        _get_path_tokens(module_path), '',
+                                        frozenset())]
+        for class_ in module.classes:
+            if class_.name:
+                entities.append(self._create_entity(
+                    'class', class_.name, class_.parameters,
+                    _get_name_tokens(class_.name), class_.docstring,
+                    module_tokens))
+            for method in class_.methods:
+                name = '.'.join(filter(None, (class_.name, method.name)))
+                entities.append(self._create_entity(
+                    'method' if class_.name else 'function', name,
+                    ', '.join(method.parameters),
+                    _get_name_tokens(method.name), method.docstring,
+                    module_tokens, method.parameters))
+        self.modules[module_path] = entities
+
+    def remove_module(self, path):
+        """Remove a module added before"""
+        self.modules.pop(Path(path).as_posix(), None)
+
+    def _create_entity(self, kind, name, parameters, name_tokens, docstring,
+                       module_tokens, parameter_list=()):
+        """Return the entity with tokens matching its name and tokens
+        matching its parameters, module and docstring"""
+        summary = docstring.strip().split('\n', 1)[0][:100]
+        other_tokens = set(module_tokens)
+        for parameter in parameter_list:
+            identifier = _IDENTIFIER.search(parameter)
+            if identifier is not None:
+                other_tokens.update(_get_name_tokens(identifier.group()))
+        docstring_tokens = set()
+        for word in _DOCSTRING_WORD.finditer(docstring):
+            if len(docstring_tokens) >= self.max_docstring_tokens:
+                break
+            docstring_tokens.add(word.group().lower())
+        other_tokens |= docstring_tokens
+        other_tokens -= name_tokens
+        other_tokens -= _IGNORED_TOKENS
+        return (kind, name, parameters, summary), name_tokens, other_tokens
+
+    def get_files(self):
+        """Return file names and texts of the index, its shards and entity
+        chunks"""
+        modules, entities, postings = self._build()
+        files = {}
+        shards = {}
+        for prefix, tokens in self._split(sorted(postings), 1, postings):
+            filename = _get_shard_filename(prefix)
+            shards[prefix] = filename
+            data = {token: postings[token] for token in tokens}
+            files[filename] = _create_script('docstrings2html_search_shard',
+                                             prefix, data)
+        chunks = range(0, len(entities), self.chunk_size)
+        for number, start in enumerate(chunks):
+            files[f'entities-{number}.js'] = _create_script(
+                'docstrings2html_search_entities', number,
+                _get_chunk(modules, entities[start:start + self.chunk_size]))
+        files[self.INDEX] = _create_script(
+            'docstrings2html_search_index', None,
+            {'shards': shards, 'chunk_size': self.chunk_size})
+        return files
+
+    def _build(self):
+        """Number all entities, return module paths, entities with module
+        numbers and the ids of entities matching every token"""
+        modules = []
+        entities = []
+        postings = {}
+        for module_path, module_entities in self.modules.items():
+            module_id = len(modules)
+            modules.append(module_path)
+            for (kind, name, parameters, summary), *fields in \
+                    module_entities:
+                entity_id = len(entities)
+                entities.append((kind, name, parameters, module_id, summary))
+                for field, tokens in enumerate(fields):
+                    for token in tokens:
+                        token_postings = postings.get(token)
+                        if token_postings is None:
+                            token_postings = postings[token] = ([], [])
+                        if len(token_postings[field]) < self.max_postings:
+                            token_postings[field].append(entity_id)
+        return modules, entities, postings
+
+    def _split(self, tokens, length, postings):
+        """Group sorted tokens by prefixes of the given length, making
+        prefixes longer for groups that are too large"""
+        groups = {}
+        for token in tokens:
+            groups.setdefault(token[:length], []).append(token)
+        for prefix, group in groups.items():
+            if (length < self.max_prefix_length
+                    and _get_size(group, postings) > self.shard_size
+                    and any(len(token) > length for token in group)):
+                yield from self._split(group, length + 1, postings)
+            else:
+                yield prefix, group
+
+
+def _get_size(tokens, postings):
+    """Return the number of tokens and their postings"""
+    return sum(1 + len(postings[token][0]) + len(postings[token][1])
+               for token in tokens)
+
+
+def _get_chunk(modules, entities):
+    """Return entities with paths of their modules stored once"""
+    chunk_modules = {}
+    chunk_entities = []
+    for kind, name, parameters, module_id, summary in entities:
+        module = chunk_modules.setdefault(module_id, len(chunk_modules))
+        chunk_entities.append([kind, name, parameters, module, summary])
+    return {'modules': [modules[module_id] for module_id in chunk_modules],
+            'entities': chunk_entities}
+
+
+@functools.lru_cache(maxsize=65536)
+def _get_name_tokens(name):
+    """Return the lowercase name and its words split by underscores and
+    capital letters"""
+    tokens = {part.lower().strip('_') for part in name.split('.')}
+    for word in _WORD.findall(name):
+        tokens.add(word.lower())
+        tokens.update(subword.lower() for subword in _SUBWORD.findall(word))
+    tokens.discard('')
+    return frozenset(tokens)
+
+
+def _get_path_tokens(path):
+    """Return tokens of every part of a module path"""
+    tokens = set()
+    for part in Path(path).with_suffix('').parts:
+        tokens.update(_get_name_tokens(part))
+    return frozenset(tokens)
+
+
+def _get_shard_filename(prefix):
+    """Return a file name that is safe for any prefix"""
+    name = _SHARD_NAME.sub(lambda match: f'~{ord(match.group()):x}', prefix)
+    return f'shard-{name}.js'
+
+
+def _create_script(callback, key, data):
+    """Return a script passing compact JSON data to a callback"""
+    arguments = [json.dumps(data, separators=(',', ':'), ensure_ascii=False)]
+    if key is not None:
+        arguments.insert(0, json.dumps(key))
+    return f'{callback}({", ".join(arguments)});\n'
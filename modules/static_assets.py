@@ -0,0 +1,51 @@
+from pathlib import Path, PurePosixPath
+
+from modules.build_manifest import get_digest
+
+ASSETS = ['style.css', 'script.js', 'shallow_index.js', 'search.js']
+
+
+class StaticAssets:
+    """CSS and JavaScript shared by all pages, either written once as
+    content-hashed files or inlined into every page"""
+
+    DIRECTORY = '_static'
+
+    def __init__(self, source_directory, inline=False):
+        self.inline = inline
+        self.texts = {name: Path(source_directory, name)
+                      .read_text(encoding='utf-8') for name in ASSETS}
+        self.digests = {name: get_digest([text])
+                        for name, text in self.texts.items()}
+        self.filenames = {name: _get_hashed_name(name, self.digests[name])
+                          for name in ASSETS}
+
+    def get_digest(self):
+        """Return a hash of all assets and the way they are included"""
+        return get_digest([str(self.inline)] + list(self.digests.values()))
+
+    def get_path(self, base_path, name):
+        """Return the path of an asset file in the output directory"""
+        return Path(base_path, self.DIRECTORY, self.filenames[name])
+
+    def get_tag(self, base_path, name):
+        """Return the HTML tag that includes an asset into a page"""
+        if name.endswith('.css'):
+            if self.inline:
+                return f'<style>\n{self.texts[name]}</style>'
+            return (f'<link rel="stylesheet" '
+                    f'href="{self._get_link(base_path, name)}">')
+        if self.inline:
+            return f'<script>\n{self.texts[name]}</script>'
+        return f'<script src="{self._get_link(base_path, name)}"></script>'
+
+    def _get_link(self, base_path, name):
+        """Return the link to an asset file from a page"""
+        return PurePosixPath(base_path, self.DIRECTORY, self.filenames[name])
+
+
+def _get_hashed_name(name, digest):
+    """Return the file name with a part of the content hash before the
+    extension"""
+    path = Path(name)
+    return f'{path.stem}.{digest[:12]}{path.suffix}'
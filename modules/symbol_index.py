@@ -0,0 +1,126 @@
+import re
+from pathlib import PurePosixPath
+
+# Strings, names with an optional '=' of a keyword or a default value and
+# a single '=' after other tokens
+_TOKEN = re.compile(r'(?P<string>\'(?:[^\'\\]|\\.)*\'|"(?:[^"\\]|\\.)*")'
+                    r'|(?P<name>[A-Za-z_][\w.]*)(?P<equals>\s*=(?!=))?'
+                    r'|(?<![=!<>])=(?!=)')
+_NAME = re.compile(r'[A-Za-z_][\w.]*')
+_PARAMETER_NAME = re.compile(r'\s*\**\w*')
+_ANNOTATION = re.compile(r'\s*:')
+# Marks a name defined in several places
+_AMBIGUOUS = ''
+
+
+class SymbolIndex:
+    """Maps class names to anchors on their docpages for linking class
+    bases and parameter types to their definitions
+
+    Classes are found by their qualified name, by the name of their module
+    and class and by the class name alone, the last two only if they are
+    unique. Names are looked up in the module that refers to them first.
+    Every lookup is a dictionary access, so resolving the references of all
+    modules is a linear pass"""
+
+    def __init__(self, packages=()):
+        self.symbols = {}
+        self.build(packages)
+
+    def build(self, packages):
+        """Index classes of all modules of the packages, forgetting the
+        previous ones"""
+        self.symbols = {}
+        for package in packages:
+            for module in package.modules:
+                self.add_module(module)
+
+    def add_module(self, module):
+        """Index the classes of a module"""
+        qualified_name = get_qualified_name(module.path)
+        module_name = qualified_name.rpartition('.')[2]
+        page = f'{module.path.as_posix()}.html'
+        for class_ in module.classes:
+            if not class_.name:
+                continue
+            target = f'{page}#{class_.name}'
+            self.symbols[f'{qualified_name}.{class_.name}'] = target
+            for name in (f'{module_name}.{class_.name}', class_.name):
+                previous = self.symbols.get(name, target)
+                self.symbols[name] = (target if previous == target
+                                      else _AMBIGUOUS)
+
+    def resolve(self, module):
+        """Return links of names used in class bases and method parameters
+        of a module, relative to the root of the output"""
+        prefix = get_qualified_name(module.path) + '.'
+        links = {}
+        for class_ in module.classes:
+            texts = [(class_.parameters, False)] if isinstance(
+                class_.parameters, str) else []
+            texts.extend((parameter, True) for method in class_.methods
+                         for parameter in method.parameters)
+            for text, is_parameter in texts:
+                for _, _, name in _find_names(text, is_parameter):
+                    if name in links:
+                        continue
+                    target = (self.symbols.get(prefix + name)
+                              or self.symbols.get(name))
+                    if target:
+                        links[name] = target
+        return links
+
+
+def link_names(text, links, base_path, is_parameter=False):
+    """Return text with names that have links turned into HTML links"""
+    if not links:
+        return text
+    result = []
+    position = 0
+    for start, end, name in _find_names(text, is_parameter):
+        target = links.get(name)
+        if target is None:
+            continue
+        href = PurePosixPath(base_path).joinpath(target)
+        result.append(text[position:start])
+        result.append(f'<a class="symbol-link" href="{href}">{name}</a>')
+        position = end
+    result.append(text[position:])
+    return ''.join(result)
+
+
+def get_qualified_name(path):
+    """Return the dotted name of a module by its path"""
+    parts = list(PurePosixPath(path).with_suffix('').parts)
+    if parts and parts[-1] == '__init__':
+        parts.pop()
+    return '.'.join(parts)
+
+
+def _find_names(text, is_parameter):
+    """Yield start, end and text of names in class bases or in a parameter
+
+    The parameter name, keyword names and strings are skipped, except for
+    strings in annotations, which are forward references"""
+    position = 0
+    in_annotation = False
+    if is_parameter:
+        position = _PARAMETER_NAME.match(text).end()
+        annotation = _ANNOTATION.match(text, position)
+        if annotation is not None:
+            position = annotation.end()
+            in_annotation = True
+    for match in _TOKEN.finditer(text, position):
+        if match['string'] is not None:
+            if in_annotation:
+                for name in _NAME.finditer(text, match.start() + 1,
+                                           match.end() - 1):
+                    yield name.start(), name.end(), name.group()
+        elif match['name'] is not None:
+            if in_annotation or match['equals'] is None:
+                yield match.start('name'), match.end('name'), match['name']
+            if match['equals'] is not None:
+                # The default value of a parameter starts here
+                in_annotation = False
+        else:
+            in_annotation = False
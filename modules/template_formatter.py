@@ -1,19 +1,152 @@
-from mako.lookup import TemplateLookup
+import json
+from pathlib import Path, PurePath, PurePosixPath
+
+from modules.docstring_markup import DocstringRenderer
+from modules.search_index import SearchIndex
+from modules.symbol_index import link_names
+from modules.static_assets import StaticAssets
+
+
+# Links between pages of a bundle become fragments of its own address
+BUNDLE_BASE_PATH = PurePosixPath('#')
 
 
 class TemplateFormatter:
-    """Finds and renders template files"""
+    """Finds and renders template files
+
+    Mako is imported on the first rendered page, so runs that render nothing
+    do not pay for it. Templates compiled into the module directory are
+    reused by later runs. Shared CSS and JavaScript are linked from the
+    static assets directory unless they are inlined. Pages get a search box
+    if the site has a search index. Docstrings are converted from markup to
+    HTML if asked to. Docpages are taken from the render cache when one is
+    set"""
+
+    INDEX_DATA = 'index.js'
+
+    def __init__(self, template_directory, module_directory=None,
+                 inline_assets=False, search=False, markup=False):
+        self.template_directory = template_directory
+        self.module_directory = module_directory
+        self.assets = StaticAssets(
+            Path(template_directory, 'templates', 'static'), inline_assets)
+        self.search = SearchIndex.DIRECTORY if search else None
+        self.markup = DocstringRenderer() if markup else None
+        self.render_cache = None
+        self._lookup = None
+
+    @property
+    def lookup(self):
+        """Template lookup created on first use"""
+        if self._lookup is None:
+            from mako.lookup import TemplateLookup
+            module_directory = None
+            if self.module_directory is not None:
+                module_directory = str(self.module_directory)
+            self._lookup = TemplateLookup(
+                directories=[str(self.template_directory)],
+                module_directory=module_directory, strict_undefined=True)
+        return self._lookup
+
+    def precompile(self, templates):
+        """Compile templates into the module directory ahead of time"""
+        for template in templates:
+            self.lookup.get_template('/' + template)
+
+    def create_docpage(self, base_path, module, fragment=False, links=None):
+        """Create an HTML documentation page from a module object, or only
+        the contents of its body for a fragment
 
-    def __init__(self, template_directory):
-        self.lookup = TemplateLookup(directories=[template_directory],
-                                     strict_undefined=True)
+        Names in class bases and parameters that have links from the symbol
+        index become links"""
+        if self.render_cache is None:
+            return self._render('/templates/docpage.html', base_path,
+                                fragment, module=module, links=links,
+                                link_names=link_names)
+        key = self.render_cache.get_key(base_path, module, fragment, links)
+        page = self.render_cache.get(key)
+        if page is None:
+            page = self._render('/templates/docpage.html', base_path,
+                                fragment, module=module, links=links,
+                                link_names=link_names)
+            self.render_cache.add(key, page)
+        return page
 
-    def create_docpage(self, base_path, module):
-        """Create an HTML documentation page from a module object"""
-        template = self.lookup.get_template('/templates/docpage.html')
-        return template.render_unicode(base_path=base_path, module=module)
+    def create_docpages(self, modules, links=None):
+        """Create documentation pages for several modules in the same order,
+        with links relative to the pages and links of names for every
+        module if given"""
+        links = links or [None] * len(modules)
+        return (self.create_docpage(get_base_path(module.path), module,
+                                    links=module_links)
+                for module, module_links in zip(modules, links))
 
-    def create_index(self, base_path, packages):
+    def create_index(self, base_path, packages, fragment=False):
         """Create an index page with links to provided packages and modules"""
-        template = self.lookup.get_template('/templates/index.html')
-        return template.render_unicode(base_path=base_path, packages=packages)
+        return self._render('/templates/index.html', base_path, fragment,
+                            packages=packages)
+
+    def create_shallow_index(self, base_path, packages):
+        """Create an index page with links to direct children of a package,
+        deeper levels are loaded from index data files"""
+        return self._render('/templates/shallow_index.html', base_path,
+                            packages=packages, create_id=create_id_from_path,
+                            index_data=self.INDEX_DATA)
+
+    def create_batch_index(self, base_path, title, projects):
+        """Create an index page with links to projects of a batch build"""
+        return self._render('/templates/batch_index.html', base_path,
+                            search=None, title=title, projects=projects)
+
+    def create_bundle(self, title, bundle, start):
+        """Create a self-contained page that shows compressed pages of a
+        bundle on navigation"""
+        return self._render('/templates/bundle.html', BUNDLE_BASE_PATH,
+                            title=title, pages=bundle.get_data(),
+                            start=json.dumps(start))
+
+    def _render(self, template, base_path, fragment=False, **arguments):
+        """Render a template with the arguments shared by all pages"""
+        template = self.lookup.get_template(template)
+        values = {'base_path': base_path, 'assets': self.assets,
+                  'search': self.search, 'markup': self.markup,
+                  'fragment': fragment}
+        values.update(arguments)
+        return template.render_unicode(**values)
+
+    def create_index_data(self, base_path, package):
+        """Create a script with direct children of a package and class and
+        method names of its modules for shallow index pages"""
+        packages = [{
+            'name': nested_package.name,
+            'id': create_id_from_path(nested_package.path),
+            'link': str(base_path.joinpath(nested_package.path, 'index.html')),
+            'data': str(base_path.joinpath(nested_package.path,
+                                           self.INDEX_DATA))
+        } for nested_package in package.packages
+            if not nested_package.is_empty()]
+        modules = [{
+            'name': module.name,
+            'id': create_id_from_path(module.path),
+            'link': f'{base_path.joinpath(module.path)}.html',
+            'classes': [[class_.name, [method.name
+                                       for method in class_.methods]]
+                        for class_ in module.classes]
+            if any(class_.methods for class_ in module.classes) else []
+        } for module in package.modules]
+        data = json.dumps({'packages': packages, 'modules': modules},
+                          separators=(',', ':'))
+        package_id = json.dumps(create_id_from_path(package.path))
+        return f'docstrings2html_index({package_id}, {data});\n'
+
+
+def get_base_path(page):
+    """Return the relative link from the directory of a page to the root
+    of the output, for a page path relative to the root"""
+    return PurePosixPath(*['..'] * (len(PurePath(page).parts) - 1))
+
+
+def create_id_from_path(path):
+    """Return an HTML element id for a package or a module path"""
+    path = str(path)
+    return path.replace('/', '-').replace('\\', '-')
@@ -0,0 +1,61 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.template_formatter import TemplateFormatter, get_base_path
+
+_formatter = None
+
+
+def _init_worker(template_directory, module_directory, inline_assets,
+                 search, markup, render_cache):
+    """Create the template formatter of a worker process"""
+    global _formatter
+    _formatter = TemplateFormatter(template_directory, module_directory,
+                                   inline_assets, search, markup)
+    _formatter.render_cache = render_cache
+
+
+def _create_docpage(module, links):
+    """Render a docpage with the formatter of the worker process"""
+    return _formatter.create_docpage(get_base_path(module.path), module,
+                                     links=links)
+
+
+class WorkerPool:
+    """Process pool that parses modules and renders docpages"""
+
+    def __init__(self, jobs, template_directory, module_directory=None,
+                 inline_assets=False, search=False, markup=False,
+                 render_cache=None):
+        self.jobs = jobs
+        self.executor = ProcessPoolExecutor(
+            jobs, initializer=_init_worker,
+            initargs=(template_directory, module_directory, inline_assets,
+                      search, markup, render_cache))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Wait for the workers to finish and stop them"""
+        self.executor.shutdown()
+
+    def get_classes(self, module_parser, contents):
+        """Parse the contents of several modules, return a list of classes
+        for every module in the same order"""
+        return self.executor.map(module_parser.get_classes, contents,
+                                 chunksize=self._get_chunksize(contents))
+
+    def create_docpages(self, modules, links=None):
+        """Render docpages for several modules in the same order, with links
+        relative to the pages and links of names for every module if
+        given"""
+        return self.executor.map(_create_docpage, modules,
+                                 links or [None] * len(modules),
+                                 chunksize=self._get_chunksize(modules))
+
+    def _get_chunksize(self, items):
+        """Return the number of items sent to a worker at once"""
+        return max(1, len(items) // (self.jobs * 4))
@@ -0,0 +1,6 @@
+function toggle_visibility(elementId) {
+    let element = document.getElementById(elementId);
+    element.style.display = element.style.display === 'block' ? 'none' : 'block';
+    let button = document.getElementById('button-' + elementId).firstChild;
+    button.data = element.style.display === 'none' ? '+' : '-'
+}
@@ -0,0 +1,163 @@
+const MAX_SEARCH_RESULTS = 30;
+const searchData = {};
+const searchCallbacks = {};
+let searchQuery = '';
+
+function docstrings2html_search_index(data) {
+    store_search_data('index', data);
+}
+
+function docstrings2html_search_shard(prefix, data) {
+    store_search_data('shard:' + prefix, data);
+}
+
+function docstrings2html_search_entities(number, data) {
+    store_search_data('entities:' + number, data);
+}
+
+function store_search_data(key, data) {
+    searchData[key] = data;
+    for (const callback of searchCallbacks[key] || []) {
+        callback(data);
+    }
+    delete searchCallbacks[key];
+}
+
+function load_search_data(key, filename, callback) {
+    if (key in searchData) {
+        callback(searchData[key]);
+    } else if (key in searchCallbacks) {
+        searchCallbacks[key].push(callback);
+    } else {
+        searchCallbacks[key] = [callback];
+        let script = document.createElement('script');
+        script.src = document.getElementById('search-input').dataset.index + filename;
+        document.head.appendChild(script);
+    }
+}
+
+function load_all_search_data(requests, callback) {
+    let results = new Array(requests.length);
+    let remaining = requests.length;
+    if (!remaining) {
+        callback(results);
+    }
+    requests.forEach(([key, filename], i) => load_search_data(key, filename, data => {
+        results[i] = data;
+        if (--remaining === 0) {
+            callback(results);
+        }
+    }));
+}
+
+function search(query) {
+    searchQuery = query;
+    let terms = query.toLowerCase().split(/[^\p{L}\p{N}_]+/u).filter(term => term.length >= 2);
+    if (!terms.length) {
+        show_search_results(null);
+        return;
+    }
+    load_search_data('index', 'index.js', index => {
+        let requests = [];
+        for (const [prefix, filename] of Object.entries(index.shards)) {
+            if (terms.some(term => term.startsWith(prefix) || prefix.startsWith(term))) {
+                requests.push(['shard:' + prefix, filename]);
+            }
+        }
+        load_all_search_data(requests, shards => {
+            if (query !== searchQuery) {
+                return;
+            }
+            let ids = rank_search_results(terms, shards);
+            let chunks = [...new Set(ids.map(id => Math.floor(id / index.chunk_size)))];
+            load_all_search_data(chunks.map(number => ['entities:' + number, 'entities-' + number + '.js']),
+                                 () => {
+                if (query !== searchQuery) {
+                    return;
+                }
+                show_search_results(ids.map(id => {
+                    let chunk = searchData['entities:' + Math.floor(id / index.chunk_size)];
+                    let [kind, name, parameters, module, summary] = chunk.entities[id % index.chunk_size];
+                    return [kind, name, parameters, chunk.modules[module], summary];
+                }));
+            });
+        });
+    });
+}
+
+function rank_search_results(terms, shards) {
+    let scores = null;
+    for (const term of terms) {
+        let termScores = new Map();
+        for (const shard of shards) {
+            for (const [token, [nameIds, otherIds]] of Object.entries(shard)) {
+                if (!token.startsWith(term)) {
+                    continue;
+                }
+                let weight = token === term ? 2 : 1;
+                for (const id of nameIds) {
+                    termScores.set(id, Math.max(termScores.get(id) || 0, 10 * weight));
+                }
+                for (const id of otherIds) {
+                    termScores.set(id, Math.max(termScores.get(id) || 0, weight));
+                }
+            }
+        }
+        if (scores === null) {
+            scores = termScores;
+        } else {
+            let merged = new Map();
+            for (const [id, score] of scores) {
+                if (termScores.has(id)) {
+                    merged.set(id, score + termScores.get(id));
+                }
+            }
+            scores = merged;
+        }
+    }
+    return [...scores.entries()]
+        .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+        .slice(0, MAX_SEARCH_RESULTS)
+        .map(([id]) => id);
+}
+
+function show_search_results(entities) {
+    let results = document.getElementById('search-results');
+    if (entities === null) {
+        results.replaceChildren();
+        results.style.display = 'none';
+        return;
+    }
+    let base = document.getElementById('search-input').dataset.base;
+    results.replaceChildren(...entities.map(([kind, name, parameters, module, summary]) => {
+        let element = document.createElement('div');
+        element.className = 'search-result';
+        let anchor = document.createElement('a');
+        anchor.className = (kind === 'function' ? 'method' : kind) + '-link';
+        anchor.href = base + '/' + module + '.html' + get_search_anchor(kind, name);
+        anchor.textContent = kind === 'module' ? module : name;
+        if (kind !== 'module') {
+            anchor.title = name.split('.').pop() + '(' + parameters + ')';
+        }
+        let details = document.createElement('span');
+        details.className = 'search-details';
+        details.textContent = ' ' + [kind === 'module' ? '' : module, summary].filter(Boolean).join(' — ');
+        element.append(anchor, details);
+        return element;
+    }));
+    if (!entities.length) {
+        results.textContent = 'Nothing found';
+    }
+    results.style.display = 'block';
+}
+
+function get_search_anchor(kind, name) {
+    if (kind === 'module') {
+        return '';
+    }
+    if (kind === 'method') {
+        let dot = name.lastIndexOf('.');
+        return '#' + name.slice(0, dot) + '_' + name.slice(dot + 1);
+    }
+    return '#' + name;
+}
@@ -0,0 +1,133 @@
+const indexData = {};
+const indexCallbacks = {};
+const indexUrls = {};
+
+function docstrings2html_index(packageId, data) {
+    // Links in index data are relative to the data file
+    let base = indexUrls[packageId];
+    for (const item of [...data.packages, ...data.modules]) {
+        item.link = new URL(item.link, base).href;
+        if (item.data !== undefined) {
+            item.data = new URL(item.data, base).href;
+        }
+    }
+    indexData[packageId] = data;
+    for (const callback of indexCallbacks[packageId] || []) {
+        callback(data);
+    }
+    delete indexCallbacks[packageId];
+}
+
+function load_index_data(packageId, url, callback) {
+    if (packageId in indexData) {
+        callback(indexData[packageId]);
+    } else if (packageId in indexCallbacks) {
+        indexCallbacks[packageId].push(callback);
+    } else {
+        indexCallbacks[packageId] = [callback];
+        indexUrls[packageId] = new URL(url, document.baseURI).href;
+        let script = document.createElement('script');
+        script.src = url;
+        document.head.appendChild(script);
+    }
+}
+
+function expand_package(packageId, url) {
+    let element = document.getElementById('package-links-' + packageId);
+    if (!element.dataset.loaded) {
+        element.dataset.loaded = 'true';
+        load_index_data(packageId, url, data => {
+            for (const child of data.packages) {
+                element.appendChild(create_package_element(child));
+            }
+            for (const module of data.modules) {
+                element.appendChild(create_module_element(packageId, url, module));
+            }
+        });
+    }
+    toggle_visibility('package-links-' + packageId);
+}
+
+function expand_module(packageId, url, moduleId) {
+    let element = document.getElementById('module-links-' + moduleId);
+    if (!element.dataset.loaded) {
+        element.dataset.loaded = 'true';
+        load_index_data(packageId, url, data => {
+            let module = data.modules.find(module => module.id === moduleId);
+            for (const [className, methods] of module.classes) {
+                element.appendChild(create_class_element(module.link, className, methods));
+            }
+        });
+    }
+    toggle_visibility('module-links-' + moduleId);
+}
+
+function create_element(tag, className, text, href) {
+    let element = document.createElement(tag);
+    element.className = className;
+    if (text !== undefined) {
+        element.textContent = text;
+    }
+    if (href !== undefined) {
+        element.href = href;
+    }
+    return element;
+}
+
+function create_expand_button(elementId, expand) {
+    let button = create_element('a', 'expand-button', '+', '#');
+    button.id = 'button-' + elementId;
+    button.onclick = event => {
+        event.preventDefault();
+        expand();
+    };
+    return button;
+}
+
+function create_package_element(child) {
+    let element = create_element('div', 'package-elements');
+    let links = create_element('div', 'package-links');
+    links.id = 'package-links-' + child.id;
+    element.append(create_expand_button(links.id, () => expand_package(child.id, child.data)),
+                   create_element('a', 'package-link', child.name, child.link),
+                   links);
+    return element;
+}
+
+function create_module_element(packageId, url, module) {
+    let element = create_element('div', 'module-elements');
+    let link = create_element('a', 'module-link', module.name, module.link);
+    if (!module.classes.length) {
+        element.append(' ', link);
+        return element;
+    }
+    let links = create_element('div', 'module-links');
+    links.id = 'module-links-' + module.id;
+    element.append(create_expand_button(links.id, () => expand_module(packageId, url, module.id)),
+                   link, links);
+    return element;
+}
+
+function create_class_element(moduleLink, className, methods) {
+    let prefix = className ? className + '_' : '';
+    let methodElements = methods.map(method => {
+        let element = create_element('div', 'index-link');
+        element.appendChild(create_element('a', 'method-link', method,
+                                           moduleLink + '#' + prefix + method));
+        return element;
+    });
+    if (!className) {
+        let fragment = document.createDocumentFragment();
+        fragment.append(...methodElements);
+        return fragment;
+    }
+    let element = create_element('div', 'index-link');
+    element.appendChild(create_element('a', 'class-link', className,
+                                       moduleLink + '#' + className));
+    for (const methodElement of methodElements) {
+        let wrapper = create_element('div', 'method-links');
+        wrapper.appendChild(methodElement);
+        element.appendChild(wrapper);
+    }
+    return element;
+}
@@ -0,0 +1,93 @@
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+import docstrings2html
+from modules.build_stats import BuildStats
+from modules.batch_projects import read_projects
+
+
+class BatchProjectsTest(unittest.TestCase):
+    def write_projects(self, directory, projects):
+        path = Path(directory, 'projects.json')
+        path.write_text(json.dumps(projects), encoding='utf-8')
+        return path
+
+    def test_read_projects(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.write_projects(directory, [
+                {'name': 'a', 'input': 'src/a', 'index': True},
+                {'name': 'b', 'input': ['b.py'], 'output': 'libs/b',
+                 'ignore': ['*_pb2.py']}])
+            first, second = read_projects(path)
+        self.assertEqual(first.input_files, [str(Path(directory, 'src/a'))])
+        self.assertEqual(first.output, 'a')
+        self.assertEqual(first.options, {'index': True})
+        self.assertEqual(second.output, 'libs/b')
+        self.assertEqual(second.options, {'ignore': ['*_pb2.py']})
+
+    def test_invalid_projects(self):
+        for projects in ({'name': 'a'}, [{'input': 'a'}], [{'name': 'a'}],
+                         [{'name': 'a', 'input': 'a', 'jobs': 2}],
+                         [{'name': 'a', 'input': 'a', 'index': 'yes'}],
+                         [{'name': 'a', 'input': 'a', 'output': '../a'}],
+                         [{'name': 'a', 'input': 'a'},
+                          {'name': 'b', 'input': 'b', 'output': 'a'}]):
+            with self.subTest(projects=projects), \
+                    tempfile.TemporaryDirectory() as directory:
+                with self.assertRaises(ValueError):
+                    read_projects(self.write_projects(directory, projects))
+
+    def test_build_batch(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ('a', 'b'):
+                package = Path(directory, name, 'package')
+                package.mkdir(parents=True)
+                package.joinpath('module.py').write_text(
+                    'def f():\n    """doc"""\n', encoding='utf-8')
+            path = self.write_projects(directory, [
+                {'name': 'a', 'input': 'a/package', 'index': True},
+                {'name': 'b', 'input': 'b/package'}])
+            output = Path(directory, 'output')
+            arguments = docstrings2html._parse_batch_arguments(
+                [str(path), '--output', str(output), '--no-template-cache'])
+            with redirect_stdout(StringIO()):
+                docstrings2html.build_batch(arguments)
+            index = output.joinpath('index.html').read_text(encoding='utf-8')
+            self.assertIn('href="a/package/index.html"', index)
+            self.assertIn('href="b/package/module.py.html"', index)
+            self.assertTrue(output.joinpath('a', 'package',
+                                            'index.html').is_file())
+            self.assertFalse(output.joinpath('b', 'package',
+                                             'index.html').exists())
+
+    def test_batch_stats(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, source in (('a', 'class A:\n    def f(self):\n'
+                                       '        """doc"""\n'),
+                                 ('b', 'class B:\n    """doc"""\n')):
+                package = Path(directory, name, 'src')
+                package.mkdir(parents=True)
+                package.joinpath('m.py').write_text(source, encoding='utf-8')
+            path = self.write_projects(directory, [
+                {'name': 'a', 'input': 'a/src'},
+                {'name': 'b', 'input': 'b/src'}])
+            arguments = docstrings2html._parse_batch_arguments(
+                [str(path), '--output', str(Path(directory, 'output')),
+                 '--no-template-cache', '--stats-json',
+                 str(Path(directory, 'stats.json'))])
+            stats = BuildStats()
+            with redirect_stdout(StringIO()):
+                docstrings2html.build_batch(arguments, stats)
+        self.assertEqual(stats.modules[str(Path('a', 'src', 'm.py'))]
+                         ['entities'], 2)
+        self.assertEqual(stats.modules[str(Path('b', 'src', 'm.py'))]
+                         ['entities'], 1)
+        self.assertNotIn(str(Path('src', 'm.py')), stats.modules)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from modules.build_manifest import BuildManifest, get_digest
+from modules.module_parser import Class, Method
+
+
+class BuildManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = Path(self.directory.name)
+        self.settings = {'nonpublic': False, 'empty': False}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _save_run(self, page_digests, settings=None):
+        manifest = BuildManifest(self.output, settings or self.settings)
+        for name, digest in page_digests.items():
+            page = self.output / name
+            if manifest.add_page(page, digest):
+                page.write_text(digest, encoding='utf-8')
+        manifest.remove_stale_pages()
+        manifest.save()
+        return manifest
+
+    def test_get_digest(self):
+        self.assertEqual(get_digest(['a\n', 'b']), get_digest(['a\nb']))
+        self.assertNotEqual(get_digest(['a']), get_digest(['b']))
+
+    def test_classes(self):
+        classes = [Class('A', 'object', 'doc',
+                         [Method('b', ['self', 'c'], 'doc2')])]
+        manifest = BuildManifest(self.output, self.settings)
+        manifest.add_module(Path('a/b.py'), 'digest1', classes)
+        manifest.save()
+
+        manifest = BuildManifest(self.output, self.settings)
+        with self.subTest('unchanged'):
+            result = manifest.get_classes(Path('a/b.py'), 'digest1')
+            self.assertEqual(result, classes)
+
+        with self.subTest('changed'):
+            result = manifest.get_classes(Path('a/b.py'), 'digest2')
+            self.assertIsNone(result)
+
+        with self.subTest('other settings'):
+            manifest = BuildManifest(self.output, {'nonpublic': True})
+            result = manifest.get_classes(Path('a/b.py'), 'digest1')
+            self.assertIsNone(result)
+
+    def test_add_page(self):
+        self._save_run({'a.html': '1', 'b.html': '2'})
+        manifest = BuildManifest(self.output, self.settings)
+
+        with self.subTest('unchanged'):
+            self.assertFalse(manifest.add_page(self.output / 'a.html', '1'))
+
+        with self.subTest('changed'):
+            self.assertTrue(manifest.add_page(self.output / 'b.html', '3'))
+
+        with self.subTest('new'):
+            self.assertTrue(manifest.add_page(self.output / 'c.html', '4'))
+
+        with self.subTest('deleted from disk'):
+            (self.output / 'a.html').unlink()
+            self.assertTrue(manifest.add_page(self.output / 'a.html', '1'))
+
+    def test_remove_stale_pages(self):
+        self._save_run({'a.html': '1', 'b.html': '2'})
+        self._save_run({'a.html': '1'}, {'nonpublic': True})
+        self.assertTrue((self.output / 'a.html').is_file())
+        self.assertFalse((self.output / 'b.html').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
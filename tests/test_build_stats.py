@@ -0,0 +1,83 @@
+import contextlib
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import docstrings2html
+from modules.build_stats import BuildStats
+from modules.module_parser import Class, Method
+from modules.output_backend import MemoryOutput
+
+
+class BuildStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.stats = BuildStats()
+        self.stats.add(Path('a.py'), 'read', 0.1, 100)
+        self.stats.add(Path('a.py'), 'parse', 0.2)
+        self.stats.add(Path('a.py'), 'write', 0.05, 300)
+        self.stats.add(Path('a.py'), 'write', 0.05, 200)
+        self.stats.add(Path('b.py'), 'read', 0.5, 10)
+        self.stats.add_total('render', 1.0)
+        self.stats.add_entities(Path('a.py'),
+                                [Class('A', '', '', [Method('a', [], ''),
+                                                     Method('b', [], '')])])
+        self.stats.add_page(Path('a.py.html'), 500)
+        self.stats.add_page(Path('index.html'), 2000)
+
+    def test_to_dict(self):
+        result = self.stats.to_dict()
+        self.assertEqual(result['modules']['a.py'],
+                         {'read': 0.1, 'read_bytes': 100, 'parse': 0.2,
+                          'write': 0.1, 'write_bytes': 500, 'entities': 3})
+        self.assertEqual(result['stages'],
+                         {'read': 0.6, 'parse': 0.2, 'render': 1.0,
+                          'write': 0.1})
+        self.assertEqual(result['pages'], {'a.py.html': 500,
+                                           'index.html': 2000})
+
+    def test_save(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, 'stats.json')
+            self.stats.save(path)
+            result = json.loads(path.read_text(encoding='utf-8'))
+        self.assertEqual(result['modules']['b.py'],
+                         {'read': 0.5, 'read_bytes': 10})
+
+    def test_get_report(self):
+        lines = self.stats.get_report(1).splitlines()
+        self.assertIn('2 modules, 2 pages', lines[0])
+        self.assertEqual(lines[5], 'Slowest 1 modules:')
+        self.assertTrue(lines[7].endswith('0  b.py'))
+        self.assertEqual(lines[8], 'Largest 1 pages:')
+        self.assertTrue(lines[9].endswith('KB  index.html'))
+        self.assertEqual(len(lines), 10)
+
+    def test_stalled(self):
+        self.assertIsNone(self.stats.to_dict()['stalled'])
+        self.stats.add_stalled(0.25)
+        self.stats.add_stalled(0.5)
+        self.assertEqual(self.stats.to_dict()['stalled'], 0.75)
+        self.assertIn('  stalled on prefetched reads 0.750 s',
+                      self.stats.get_report(1).splitlines())
+
+    def test_build_stalled(self):
+        with tempfile.TemporaryDirectory() as directory:
+            package = Path(directory, 'package')
+            package.mkdir()
+            package.joinpath('__init__.py').write_text('', encoding='utf-8')
+            package.joinpath('module.py').write_text('', encoding='utf-8')
+            stats = BuildStats()
+            arguments = docstrings2html._parse_arguments(
+                [str(package), '--no-template-cache', '--prefetch', '2',
+                 '--stats-json', str(Path(directory, 'stats.json')),
+                 '--output', str(Path(directory, 'docs'))])
+            with MemoryOutput(arguments.output) as output:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    docstrings2html.build(arguments, output, stats)
+        self.assertGreater(stats.stalled, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from modules.directory_walker import (DirectoryWalker, GitignoreRules,
+                                      compile_patterns)
+
+
+class DirectoryWalkerTest(unittest.TestCase):
+    def test_compile_patterns(self):
+        patterns = ['*_test.py', 'test_*.py', 'build/*.py', 'gen?.py',
+                    'x[0-9].py']
+        matcher = compile_patterns(patterns)
+        for path in ('a_test.py', 'package/test_a.py', 'package/a.py',
+                     'build/a.py', 'src/build/a.py', 'build/x/a.py',
+                     'gen1.py', 'gen12.py', 'x5.py', 'xa.py', 'test_a.pyc'):
+            with self.subTest(path):
+                expected = any(Path(path).match(pattern)
+                               for pattern in patterns)
+                self.assertEqual(matcher.search(path) is not None, expected)
+
+    def test_gitignore_rules(self):
+        rules = GitignoreRules(['# comment', '', 'build/', '*.log',
+                                '/docs', 'gen/*.py', '!gen/keep.py',
+                                'a/**/b'])
+        for path, is_directory, expected in (
+                ('build', True, True),
+                ('build', False, None),
+                ('src/build', True, True),
+                ('src/app.log', False, True),
+                ('docs', True, True),
+                ('src/docs', True, None),
+                ('gen/drop.py', False, True),
+                ('gen/keep.py', False, False),
+                ('gen/sub/drop.py', False, None),
+                ('a/b', True, True),
+                ('a/x/y/b', False, True)):
+            with self.subTest(path):
+                self.assertEqual(rules.match(path, is_directory), expected)
+
+    def test_scan(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory, 'project')
+            for path in ('package/module.py', 'package/_private.py',
+                         'package/test_module.py', 'package/notes.txt',
+                         '.git/hook.py', 'node_modules/x/y.py',
+                         'env/lib/site.py', 'build/generated.py'):
+                root.joinpath(path).parent.mkdir(parents=True,
+                                                 exist_ok=True)
+                root.joinpath(path).write_text('', encoding='utf-8')
+            root.joinpath('env', 'pyvenv.cfg').write_text('',
+                                                          encoding='utf-8')
+            root.joinpath('.gitignore').write_text('build/\n',
+                                                   encoding='utf-8')
+            os.symlink('..', root.joinpath('package', 'loop'))
+            walker = DirectoryWalker(['test_*.py'], False, True)
+            walker.start(root)
+            self.assertEqual(sorted(walker.scan(root)),
+                             [(root.joinpath('env'), True),
+                              (root.joinpath('package'), True)])
+            self.assertEqual(walker.scan(root.joinpath('env')), [])
+            self.assertEqual(walker.scan(root.joinpath('package')),
+                             [(root.joinpath('package', 'module.py'),
+                               False)])
+            self.assertTrue(walker.is_included(
+                root.joinpath('package', 'new.py'), root))
+            self.assertFalse(walker.is_included(
+                root.joinpath('build', 'generated.py'), root))
+            self.assertFalse(walker.is_included(
+                root.joinpath('env', 'lib', 'site.py'), root))
+
+
+if __name__ == '__main__':
+    unittest.main()
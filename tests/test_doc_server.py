@@ -0,0 +1,117 @@
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from modules.doc_server import DocServer, PageCache, create_server
+from modules.module_parser import ModuleParser
+from modules.package_parser import PackageParser
+from modules.template_formatter import TemplateFormatter
+
+
+def read_lines(filename):
+    with open(filename, 'r', encoding='utf-8') as file:
+        return file.readlines()
+
+
+class PageCacheTest(unittest.TestCase):
+    def test_evict_least_recently_used(self):
+        cache = PageCache(10)
+        cache.add('a', b'aaaa')
+        cache.add('b', b'bbbb')
+        self.assertEqual(cache.get('a'), b'aaaa')
+        cache.add('c', b'cccc')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'aaaa')
+        self.assertEqual(cache.size, 8)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions),
+                         (2, 1, 1))
+
+    def test_too_large(self):
+        cache = PageCache(3)
+        cache.add('a', b'aaaa')
+        self.assertEqual(len(cache), 0)
+
+
+class DocServerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name, 'package')
+        self.root.joinpath('nested', 'empty').mkdir(parents=True)
+        self.root.joinpath('__init__.py').write_text(
+            '"""Package docstring"""\n')
+        self.module = self.root.joinpath('module.py')
+        self.module.write_text('class A:\n    """First"""\n')
+        self.root.joinpath('nested', 'inner.py').write_text(
+            'def f():\n    """Inner"""\n')
+        self.root.joinpath('test_module.py').write_text('')
+        package_parser = PackageParser(read_lines, ModuleParser(False, False),
+                                       ['test_*.py'], False)
+        self.docs = DocServer(self.root, package_parser,
+                              TemplateFormatter('./'), PageCache(2 ** 20))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_index(self):
+        page = self.docs.get_page('/package/index.html').decode('utf-8')
+        for string in ('Package docstring', 'href="../package/module.py.html"',
+                       'href="../package/nested/index.html"'):
+            self.assertIn(string, page)
+        self.assertNotIn('empty', page)
+        self.assertNotIn('test_module', page)
+        data = self.docs.get_page('/package/nested/index.js').decode('utf-8')
+        self.assertIn('inner.py', data)
+
+    def test_docpage(self):
+        page = self.docs.get_page('/package/module.py.html')
+        self.assertIn(b'First', page)
+        self.assertIs(self.docs.get_page('/package/module.py.html'), page)
+        self.assertEqual(self.docs.cache.hits, 1)
+
+    def test_changed_source(self):
+        self.docs.get_page('/package/module.py.html')
+        stat = self.module.stat()
+        os.utime(self.module, ns=(stat.st_atime_ns,
+                                  stat.st_mtime_ns + 10 ** 9))
+        self.docs.get_page('/package/module.py.html')
+        self.assertEqual(self.docs.cache.hits, 1)
+        self.module.write_text('class B:\n    """Second"""\n')
+        os.utime(self.module, ns=(stat.st_atime_ns,
+                                  stat.st_mtime_ns + 2 * 10 ** 9))
+        self.assertIn(b'Second', self.docs.get_page('/package/module.py.html'))
+
+    def test_missing(self):
+        for path in ('/', '/other/index.html', '/package/missing.py.html',
+                     '/package/test_module.py.html', '/package/module.py',
+                     '/package/../package/module.py.html',
+                     '/package/nested/empty/../inner.py.html',
+                     '/_static/missing.css'):
+            with self.subTest(path=path):
+                self.assertIsNone(self.docs.get_page(path))
+
+    def test_http(self):
+        server = create_server(('127.0.0.1', 0), self.docs, True)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}'
+            with urllib.request.urlopen(url + '/') as response:
+                self.assertEqual(response.url, url + '/package/index.html')
+                self.assertEqual(response.headers['Content-Type'],
+                                 'text/html; charset=utf-8')
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                urllib.request.urlopen(url + '/package/missing.py.html')
+            context.exception.close()
+            self.assertEqual(context.exception.code, 404)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
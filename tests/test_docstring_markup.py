@@ -0,0 +1,59 @@
+import unittest
+
+from modules.docstring_markup import DocstringRenderer, convert
+
+
+class DocstringMarkupTest(unittest.TestCase):
+    def test_paragraphs_and_inline(self):
+        self.assertEqual(convert('First *line*\nwith ``a < b``.\n\n'
+                                 'Second **one**, *args and **kwargs.'),
+                         '<p>First <em>line</em> with <code>a &lt; b</code>.'
+                         '</p>\n<p>Second <strong>one</strong>, *args and '
+                         '**kwargs.</p>')
+
+    def test_code(self):
+        self.assertEqual(convert('Example::\n\n    f(x)\n\n>>> 1\n1\n\n'
+                                 '```\n<code>\n```'),
+                         '<p>Example:</p>\n'
+                         '<pre class="docstring-code">f(x)</pre>\n'
+                         '<pre class="docstring-code">&gt;&gt;&gt; 1\n1'
+                         '</pre>\n'
+                         '<pre class="docstring-code">&lt;code&gt;</pre>')
+
+    def test_lists(self):
+        self.assertEqual(convert('Items:\n- a\n  b\n- c\n\n1. d\n2) e'),
+                         '<p>Items:</p>\n<ul><li>a b</li><li>c</li></ul>\n'
+                         '<ol><li>d</li><li>e</li></ol>')
+
+    def test_sections(self):
+        expected = ('<p class="docstring-heading">Parameters</p>'
+                    '<dl class="docstring-fields"><dt><code>x</code> '
+                    '(<span class="docstring-type">int</span>)</dt>'
+                    '<dd>The x value.</dd></dl>\n'
+                    '<p class="docstring-heading">Returns</p>'
+                    '<dl class="docstring-fields">'
+                    '<dt><span class="docstring-type">str</span></dt>'
+                    '<dd>Text.</dd></dl>')
+        for docstring in ('Args:\n    x (int): The x\n        value.\n\n'
+                          'Returns:\n    str: Text.',
+                          'Parameters\n----------\nx : int\n    The x\n'
+                          '    value.\n\nReturns\n-------\nstr\n    Text.',
+                          ':param x: The x\n    value.\n:type x: int\n'
+                          ':returns: Text.\n:rtype: str'):
+            with self.subTest(docstring=docstring):
+                self.assertEqual(convert(docstring), expected)
+
+    def test_text_section(self):
+        self.assertEqual(convert('Note:\n    Be *careful*.'),
+                         '<p class="docstring-heading">Note</p>\n'
+                         '<p>Be <em>careful</em>.</p>')
+
+    def test_cache(self):
+        renderer = DocstringRenderer(2)
+        for docstring in ('a', 'b', 'a', 'c', 'b'):
+            renderer.render(docstring)
+        self.assertEqual(renderer.get_cache_info(), (1, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
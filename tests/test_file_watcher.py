@@ -0,0 +1,33 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from modules.file_watcher import FileWatcher
+
+
+class FileWatcherTest(unittest.TestCase):
+    def test_poll(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            (root / 'nested').mkdir()
+            changed = root / 'nested' / 'a.py'
+            removed = root / 'b.py'
+            for path in (changed, removed, root / 'c.txt'):
+                path.write_text('x = 1\n', encoding='utf-8')
+            watcher = FileWatcher([directory])
+            self.assertEqual(watcher.poll(), set())
+
+            changed.write_text('x = 2\n', encoding='utf-8')
+            stat = changed.stat()
+            os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+            removed.unlink()
+            added = root / 'nested' / 'd.py'
+            added.write_text('x = 1\n', encoding='utf-8')
+            (root / 'c.txt').write_text('changed\n', encoding='utf-8')
+            self.assertEqual(watcher.poll(), {changed, removed, added})
+            self.assertEqual(watcher.poll(), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,13 @@
+import tempfile
 import unittest
 from pathlib import Path
 
 from modules.module_parser import Class, Method
 from modules.package_parser import Package, Module
-from modules.template_formatter import TemplateFormatter
+from modules.page_bundle import PageBundle
+from modules.render_cache import RenderCache
+from modules.template_formatter import (TemplateFormatter, BUNDLE_BASE_PATH,
+                                        get_base_path)
 
 
 class FormatterTest(unittest.TestCase):
@@ -54,6 +58,131 @@ class FormatterTest(unittest.TestCase):
                                     'path3',
                                     'module2')
 
+    def test_create_shallow_index(self):
+        method = Method('c', [], 'docstring2')
+        module = Module(Path('path1/path3'), 'module1',
+                        [Class('B', 'object', '', [method])])
+        nested = Package(Path('path1/path2'), 'package2', '',
+                         [Module(Path('path1/path2/path4'), 'module2', [])],
+                         [])
+        package = Package(Path('path1'), 'package1', 'docstring1', [module],
+                          [nested])
+        page = self.formatter.create_shallow_index(Path(), package)
+        self.assert_strings_in_page(page, 'package2', 'module1',
+                                    'docstring1', 'path1/path2/index.js')
+        self.assertNotIn('module2', page)
+        self.assertNotIn('class-link" href', page)
+
+        data = self.formatter.create_index_data(Path(), package)
+        self.assert_strings_in_page(data, 'docstrings2html_index("path1"',
+                                    '"id":"path1-path2"',
+                                    '"classes":[["B",["c"]]]')
+        self.assertNotIn('module2', data)
+        self.assertNotIn('docstring1', data)
+        self.assertNotIn('docstring2', data)
+
+    def test_search_box(self):
+        module = Module(Path(), 'module1', [])
+        self.assertNotIn('search-input',
+                         self.formatter.create_docpage(Path(), module))
+        page = TemplateFormatter('./', search=True).create_docpage(Path(),
+                                                                   module)
+        self.assert_strings_in_page(page, 'search-input', '_search/',
+                                    '_static/search.')
+
+    def test_summarised_module(self):
+        module = Module(Path('module.py'), 'module.py',
+                        [Class('A', '', '', [Method('a', [], '')])],
+                        summarised=True)
+        page = self.formatter.create_docpage(Path(), module)
+        self.assert_strings_in_page(page, 'module-summary-note',
+                                    '<span class="method-names">a</span>')
+        self.assertNotIn('method-signature', page)
+
+    def test_fragment(self):
+        module = Module(Path('package/module.py'), 'module.py',
+                        [Class('A', [], '', [Method('a', [], 'doc')])])
+        page = self.formatter.create_docpage(BUNDLE_BASE_PATH, module, True)
+        self.assert_strings_in_page(page, 'doc',
+                                    'href="#/package/module.py.html#A"',
+                                    'href="#/package/index.html"')
+        self.assertNotIn('<body', page)
+        self.assertNotIn('<title', page)
+
+    def test_relative_links(self):
+        self.assertEqual(str(get_base_path(Path('module.py'))), '.')
+        self.assertEqual(str(get_base_path(Path('a/b/index.html'))), '../..')
+        module = Module(Path('package/module.py'), 'module.py',
+                        [Class('A', [], '', [Method('a', [], 'doc')])])
+        page = next(self.formatter.create_docpages([module]))
+        self.assert_strings_in_page(page, 'href="../package/module.py.html#A"',
+                                    'href="../package/index.html"',
+                                    'href="../_static/style.')
+
+    def test_markup(self):
+        module = Module(Path('module.py'), 'module.py',
+                        [Class('A', [], 'Class *doc*', [
+                            Method('a', [], 'Method\n\n- item')])])
+        page = TemplateFormatter('./', markup=True).create_docpage(Path(),
+                                                                   module)
+        self.assert_strings_in_page(page, '<p>Class <em>doc</em></p>',
+                                    '<ul><li>item</li></ul>')
+        self.assertNotIn('<pre class="method-docstring">', page)
+
+    def test_links(self):
+        module = Module(Path('package/module.py'), 'module.py',
+                        [Class('A', 'Base', '', [
+                            Method('a', ['self', 'b: Base'], 'doc')])])
+        page = self.formatter.create_docpage(
+            Path('..'), module, links={'Base': 'base.py.html#Base'})
+        self.assertEqual(page.count(
+            '<a class="symbol-link" href="../base.py.html#Base">Base</a>'), 2)
+
+    def test_render_cache(self):
+        module = Module(Path('package/module.py'), 'module.py',
+                        [Class('A', [], '', [Method('a', [], 'doc')])],
+                        'digest1')
+        with tempfile.TemporaryDirectory() as directory:
+            self.formatter.render_cache = RenderCache(directory, {})
+            page = self.formatter.create_docpage(Path('..'), module)
+            key = self.formatter.render_cache.get_key(Path('..'), module)
+            self.assertEqual(self.formatter.render_cache.get(key), page)
+            self.formatter.render_cache.add(key, 'cached')
+            module.digest = 'digest2'
+            self.assertEqual(
+                self.formatter.create_docpage(Path('..'), module), 'cached')
+            module.classes[0].methods[0].docstring = 'changed'
+            self.assertIn('changed',
+                          self.formatter.create_docpage(Path('..'), module))
+            other = RenderCache(directory, {'templates': 'changed'})
+            self.assertNotEqual(other.get_key(Path('..'), module),
+                                self.formatter.render_cache.get_key(
+                                    Path('..'), module))
+
+    def test_create_bundle(self):
+        bundle = PageBundle()
+        bundle.add_page('package/index.html', 'index')
+        page = TemplateFormatter('./', inline_assets=True).create_bundle(
+            'package', bundle, 'package/index.html')
+        self.assert_strings_in_page(page, '<title>package</title>',
+                                    bundle.get_data(),
+                                    'const BUNDLE_START = '
+                                    '"package/index.html";',
+                                    'function toggle_visibility')
+        self.assertNotIn('_static', page)
+
+    def test_template_cache(self):
+        with tempfile.TemporaryDirectory() as cache:
+            formatter = TemplateFormatter('./', cache)
+            self.assertIsNone(formatter._lookup)
+            formatter.precompile(['templates/docpage.html'])
+            self.assertTrue(
+                Path(cache, 'templates/docpage.html.py').is_file())
+            module = Module(Path(), 'module1', [])
+            self.assertEqual(
+                TemplateFormatter('./', cache).create_docpage(Path(), module),
+                self.formatter.create_docpage(Path(), module))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,23 @@
+import unittest
+
+from modules.html_minifier import minify_html
+
+
+class HtmlMinifierTest(unittest.TestCase):
+    def test_whitespace(self):
+        self.assertEqual(minify_html('<p>\n    <a href="#">a</a>   b  \n\n'
+                                     '    </p>\n'),
+                         '<p>\n<a href="#">a</a> b\n</p>\n')
+
+    def test_preserved(self):
+        text = ('<pre class="docstring">  a\n\n    b  c</pre>\n  '
+                '<PRE>\n  d</PRE>  <script>\n  let e;</script>\n  '
+                '<style>\n  f {}</style>')
+        self.assertEqual(minify_html(text),
+                         '<pre class="docstring">  a\n\n    b  c</pre>\n'
+                         '<PRE>\n  d</PRE> <script>\n  let e;</script>\n'
+                         '<style>\n  f {}</style>')
+
+
+if __name__ == '__main__':
+    unittest.main()
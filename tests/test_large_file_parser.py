@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import docstrings2html
+from modules.large_file_parser import LargeFileParser
+from modules.module_parser import ModuleParser
+from modules.package_parser import PackageParser
+
+MODULE = '''"""Module docstring"""
+
+def function(a, b=1):
+    """Function docstring"""
+
+
+def _private():
+    """Private"""
+
+
+class Message(Base):
+    """Class docstring"""
+
+    def get(self, value):
+        """Method docstring
+        with two lines"""
+
+    def empty(self):
+        pass
+
+
+class _Hidden:
+    def shown(self):
+        """Method of a private class"""
+'''
+
+
+class LargeFileParserTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name, 'package', 'module_pb2.py')
+        self.path.parent.mkdir()
+        self.path.write_text(MODULE, encoding='utf-8')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_classes(self):
+        for flags in ((False, False), (True, True)):
+            with self.subTest(flags=flags):
+                parser = LargeFileParser(*flags)
+                with parser.open(self.path) as buffer:
+                    result = parser.get_classes(buffer)
+                self.assertEqual(result, ModuleParser(*flags).get_classes(
+                    MODULE.splitlines(keepends=True)))
+
+    def test_summary(self):
+        parser = LargeFileParser(False, False)
+        with parser.open(self.path) as buffer:
+            result = parser.get_classes(buffer, False)
+        self.assertEqual([(class_.name, class_.docstring,
+                           [method.name for method in class_.methods])
+                          for class_ in result],
+                         [('', '', ['function']),
+                          ('Message', '', ['get', 'empty'])])
+
+    def test_empty_file(self):
+        self.path.write_text('', encoding='utf-8')
+        parser = LargeFileParser(False, False)
+        with parser.open(self.path) as buffer:
+            self.assertEqual(parser.get_classes(buffer), [])
+
+    def test_package_parser(self):
+        size = self.path.stat().st_size
+        for summary_size, summarised in ((None, False), (size, True)):
+            with self.subTest(summary_size=summary_size):
+                large_files = LargeFileParser(False, False, size,
+                                              summary_size)
+                parser = PackageParser(docstrings2html.try_read,
+                                       ModuleParser(False, False), [],
+                                       False, large_files=large_files)
+                module = parser.get_packages(self.path.parent).modules[0]
+                self.assertEqual(module.summarised, summarised)
+                self.assertEqual(module.classes[1].name, 'Message')
+                self.assertEqual(len(module.digest), 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,16 @@
+import sys
 import unittest
 
-from modules.module_parser import ModuleParser
+from modules.ast_parser import AstParser
+from modules.module_parser import ModuleParser, Class, Method
+from modules.module_scanner import ModuleScanner
 
 
 class ModuleParserTest(unittest.TestCase):
+    parser_class = ModuleParser
+
     def setUp(self):
-        self.parser = ModuleParser(False, False)
+        self.parser = self.parser_class(False, False)
         self.separator = 'def '
 
     def test_split_lines(self):
@@ -98,28 +103,28 @@ class ModuleParserTest(unittest.TestCase):
                 ['line1', 'def line2(param1, param2): ', '"""line3"""',
                  'line4'])
             self.assertEqual(result[0].name, 'line2')
-            self.assertEqual(result[0].parameters, ['param1', 'param2'])
+            self.assertEqual(result[0].parameters, ('param1', 'param2'))
             self.assertEqual(result[0].docstring, 'line3')
 
         with self.subTest('no docstring'):
-            parser_e = ModuleParser(False, True)
+            parser_e = self.parser_class(False, True)
             lines = ['line1', 'def line2(param1, param2): ', 'line3']
             result = self.parser.get_methods(lines)
             result_e = parser_e.get_methods(lines)
             self.assertEqual(result, [])
             self.assertEqual(result_e[0].name, 'line2')
-            self.assertEqual(result_e[0].parameters, ['param1', 'param2'])
+            self.assertEqual(result_e[0].parameters, ('param1', 'param2'))
             self.assertEqual(result_e[0].docstring, '')
 
         with self.subTest('non-public'):
-            parser_n = ModuleParser(True, False)
+            parser_n = self.parser_class(True, False)
             lines = ['line1', 'def _line2(param1, param2): ', '"""line3"""',
                      'line4']
             result = self.parser.get_methods(lines)
             result_n = parser_n.get_methods(lines)
             self.assertEqual(result, [])
             self.assertEqual(result_n[0].name, '_line2')
-            self.assertEqual(result_n[0].parameters, ['param1', 'param2'])
+            self.assertEqual(result_n[0].parameters, ('param1', 'param2'))
             self.assertEqual(result_n[0].docstring, 'line3')
 
     def test_get_classes(self):
@@ -137,7 +142,7 @@ class ModuleParserTest(unittest.TestCase):
             self.assertEqual(result[0].methods[0].name, 'b')
 
         with self.subTest('non-public'):
-            parser_n = ModuleParser(True, False)
+            parser_n = self.parser_class(True, False)
             lines = ['class _A(object): \n', '"""line"""\n', 'def b(): \n',
                      '"""line"""\n']
             result = self.parser.get_classes(lines)
@@ -154,5 +159,102 @@ class ModuleParserTest(unittest.TestCase):
             self.assertEqual(result[0].methods[0].name, 'b')
 
 
+class EntityTest(unittest.TestCase):
+    def test_slots(self):
+        method = Method('a', ['x'], 'doc')
+        class_ = Class('A', 'object', '', [method])
+        for entity in (method, class_):
+            with self.subTest(type(entity).__name__):
+                self.assertFalse(hasattr(entity, '__dict__'))
+                with self.assertRaises(AttributeError):
+                    entity.other = 1
+
+    def test_interning(self):
+        first = Method(''.join(['na', 'me']), [''.join(['se', 'lf'])], '')
+        second = Method(''.join(['nam', 'e']), [''.join(['sel', 'f'])], '')
+        self.assertIs(first.name, second.name)
+        self.assertIs(first.parameters[0], second.parameters[0])
+        self.assertEqual(first.parameters, ('self',))
+
+
+class ModuleScannerTest(ModuleParserTest):
+    parser_class = ModuleScanner
+
+    def test_multiline_signature(self):
+        result = self.parser.get_methods([
+            'def a(param1,  # comment\n',
+            "      param2: Dict[str, int] = {'(': 1}\n",
+            '      ) -> int:\n',
+            '    """line"""\n'])
+        self.assertEqual(result[0].name, 'a')
+        self.assertEqual(result[0].parameters,
+                         ('param1', "param2: Dict[str, int] = {'(': 1}"))
+        self.assertEqual(result[0].docstring, 'line')
+
+    def test_docstring_quotes(self):
+        with self.subTest('single quotes'):
+            result = self.parser.get_docstring(["'''line1\n", "line2'''\n"])
+            self.assertEqual(result, 'line1\nline2')
+
+        with self.subTest('not the first statement'):
+            result = self.parser.get_methods(['def a():\n', '    b()\n',
+                                              '    """line"""\n'])
+            self.assertEqual(result, [])
+
+        with self.subTest('header in a string'):
+            result = self.parser.get_classes(["x = '''\n", 'class A:\n',
+                                              '    """line"""\n', "'''\n"])
+            self.assertEqual(result, [])
+
+    def test_decorators(self):
+        result = self.parser.get_classes([
+            'class A:\n',
+            '    @property\n',
+            '    @decorator(\n',
+            '        "def b():")\n',
+            '    def c(self): """line"""\n'])
+        self.assertEqual([method.name for method in result[0].methods], ['c'])
+        self.assertEqual(result[0].methods[0].docstring, 'line')
+
+    def test_nested(self):
+        result = self.parser.get_classes([
+            'class A:\n',
+            '    """line"""\n',
+            '    class B:\n',
+            '        def c(self):\n',
+            '            """line"""\n',
+            '            def d():\n',
+            '                """line"""\n',
+            '    def e(self):\n',
+            '        """line"""\n',
+            'def f():\n',
+            '    """line"""\n',
+            'if condition:\n',
+            '    class G:\n',
+            '        """line"""\n'])
+        self.assertEqual([class_.name for class_ in result],
+                         ['', 'A', 'A.B', 'G'])
+        self.assertEqual([[method.name for method in class_.methods]
+                          for class_ in result], [['f'], ['e'], ['c'], []])
+
+
+@unittest.skipIf(sys.version_info < (3, 8), 'AstParser needs Python 3.8')
+class AstParserTest(ModuleScannerTest):
+    parser_class = AstParser
+
+    def test_fallback(self):
+        lines = ['def a(:\n', 'def b():\n', '    """line"""\n']
+        result = self.parser.get_methods(lines)
+        self.assertEqual([method.name for method in result], ['b'])
+        self.assertEqual(self.parser.fallback_count, 1)
+
+    def test_keyword_bases(self):
+        result = self.parser.get_classes(
+            ['class A(Base, metaclass=Meta, **options):\n',
+             '    """line"""\n'])
+        self.assertEqual(result[0].parameters,
+                         'Base, metaclass=Meta, **options')
+
+
 if __name__ == '__main__':
     unittest.main()
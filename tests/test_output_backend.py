@@ -0,0 +1,164 @@
+import contextlib
+import gzip
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+import docstrings2html
+from modules.output_backend import (ArchiveOutput, DirectoryOutput,
+                                    MemoryOutput, create_output)
+
+
+class OutputBackendTest(unittest.TestCase):
+    def test_create_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, expected in (('docs', DirectoryOutput),
+                                   ('site.zip', ArchiveOutput),
+                                   ('site.tar.gz', ArchiveOutput)):
+                with self.subTest(name):
+                    with create_output(Path(directory, name)) as output:
+                        self.assertIsInstance(output, expected)
+                        self.assertEqual(output.directory.name, 'site'
+                                         if expected is ArchiveOutput
+                                         else name)
+
+    def test_directory_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = DirectoryOutput(directory)
+            page = output.directory.joinpath('package', 'index.html')
+            output.write(page, 'index')
+            self.assertEqual(page.read_text(encoding='utf-8'), 'index')
+            output.remove(page)
+            output.remove(page)
+            self.assertFalse(page.exists())
+
+    def test_unchanged_page(self):
+        with tempfile.TemporaryDirectory() as directory:
+            page = Path(directory, 'module.py.html')
+            with DirectoryOutput(directory) as output:
+                output.write(page, 'module')
+                os.utime(page, (0, 0))
+                output.write(page, 'module')
+                self.assertEqual(page.stat().st_mtime, 0)
+                output.write(page, 'changed')
+                self.assertNotEqual(page.stat().st_mtime, 0)
+            self.assertEqual(os.listdir(directory), ['module.py.html'])
+
+    def test_writer_threads(self):
+        with tempfile.TemporaryDirectory() as directory:
+            pages = {Path(directory, 'package', f'{number}.html'): str(number)
+                     for number in range(100)}
+            with DirectoryOutput(directory, 2) as output:
+                for page, text in pages.items():
+                    output.write(page, text)
+                pages[page] = 'last'
+                output.write(page, 'last')
+                output.flush()
+                for page, text in pages.items():
+                    self.assertEqual(page.read_text(encoding='utf-8'), text)
+                self.assertEqual(len(os.listdir(page.parent)), 100)
+                page.parent.joinpath('index.html').mkdir()
+                output.write(page.parent.joinpath('index.html'), 'index')
+                with self.assertRaises(OSError):
+                    output.flush()
+
+    def test_minify_and_compress(self):
+        html = '<div>\n    <p>a  b</p>\n    <pre>  x\n    y</pre>\n</div>\n'
+        with tempfile.TemporaryDirectory() as directory:
+            page = Path(directory, 'module.py.html')
+            script = Path(directory, 'index.js')
+            with DirectoryOutput(directory, 2, True, True) as output:
+                output.write(page, html)
+                output.write(script, 'a  b\n    c')
+                output.flush()
+                self.assertEqual(page.read_text(encoding='utf-8'),
+                                 '<div>\n<p>a b</p>\n<pre>  x\n    y</pre>\n'
+                                 '</div>\n')
+                self.assertEqual(script.read_text(encoding='utf-8'),
+                                 'a  b\n    c')
+                copy = Path(directory, 'module.py.html.gz')
+                self.assertEqual(gzip.decompress(copy.read_bytes()),
+                                 page.read_bytes())
+                self.assertEqual(copy.read_bytes()[4:8], bytes(4))
+                self.assertEqual(output.sizes['pages'], len(html) + 10)
+                self.assertEqual(output.sizes['minified'],
+                                 page.stat().st_size + 10)
+                os.utime(copy, (0, 0))
+                output.write(page, html)
+                output.remove(script)
+            self.assertEqual(copy.stat().st_mtime, 0)
+            self.assertEqual(sorted(os.listdir(directory)),
+                             ['module.py.html', 'module.py.html.gz'])
+
+    def test_stale_compressed_copies(self):
+        with tempfile.TemporaryDirectory() as directory:
+            package = Path(directory, 'package')
+            package.mkdir()
+            module = package.joinpath('module.py')
+            output = Path(directory, 'docs')
+            page = output.joinpath('package', 'module.py.html')
+            for docstring, options in (('first', ['--precompress']),
+                                       ('second', [])):
+                module.write_text('def f():\n    """' + docstring + '"""\n',
+                                  encoding='utf-8')
+                arguments = docstrings2html._parse_arguments(
+                    [str(package), '--incremental', '--no-template-cache',
+                     '--output', str(output), *options])
+                with DirectoryOutput(output, 2, False,
+                                     arguments.precompress) as backend:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        docstrings2html.build(arguments, backend)
+                self.assertIn(docstring, page.read_text(encoding='utf-8'))
+            self.assertFalse(Path(f'{page}.gz').exists())
+
+    def test_archive_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ('site.zip', 'site.tar.xz'):
+                with self.subTest(name):
+                    archive = Path(directory, name)
+                    with ArchiveOutput(archive) as output:
+                        output.write(output.directory.joinpath(
+                            'package', 'index.html'), 'индекс')
+                    if name.endswith('.zip'):
+                        with zipfile.ZipFile(archive) as file:
+                            data = file.read('site/package/index.html')
+                    else:
+                        with tarfile.open(archive) as file:
+                            data = file.extractfile(
+                                'site/package/index.html').read()
+                    self.assertEqual(data.decode('utf-8'), 'индекс')
+
+    def test_archive_remove(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with ArchiveOutput(Path(directory, 'site.zip')) as output:
+                with self.assertRaisesRegex(ValueError, 'site.zip'):
+                    output.remove(output.directory.joinpath('index.html'))
+
+    def test_memory_output(self):
+        output = MemoryOutput('docs')
+        output.write(Path('docs', 'package', 'index.html'), 'index')
+        output.write(Path('docs', 'module.py.html'), 'module')
+        output.remove(Path('docs', 'module.py.html'))
+        self.assertEqual(output.pages, {'package/index.html': 'index'})
+
+    def test_render_pages(self):
+        with tempfile.TemporaryDirectory() as directory:
+            package = Path(directory, 'package')
+            package.mkdir()
+            package.joinpath('module.py').write_text(
+                'def f():\n    """doc"""\n', encoding='utf-8')
+            pages = docstrings2html.render_pages(
+                [str(package), '--index', '--no-template-cache',
+                 '--output', str(Path(directory, 'docs'))])
+            self.assertFalse(Path(directory, 'docs').exists())
+        self.assertIn('package/module.py.html', pages)
+        self.assertIn('package/index.html', pages)
+        self.assertIn('doc', pages['package/module.py.html'])
+
+
+if __name__ == '__main__':
+    unittest.main()
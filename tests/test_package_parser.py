@@ -1,9 +1,12 @@
+import tempfile
 import unittest
 from pathlib import Path
 
 import docstrings2html
-from modules.module_parser import ModuleParser
+from modules.build_stats import BuildStats
+from modules.module_parser import ModuleParser, Class, Method
 from modules.package_parser import PackageParser, Package, Module
+from modules.prefetch_reader import PrefetchReader
 
 
 class TempFile:
@@ -53,6 +56,20 @@ class PackageParserTest(unittest.TestCase):
         self.assertEqual(result.name, 'test.py')
         self.assertEqual(result.classes[0].methods[0].name, 'test')
 
+    def test_get_module_stats(self):
+        self.parser.stats = BuildStats()
+        with TempFile(Path('test.py'),
+                      '''
+                      def test():
+                      """doc"""
+                      ''') as file:
+            self.parser._get_module(file, Path())
+        result = self.parser.stats.modules['test.py']
+        self.assertEqual(set(result), {'read', 'read_bytes', 'parse',
+                                       'entities'})
+        self.assertGreater(result['read_bytes'], 0)
+        self.assertEqual(result['entities'], 2)
+
     def test_package_is_empty(self):
         with self.subTest('empty'):
             package = Package(Path(), '', '', [], [])
@@ -85,3 +102,112 @@ class PackageParserTest(unittest.TestCase):
         self.assertEqual(result.docstring, 'docstring')
         self.assertTrue(any(module.name == 'test.py' for module in result.modules))
         self.assertTrue(all(module.name != 'test.txt' for module in result.modules))
+
+    def test_package_digest(self):
+        def create_package(module_digest):
+            module = Module(Path('a/b.py'), 'b.py', [], module_digest)
+            nested = Package(Path('a'), 'a', '', [module], [])
+            return Package(Path(), '', '', [], [nested])
+
+        self.assertEqual(create_package('1').get_digest(),
+                         create_package('1').get_digest())
+        self.assertNotEqual(create_package('1').get_digest(),
+                            create_package('2').get_digest())
+        self.assertEqual(create_package('1').get_shallow_digest(),
+                         create_package('2').get_shallow_digest())
+        self.assertNotEqual(
+            create_package('1').packages[0].get_shallow_digest(),
+            create_package('2').packages[0].get_shallow_digest())
+
+    def test_module_summarise(self):
+        method = Method('b', ['self', 'c'], 'doc')
+        module = Module(Path('a.py'), 'a.py',
+                        [Class('A', 'object', 'doc', [method])], 'digest')
+        result = module.summarise()
+        self.assertEqual(result.path, module.path)
+        self.assertEqual(result.digest, 'digest')
+        self.assertEqual(result.classes[0].name, 'A')
+        self.assertEqual(result.classes[0].docstring, '')
+        self.assertEqual(result.classes[0].methods[0].name, 'b')
+        self.assertEqual(result.classes[0].methods[0].docstring, '')
+
+    def test_stream_packages(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            (root / 'nested').mkdir()
+            for path in (root / 'a.py', root / 'nested' / 'b.py'):
+                path.write_text('def f():\n    """doc"""\n',
+                                encoding='utf-8')
+            stream = self.parser.stream_packages(root)
+            modules = list(stream)
+            expected = self.parser.get_packages(root)
+
+        self.assertEqual(sorted(module.name for module in modules),
+                         ['a.py', 'b.py'])
+        self.assertTrue(all(module.classes[0].methods[0].docstring == 'doc'
+                            for module in modules))
+        self.assertEqual([package.path for package in stream.package],
+                         [package.path for package in expected])
+        self.assertEqual(stream.package.get_digest(), expected.get_digest())
+
+    def test_prefetch(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            for number in range(3):
+                package = root.joinpath(f'package{number}')
+                package.mkdir()
+                package.joinpath('__init__.py').write_text(
+                    f'"""package{number}"""\n', encoding='utf-8')
+                for module in range(5):
+                    package.joinpath(f'module{module}.py').write_text(
+                        f'def f():\n    """doc{module}"""\n',
+                        encoding='utf-8')
+            expected = self.parser.get_packages(root)
+            for depth in (1, 4, 100):
+                with self.subTest(depth=depth), \
+                        PrefetchReader(depth) as reader:
+                    self.parser.reader = reader
+                    result = self.parser.get_packages(root)
+                    self.assertEqual(result, expected)
+                    self.assertEqual(reader._futures, {})
+
+    def test_update_module(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory, 'root')
+            root.mkdir()
+            module_file = root / 'a.py'
+            module_file.write_text('def f():\n    """doc"""\n',
+                                   encoding='utf-8')
+            package = self.parser.get_packages(root)
+            old_digest = package.get_digest()
+
+            with self.subTest('changed'):
+                module_file.write_text('def g():\n    """doc"""\n',
+                                       encoding='utf-8')
+                module, parents = self.parser.update_module(module_file,
+                                                            root, package)
+                self.assertEqual(parents, [package])
+                self.assertEqual([module.name for module in package.modules],
+                                 ['a.py'])
+                self.assertEqual(package.modules[0].classes[0].methods[0].name,
+                                 'g')
+                self.assertNotEqual(package.get_digest(), old_digest)
+
+            with self.subTest('added to a new package'):
+                (root / 'new').mkdir()
+                new_file = root / 'new' / 'b.py'
+                new_file.write_text('def h():\n    """doc"""\n',
+                                    encoding='utf-8')
+                module, parents = self.parser.update_module(new_file, root,
+                                                            package)
+                self.assertEqual(module.path, Path('root/new/b.py'))
+                self.assertEqual([parent.path for parent in parents],
+                                 [Path('root'), Path('root/new')])
+                self.assertEqual(package.packages[0].modules, [module])
+
+            with self.subTest('removed'):
+                new_file.unlink()
+                module, parents = self.parser.update_module(new_file, root,
+                                                            package)
+                self.assertIsNone(module)
+                self.assertTrue(parents[-1].is_empty())
@@ -0,0 +1,30 @@
+import base64
+import gzip
+import json
+import unittest
+from pathlib import Path
+
+from modules.page_bundle import PageBundle
+
+
+class PageBundleTest(unittest.TestCase):
+    def test_add_page(self):
+        bundle = PageBundle()
+        bundle.add_page(Path('package', 'module.py.html'), '<p>страница</p>')
+        data = bundle.pages['package/module.py.html']
+        self.assertEqual(gzip.decompress(base64.b64decode(data))
+                         .decode('utf-8'), '<p>страница</p>')
+        self.assertEqual(bundle.size, len('<p>страница</p>'.encode('utf-8')))
+        # No timestamp in the header keeps the bundle the same between runs
+        self.assertEqual(base64.b64decode(data)[4:8], bytes(4))
+
+    def test_get_data(self):
+        bundle = PageBundle()
+        bundle.add_page('</script>.html', 'page')
+        data = bundle.get_data()
+        self.assertNotIn('<', data)
+        self.assertEqual(list(json.loads(data)), ['</script>.html'])
+
+
+if __name__ == '__main__':
+    unittest.main()
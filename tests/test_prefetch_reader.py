@@ -0,0 +1,35 @@
+import threading
+import unittest
+
+from modules.prefetch_reader import PrefetchReader
+
+
+class PrefetchReaderTest(unittest.TestCase):
+    def test_read(self):
+        threads = {}
+
+        def read(path):
+            threads[path] = threading.get_ident()
+            return path.upper()
+
+        with PrefetchReader(2) as reader:
+            reader.prefetch(read, 'a')
+            reader.prefetch(read, 'a')
+            self.assertEqual(reader.read(read, 'a'), 'A')
+            self.assertEqual(reader.read(read, 'b'), 'B')
+        self.assertNotEqual(threads['a'], threading.get_ident())
+        self.assertEqual(threads['b'], threading.get_ident())
+        self.assertGreater(reader.stalled, 0)
+
+    def test_error(self):
+        def read(path):
+            raise OSError(path)
+
+        with PrefetchReader(1) as reader:
+            reader.prefetch(read, 'a')
+            with self.assertRaises(OSError):
+                reader.read(read, 'a')
+
+
+if __name__ == '__main__':
+    unittest.main()
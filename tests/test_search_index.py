@@ -0,0 +1,94 @@
+import json
+import unittest
+from pathlib import Path
+
+from modules.module_parser import Class, Method
+from modules.package_parser import Module
+from modules.search_index import SearchIndex, _get_name_tokens
+
+
+def load_script(text):
+    """Return the arguments passed to the callback of a data script"""
+    return json.loads('[' + text[text.index('(') + 1:text.rindex(')')] + ']')
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        method = Method('get_value', ['self', 'default=None'],
+                        'Return the stored value')
+        function = Method('parse', ['text'], 'Parse a document')
+        self.module = Module(Path('pkg/data_store.py'), 'data_store.py',
+                             [Class('', '', '', [function]),
+                              Class('DataStore', 'object', 'Keeps a value',
+                                    [method])])
+
+    def test_get_name_tokens(self):
+        self.assertEqual(_get_name_tokens('HTTPServer'),
+                         {'httpserver', 'http', 'server'})
+        self.assertEqual(_get_name_tokens('__get_value__'),
+                         {'get_value', 'get', 'value'})
+
+    def test_add_module(self):
+        index = SearchIndex()
+        index.add_module(self.module)
+        _, entities, postings = index._build()
+        self.assertEqual([entity[:3] for entity in entities],
+                         [('module', 'data_store.py', ''),
+                          ('function', 'parse', 'text'),
+                          ('class', 'DataStore', 'object'),
+                          ('method', 'DataStore.get_value',
+                           'self, default=None')])
+        self.assertEqual(postings['value'], ([3], [2]))
+        self.assertEqual(postings['store'][0], [0, 2])
+        self.assertNotIn('self', postings)
+
+    def test_replace_module(self):
+        index = SearchIndex()
+        index.add_module(self.module)
+        self.module.classes[0].methods[0].name = 'load'
+        index.add_module(self.module)
+        modules, entities, postings = index._build()
+        self.assertEqual(modules, ['pkg/data_store.py'])
+        self.assertEqual(entities[1][1], 'load')
+        self.assertEqual(postings['parse'], ([], [1]))
+        index.remove_module(self.module.path)
+        self.assertEqual(index._build(), ([], [], {}))
+
+    def test_shards(self):
+        index = SearchIndex(shard_size=3, chunk_size=2)
+        for name in ('a', 'b', 'c'):
+            self.module.path = Path(name, 'data_store.py')
+            index.add_module(self.module)
+        postings = index._build()[2]
+        files = index.get_files()
+        meta = load_script(files[SearchIndex.INDEX])[0]
+        self.assertEqual(meta['chunk_size'], 2)
+        self.assertEqual(len([name for name in files
+                              if name.startswith('entities-')]), 6)
+        tokens = {}
+        for prefix, filename in meta['shards'].items():
+            shard_prefix, shard = load_script(files[filename])
+            self.assertEqual(shard_prefix, prefix)
+            for token in shard:
+                self.assertTrue(token.startswith(prefix))
+            tokens.update(shard)
+        self.assertEqual(tokens.keys(), postings.keys())
+        self.assertGreater(max(map(len, meta['shards'])), 1)
+
+        chunk = load_script(files['entities-2.js'])[1]
+        self.assertEqual(chunk['modules'], ['b/data_store.py'])
+        self.assertEqual(chunk['entities'],
+                         [['module', 'data_store.py', '', 0, ''],
+                          ['function', 'parse', 'text', 0,
+                           'Parse a document']])
+
+    def test_max_postings(self):
+        index = SearchIndex(max_postings=2)
+        for name in ('a', 'b', 'c'):
+            self.module.path = Path(name, 'data_store.py')
+            index.add_module(self.module)
+        self.assertEqual(len(index._build()[2]['parse'][0]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from pathlib import Path
+
+from modules.static_assets import StaticAssets
+
+SOURCE = Path('templates/static')
+
+
+class StaticAssetsTest(unittest.TestCase):
+    def test_hashed_names(self):
+        assets = StaticAssets(SOURCE)
+        path = assets.get_path(Path('base'), 'style.css')
+        self.assertEqual(path.parent, Path('base', StaticAssets.DIRECTORY))
+        self.assertRegex(path.name, r'^style\.[0-9a-f]{12}\.css$')
+        self.assertIn(assets.digests['style.css'][:12], path.name)
+
+    def test_get_tag(self):
+        with self.subTest('linked'):
+            assets = StaticAssets(SOURCE)
+            self.assertEqual(
+                assets.get_tag(Path('base'), 'script.js'),
+                f'<script src="{assets.get_path(Path("base"), "script.js")}">'
+                '</script>')
+            self.assertIn('<link rel="stylesheet"',
+                          assets.get_tag(Path('base'), 'style.css'))
+
+        with self.subTest('inline'):
+            assets = StaticAssets(SOURCE, inline=True)
+            tag = assets.get_tag(Path('base'), 'style.css')
+            self.assertTrue(tag.startswith('<style>'))
+            self.assertIn(assets.texts['style.css'], tag)
+
+    def test_get_digest(self):
+        self.assertNotEqual(StaticAssets(SOURCE).get_digest(),
+                            StaticAssets(SOURCE, inline=True).get_digest())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from pathlib import Path
+
+from modules.module_parser import Class, Method
+from modules.package_parser import Module, Package
+from modules.symbol_index import SymbolIndex, get_qualified_name, link_names
+
+
+class SymbolIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.base = Module(Path('pkg/base.py'), 'base.py',
+                           [Class('Node', 'object', '', []),
+                            Class('Value', '', '', [])])
+        self.tree = Module(Path('pkg/tree.py'), 'tree.py',
+                           [Class('Tree', 'base.Node', '', [
+                               Method('add', ['self', 'node: Node',
+                                              "value: 'Value' = None",
+                                              'Node=None'], '')])])
+        self.other = Module(Path('other/__init__.py'), '__init__.py',
+                            [Class('Value', '', '', [])])
+        self.package = Package(Path('pkg'), 'pkg', '',
+                               [self.base, self.tree], [])
+
+    def test_get_qualified_name(self):
+        self.assertEqual(get_qualified_name(Path('pkg/base.py')), 'pkg.base')
+        self.assertEqual(get_qualified_name(Path('pkg/__init__.py')), 'pkg')
+
+    def test_resolve(self):
+        index = SymbolIndex([self.package])
+        self.assertEqual(index.resolve(self.tree),
+                         {'base.Node': 'pkg/base.py.html#Node',
+                          'Node': 'pkg/base.py.html#Node',
+                          'Value': 'pkg/base.py.html#Value'})
+        self.assertEqual(index.resolve(self.base), {})
+
+    def test_ambiguous(self):
+        index = SymbolIndex([self.package])
+        index.add_module(self.other)
+        self.assertEqual(index.symbols['Value'], '')
+        self.assertNotIn('Value', index.resolve(self.tree))
+        self.assertEqual(index.symbols['pkg.base.Value'],
+                         'pkg/base.py.html#Value')
+        self.assertEqual(index.symbols['other.Value'],
+                         'other/__init__.py.html#Value')
+
+    def test_link_names(self):
+        links = SymbolIndex([self.package]).resolve(self.tree)
+        self.assertEqual(
+            link_names('node: Node', links, Path('..'), True),
+            'node: <a class="symbol-link" '
+            'href="../pkg/base.py.html#Node">Node</a>')
+        self.assertEqual(link_names('Node=None', links, Path('..'), True),
+                         'Node=None')
+        self.assertEqual(link_names("x='Node'", links, Path('..'), True),
+                         "x='Node'")
+        self.assertEqual(link_names('Node', None, Path('..')), 'Node')
+
+    def test_annotations_with_defaults(self):
+        links = {'Node': 'pkg/base.py.html#Node'}
+        link = '<a class="symbol-link" href="pkg/base.py.html#Node">Node</a>'
+        for text, expected in (
+                ('node: Node = None', f'node: {link} = None'),
+                ('node: Node=None', f'node: {link}=None'),
+                ('node: "Node" = None', f'node: "{link}" = None'),
+                ("node: 'Optional[Node]'", f"node: 'Optional[{link}]'"),
+                ("node: Node = Node(Node='Node')",
+                 f"node: {link} = {link}(Node='Node')"),
+                ('node: int = Node', f'node: int = {link}')):
+            with self.subTest(text=text):
+                self.assertEqual(link_names(text, links, Path(), True),
+                                 expected)
+        self.assertEqual(link_names('Node, metaclass=Node', links, Path()),
+                         f'{link}, metaclass={link}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from pathlib import Path
+
+from modules.module_parser import ModuleParser, Class, Method
+from modules.package_parser import Module
+from modules.template_formatter import TemplateFormatter
+from modules.worker_pool import WorkerPool
+
+
+class WorkerPoolTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = WorkerPool(2, './')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_get_classes(self):
+        parser = ModuleParser(False, False)
+        contents = [['def a():\n', f'"""doc{i}"""\n'] for i in range(10)]
+        result = list(self.pool.get_classes(parser, contents))
+        self.assertEqual(result, [parser.get_classes(lines)
+                                  for lines in contents])
+
+    def test_create_docpages(self):
+        modules = [Module(Path(f'module{i}.py'), f'module{i}.py',
+                          [Class('', '', '', [Method('a', [], f'doc{i}')])])
+                   for i in range(10)]
+        formatter = TemplateFormatter('./')
+        result = list(self.pool.create_docpages(modules))
+        self.assertEqual(result,
+                         list(formatter.create_docpages(modules)))
+
+
+if __name__ == '__main__':
+    unittest.main()